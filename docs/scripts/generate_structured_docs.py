@@ -277,10 +277,17 @@ def generate_core_module_docs(output_dir):
         "canvas": "Canvas operations and flow management",
         "ci": "CI/CD convenience functions for flow deployment",
         "config": "Configuration management",
+        "counters": "Counter snapshots, deltas and bulk reset",
         "extensions": "NiFi extensions (NAR) management",
+        "flowfile_package": "FlowFile package v3 encoding and decoding",
+        "history": "Flow configuration audit history export",
         "layout": "Canvas layout and component positioning",
+        "metrics": "Component status history and metrics",
         "parameters": "Parameter context management",
         "profiles": "Profile management for multi-environment configurations",
+        "provenance": "Provenance event search and export",
+        "sampling": "Status sampling into a local time-series store",
+        "s2s": "Site-to-site FlowFile transfer over HTTP",
         "security": "Security and authentication utilities",
         "system": "System information and diagnostics",
         "utils": "Utility functions and helpers",
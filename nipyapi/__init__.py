@@ -27,6 +27,13 @@ __all__ = [
     "profiles",  # Profile switching and configuration
     "layout",  # Canvas positioning, flow structure analysis
     "system",  # System info, cluster status
+    "metrics",  # Status history and metrics in columnar form
+    "sampling",  # Background status sampling into a local time-series store
+    "provenance",  # Provenance event search, windowed streaming, export
+    "s2s",  # Site-to-site FlowFile transfer over HTTP
+    "flowfile_package",  # FlowFile package v3 encoding and decoding
+    "history",  # Flow configuration audit history export
+    "counters",  # Counter snapshots, deltas, rates and bulk reset
     "bulletins",  # Bulletin retrieval, filtering, clearing
     "extensions",  # NiFi extensions (NARs) management
     "utils",  # File ops, retries, wait patterns, filtering
@@ -117,11 +117,10 @@ def get_bulletin_board(pg_id=None, source_name=None, message=None, limit=None, d
     # Build group_id filter - use regex to include descendants if requested
     if pg_id is not None:
         if descendants:
-            # Get all child PG IDs recursively
-            all_pgs = nipyapi.canvas.list_all_process_groups(pg_id=pg_id)
-            pg_ids = [pg_id] + [pg.id for pg in all_pgs]
+            # Get all child PG IDs recursively from one status call
+            pg_ids = nipyapi.canvas.get_process_group_tree(pg_id).descendant_ids()
             # Build regex pattern: "id1|id2|id3..."
-            kwargs["group_id"] = "|".join(pg_ids)
+            kwargs["group_id"] = "|".join(sorted(pg_ids))
         else:
             kwargs["group_id"] = pg_id
 
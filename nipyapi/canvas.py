@@ -4,9 +4,17 @@
 For interactions with the NiFi Canvas.
 """
 
+import base64
+import heapq
+import io
+import json
 import logging
 import os
-from collections import namedtuple
+import tarfile
+import threading
+import time
+from array import array
+from collections import deque, namedtuple
 
 import nipyapi
 from nipyapi.utils import exception_handler
@@ -14,11 +22,321 @@ from nipyapi.utils import exception_handler
 # Named tuple for get_flow_components return value
 FlowSubgraph = namedtuple("FlowSubgraph", ["components", "connections"])
 
+# Named tuple for per-component schedule_many outcomes
+ScheduleResult = namedtuple("ScheduleResult", ["id", "kind", "state", "success", "error"])
+
+# Named tuple for per-processor update_processors_bulk outcomes
+BulkUpdateResult = namedtuple("BulkUpdateResult", ["id", "name", "changes", "success", "error"])
+
+# Named tuple for get_controller_dependency_graph return value
+ControllerDependencyGraph = namedtuple(
+    "ControllerDependencyGraph", ["controllers", "depends_on", "levels"]
+)
+
+# Named tuple for get_backpressure_hotspots entries
+BackpressureHotspot = namedtuple(
+    "BackpressureHotspot",
+    [
+        "id",
+        "name",
+        "group_id",
+        "group_name",
+        "fill_ratio",
+        "count_ratio",
+        "bytes_ratio",
+        "flow_files_queued",
+        "bytes_queued",
+        "source_id",
+        "source_name",
+        "destination_id",
+        "destination_name",
+        "millis_to_backpressure",
+    ],
+)
+
+
+class ProcessGroupTree(
+    namedtuple("ProcessGroupTree", ["root_id", "groups", "parents", "children"])
+):
+    """
+    Lightweight Process Group hierarchy built by get_process_group_tree.
+
+    Attributes:
+        root_id (str): UUID of the group the tree was built from
+        groups (dict): Process Group UUID to its aggregate
+            ProcessGroupStatusSnapshotDTO, carrying the name and the
+            status counters (flow_files_queued, active_thread_count, ...)
+        parents (dict): Process Group UUID to its parent UUID; the root
+            maps to None
+        children (dict): Process Group UUID to a list of child UUIDs
+    """
+
+    __slots__ = ()
+
+    def name(self, pg_id):
+        """Returns the name of a Process Group in the tree"""
+        return self.groups[pg_id].name
+
+    def descendant_ids(self, pg_id=None, include_self=True):
+        """
+        Returns the set of Process Group UUIDs nested under pg_id.
+
+        Args:
+            pg_id (str): Group to start from, defaults to the tree root
+            include_self (bool): Whether to include pg_id in the set
+
+        Returns:
+            set(str)
+        """
+        pg_id = pg_id or self.root_id
+        out = {pg_id} if include_self else set()
+        pending = list(self.children[pg_id])
+        while pending:
+            child_id = pending.pop()
+            out.add(child_id)
+            pending.extend(self.children[child_id])
+        return out
+
+    def ancestor_ids(self, pg_id):
+        """Returns the UUIDs from the parent of pg_id up to the tree root"""
+        out = []
+        parent_id = self.parents[pg_id]
+        while parent_id is not None:
+            out.append(parent_id)
+            parent_id = self.parents[parent_id]
+        return out
+
+
+class ConnectionGraph(
+    namedtuple(
+        "ConnectionGraph",
+        [
+            "ids",
+            "index",
+            "components",
+            "connections",
+            "edge_source",
+            "edge_target",
+            "out_offsets",
+            "out_edges",
+            "in_offsets",
+            "in_edges",
+        ],
+    )
+):
+    """
+    Directed graph of the connections on a canvas, built by
+    get_connection_graph.
+
+    Nodes are connectable components (processors, ports, funnels and remote
+    ports), numbered by their position in ids. Edges are connections,
+    numbered by their position in connections. Adjacency is held in compact
+    CSR arrays: the outgoing edges of node n are
+    out_edges[out_offsets[n]:out_offsets[n + 1]], likewise for incoming.
+    Every traversal visits each node and edge at most once.
+
+    Methods accept a component id or any entity with an id.
+
+    Attributes:
+        ids (list[str]): Node index to component UUID
+        index (dict): Component UUID to node index
+        components (dict): Component UUID to its entity; remote process
+            group ports are nodes without an entity
+        connections (list[ConnectionEntity]): Edge index to connection
+        edge_source (array): Edge index to source node index
+        edge_target (array): Edge index to destination node index
+        out_offsets (array): CSR offsets into out_edges, per node
+        out_edges (array): Edge indices grouped by source node
+        in_offsets (array): CSR offsets into in_edges, per node
+        in_edges (array): Edge indices grouped by destination node
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def _slice(offsets, edges, node):
+        """Returns the CSR slice of edge indices for a node"""
+        start, end = offsets[node], offsets[node + 1]
+        return edges[start:end]
+
+    def _node(self, component):
+        """Resolves an id or entity to its node index"""
+        component_id = getattr(component, "id", component)
+        if component_id not in self.index:
+            raise ValueError(f"Component {component_id} is not in the connection graph")
+        return self.index[component_id]
+
+    def outgoing(self, component):
+        """Returns the connections leaving a component"""
+        node = self._node(component)
+        return [self.connections[e] for e in self._slice(self.out_offsets, self.out_edges, node)]
+
+    def incoming(self, component):
+        """Returns the connections arriving at a component"""
+        node = self._node(component)
+        return [self.connections[e] for e in self._slice(self.in_offsets, self.in_edges, node)]
+
+    def _reach(self, starts, offsets, edges, ends):
+        """Breadth-first walk along one edge direction, returns node indices"""
+        seen = set(starts)
+        queue = deque(starts)
+        while queue:
+            node = queue.popleft()
+            for e in self._slice(offsets, edges, node):
+                nxt = ends[e]
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+    def downstream(self, component):
+        """
+        Returns the UUIDs of every component reachable from a component.
+
+        Follows connections across Process Group boundaries through ports,
+        so this is the set a change to the component may affect.
+        """
+        node = self._node(component)
+        reached = self._reach([node], self.out_offsets, self.out_edges, self.edge_target)
+        reached.discard(node)
+        return {self.ids[n] for n in reached}
+
+    def upstream(self, component):
+        """
+        Returns the UUIDs of every component that can send data to a
+        component, e.g. everything feeding an Input Port.
+        """
+        node = self._node(component)
+        reached = self._reach([node], self.in_offsets, self.in_edges, self.edge_source)
+        reached.discard(node)
+        return {self.ids[n] for n in reached}
+
+    def sources(self, component):
+        """
+        Returns the UUIDs of the upstream components with no incoming
+        connections, i.e. where the data reaching a component originates.
+        """
+        return {
+            x
+            for x in self.upstream(component)
+            if self.in_offsets[self.index[x]] == self.in_offsets[self.index[x] + 1]
+        }
+
+    def subgraph(self, component):
+        """
+        Returns the connected flow around a component, across groups.
+
+        Args:
+            component: Component id or entity to start from
+
+        Returns:
+            :class:`FlowSubgraph` of the component entities and the
+            connections between them
+        """
+        node = self._node(component)
+        seen = {node}
+        queue = deque([node])
+        while queue:
+            current = queue.popleft()
+            neighbours = [
+                self.edge_target[e] for e in self._slice(self.out_offsets, self.out_edges, current)
+            ] + [self.edge_source[e] for e in self._slice(self.in_offsets, self.in_edges, current)]
+            for nxt in neighbours:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return FlowSubgraph(
+            components=[
+                self.components[self.ids[n]] for n in seen if self.ids[n] in self.components
+            ],
+            connections=[
+                conn for e, conn in enumerate(self.connections) if self.edge_source[e] in seen
+            ],
+        )
+
+    def find_cycles(self, include_self_loops=False):  # pylint: disable=too-many-locals
+        """
+        Returns the loops in the flow, as lists of component UUIDs.
+
+        Each loop is a strongly connected set of components, found with an
+        iterative Tarjan search in linear time.
+
+        Args:
+            include_self_loops (bool): Whether to report single components
+                connected to themselves, such as retry loops
+
+        Returns:
+            list[list[str]]
+        """
+        order = [-1] * len(self.ids)
+        low = [0] * len(self.ids)
+        on_stack = [False] * len(self.ids)
+        stack = []
+        out = []
+        counter = 0
+        for root in range(len(self.ids)):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [[root, self.out_offsets[root]]]
+            while work:
+                node, pos = work[-1]
+                if pos < self.out_offsets[node + 1]:
+                    work[-1][1] += 1
+                    nxt = self.edge_target[self.out_edges[pos]]
+                    if order[nxt] == -1:
+                        order[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append([nxt, self.out_offsets[nxt]])
+                    elif on_stack[nxt]:
+                        low[node] = min(low[node], order[nxt])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] != order[node]:
+                    continue
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    members.append(member)
+                    if member == node:
+                        break
+                if len(members) > 1 or (include_self_loops and node in self._successors(node)):
+                    out.append([self.ids[n] for n in reversed(members)])
+        return out
+
+    def _successors(self, node):
+        """Returns the node indices a node connects to"""
+        return [self.edge_target[e] for e in self._slice(self.out_offsets, self.out_edges, node)]
+
+
+# FlowDTO attributes holding revisioned component entities
+_FLOW_COMPONENT_KINDS = (
+    "process_groups",
+    "processors",
+    "connections",
+    "input_ports",
+    "output_ports",
+    "funnels",
+    "labels",
+    "remote_process_groups",
+)
+
 __all__ = [
     "get_root_pg_id",
+    "search_flow",
     "recurse_flow",
     "get_flow",
     "get_process_group_status",
+    "get_process_group_tree",
+    "ProcessGroupTree",
     "get_process_group",
     "list_all_process_groups",
     "delete_process_group",
@@ -33,15 +351,21 @@ __all__ = [
     "get_processor",
     "schedule_processor",
     "schedule_port",
+    "schedule_many",
+    "ScheduleResult",
     "get_funnel",
     "update_processor",
+    "update_processors_bulk",
+    "BulkUpdateResult",
     "prepare_processor_config",
     "prepare_controller_config",
     "purge_connection",
     "list_flowfiles",
+    "clear_flowfile_listing_cache",
     "get_flowfile_details",
     "get_flowfile_content",
     "peek_flowfiles",
+    "export_flowfiles",
     "purge_process_group",
     "schedule_components",
     "get_bulletins",
@@ -54,16 +378,24 @@ __all__ = [
     "create_connection",
     "delete_connection",
     "get_component_connections",
+    "get_connection_graph",
+    "get_backpressure_hotspots",
+    "BackpressureHotspot",
+    "ConnectionGraph",
     "create_controller",
     "list_all_controllers",
     "delete_controller",
     "update_controller",
     "schedule_controller",
     "schedule_all_controllers",
+    "get_controller_dependency_graph",
+    "schedule_controllers_ordered",
+    "ControllerDependencyGraph",
     "get_controller",
     "list_all_controller_types",
     "get_controller_type",
     "get_controller_service_docs",
+    "list_all_components",
     "list_all_by_kind",
     "list_all_input_ports",
     "list_all_output_ports",
@@ -92,6 +424,10 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
+# Latest (timestamp, summaries) FlowFile queue listing per connection id
+_flowfile_listings = {}
+_flowfile_listings_lock = threading.Lock()
+
 
 def get_root_pg_id():
     """
@@ -102,7 +438,58 @@ def get_root_pg_id():
     return nipyapi.nifi.FlowApi().get_process_group_status("root").process_group_status.id
 
 
-def recurse_flow(pg_id="root"):
+def search_flow(term, pg_id=None):
+    """
+    Runs NiFi's canvas search for a term.
+
+    NiFi matches the term, case insensitively, against component names, ids,
+    comments, property values and more, and only returns components the
+    current user may read.
+
+    Args:
+        term (str): The text to search for
+        pg_id (str): Optional Process Group UUID to scope the search to
+
+    Returns:
+         :class:`~nipyapi.nifi.models.SearchResultsDTO`: Results grouped by
+         component kind, e.g. processor_results, process_group_results,
+         controller_service_node_results.
+
+    Example::
+
+        results = nipyapi.canvas.search_flow("kafka")
+        for r in results.processor_results or []:
+            print(r.id, r.name, r.matches)
+    """
+    assert isinstance(term, str)
+    kwargs = {"q": term}
+    if pg_id:
+        kwargs["a"] = pg_id
+    with nipyapi.utils.rest_exceptions():
+        return nipyapi.nifi.FlowApi().search_flow(**kwargs).search_results_dto
+
+
+def _search_unique_id(name, result_attr):
+    """
+    Finds the id of the one component of a kind named exactly 'name'.
+
+    Returns None when search lookups are disabled, or when the search does
+    not give exactly one match, so the caller falls back to a full listing.
+    """
+    if not nipyapi.config.search_lookups:
+        return None
+    try:
+        results = getattr(search_flow(name), result_attr) or []
+    except ValueError as e:
+        log.debug("Search lookup for %s failed, falling back to listing: %s", name, e)
+        return None
+    matches = [x.id for x in results if x.name == name]
+    if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def recurse_flow(pg_id="root", detail="all"):
     """
     Returns information about a Process Group and all its Child Flows.
 
@@ -114,39 +501,55 @@ def recurse_flow(pg_id="root"):
 
     Args:
         pg_id (str): The Process Group UUID
+        detail (str): 'all' or 'ui'; passed to get_flow for every group
 
     Returns:
          :class:`~nipyapi.nifi.models.ProcessGroupFlowEntity`: enriched NiFi Flow object
     """
     assert isinstance(pg_id, str), "pg_id should be a string"
 
-    out = get_flow(pg_id)
+    out = get_flow(pg_id, detail)
     tasks = [(x.id, x) for x in out.process_group_flow.flow.process_groups]
     while tasks:
         this_pg_id, this_parent_obj = tasks.pop()
-        this_flow = get_flow(this_pg_id)
+        this_flow = get_flow(this_pg_id, detail)
         setattr(this_parent_obj, "nipyapi_extended", this_flow)
         tasks += [(x.id, x) for x in this_flow.process_group_flow.flow.process_groups]
     return out
 
 
-def get_flow(pg_id="root"):
+def get_flow(pg_id="root", detail="all"):
     """
     Returns information about a Process Group and flow.
 
     This surfaces the native implementation, for the recursed implementation
     see 'recurse_flow'
 
+    With detail='ui' NiFi returns the trimmed payload its own UI renders
+    from: ids, names, positions, state, revisions and connection endpoints
+    are kept, but processor configuration and property descriptors are
+    dropped. This is much smaller on large groups, and is enough for layout
+    and graph work, but the components should not be used where their
+    configuration is read; fetch them individually instead. NiFi does not
+    guarantee which fields the trimmed payload keeps between releases.
+
     Args:
         pg_id (str): id of the Process Group to retrieve, defaults to the root
             process group if not set
+        detail (str): 'all' (default) for full component entities, or 'ui'
+            for the trimmed payload
 
     Returns:
          :class:`~nipyapi.nifi.models.ProcessGroupFlowEntity`: The Process Group object
     """
     assert isinstance(pg_id, str), "pg_id should be a string"
+    assert detail in ["all", "ui"], "detail should be 'all' or 'ui'"
     with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.FlowApi().get_flow(pg_id)
+        out = nipyapi.nifi.FlowApi().get_flow(pg_id, ui_only=detail == "ui")
+    flow = out.process_group_flow.flow
+    for kind in _FLOW_COMPONENT_KINDS:
+        nipyapi.utils.cache_revision(getattr(flow, kind) or [])
+    return out
 
 
 def get_process_group_status(pg_id="root", detail="names"):
@@ -175,6 +578,50 @@ def get_process_group_status(pg_id="root", detail="names"):
     return raw
 
 
+def get_process_group_tree(pg_id="root"):
+    """
+    Builds the Process Group hierarchy below pg_id from a single request.
+
+    Uses the recursive Process Group status call, which returns every nested
+    group's id, name and aggregate counters in one response, rather than
+    fetching the flow of each group in turn as list_all_process_groups does.
+    Prefer this whenever only group ids, names or status counters are needed.
+
+    Args:
+        pg_id (str): The UUID of the Process Group to start from, defaults to
+            the Canvas root
+
+    Returns:
+        :class:`ProcessGroupTree`
+
+    Example::
+
+        tree = nipyapi.canvas.get_process_group_tree()
+        for child_id in tree.children[tree.root_id]:
+            print(tree.name(child_id), tree.groups[child_id].flow_files_queued)
+    """
+    assert isinstance(pg_id, str), "pg_id should be a string"
+    with nipyapi.utils.rest_exceptions():
+        status = (
+            nipyapi.nifi.FlowApi()
+            .get_process_group_status(id=pg_id, recursive=True)
+            .process_group_status
+        )
+    groups = {}
+    parents = {status.id: None}
+    children = {}
+    pending = [(status.id, status.aggregate_snapshot)]
+    while pending:
+        group_id, snapshot = pending.pop()
+        groups[group_id] = snapshot
+        children[group_id] = []
+        for child in snapshot.process_group_status_snapshots or []:
+            parents[child.id] = group_id
+            children[group_id].append(child.id)
+            pending.append((child.id, child.process_group_status_snapshot))
+    return ProcessGroupTree(status.id, groups, parents, children)
+
+
 @exception_handler(404, None)
 def get_process_group(identifier, identifier_type="name", greedy=True):
     """
@@ -197,11 +644,12 @@ def get_process_group(identifier, identifier_type="name", greedy=True):
         if identifier_type == "id" or identifier == "root":
             # assuming unique fetch of pg id, 'root' is special case
             # implementing separately to avoid recursing entire canvas
-            out = nipyapi.nifi.ProcessGroupsApi().get_process_group(identifier)
-        else:
-            obj = list_all_process_groups()
-            out = nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
-    return out
+            return nipyapi.nifi.ProcessGroupsApi().get_process_group(identifier)
+        found_id = None if greedy else _search_unique_id(identifier, "process_group_results")
+        if found_id:
+            return nipyapi.nifi.ProcessGroupsApi().get_process_group(found_id)
+        obj = list_all_process_groups()
+        return nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
 
 
 # pylint: disable=R1737
@@ -289,25 +737,9 @@ def list_sensitive_processors(pg_id="root", summary=False):
     """
     assert isinstance(pg_id, str), "pg_id should be a string"
     assert isinstance(summary, bool)
-    cache = nipyapi.config.cache.get("list_sensitive_processors")
-    if not cache:
-        cache = []
-    matches = []
-    proc_list = list_all_processors(pg_id)
-    for proc in proc_list:
-        if proc.component.type in cache:
-            matches.append(proc)
-        else:
-            sensitive_test = False
-            for _, detail in proc.component.config.descriptors.items():
-                if detail.sensitive is True:
-                    sensitive_test = True
-                    break
-            if sensitive_test:
-                matches.append(proc)
-                cache.append(str(proc.component.type))
-    if cache:
-        nipyapi.config.cache["list_sensitive_processors"] = cache
+    matches = [
+        x for x in list_all_processors(pg_id) if nipyapi.extensions.has_sensitive_properties(x)
+    ]
     if summary:
         return [
             {x.id: [p for p, q in x.component.config.descriptors.items() if q.sensitive is True]}
@@ -334,7 +766,7 @@ def list_all_processors(pg_id="root"):
         targets = nipyapi.nifi.ProcessGroupsApi().get_processors(
             id=pg_id, include_descendant_groups=True
         )
-        return targets.processors
+        return nipyapi.utils.cache_revision(targets.processors)
     # Handle older NiFi instances
     out = []
     # list of child process groups
@@ -534,13 +966,17 @@ def list_all_processor_types():
     """
     Produces the list of all available processor types in the NiFi instance
 
+    Served from the extension catalog, see
+    :func:`nipyapi.extensions.get_extension_catalog`.
+
     Returns:
          list(ProcessorTypesEntity): A native datatype containing the
          processors list
 
     """
-    with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.FlowApi().get_processor_types()
+    return nipyapi.nifi.ProcessorTypesEntity(
+        processor_types=list(nipyapi.extensions.get_extension_catalog().processors.types)
+    )
 
 
 def get_processor_type(identifier, identifier_type="name", greedy=True):
@@ -557,8 +993,11 @@ def get_processor_type(identifier, identifier_type="name", greedy=True):
         list(Objects) for multiple matches
 
     """
-    with nipyapi.utils.rest_exceptions():
-        obj = list_all_processor_types().processor_types
+    if identifier_type in ["name", "bundle"]:
+        return nipyapi.extensions.find_extension_types(
+            identifier, "processor", identifier_type, greedy=greedy
+        )
+    obj = list_all_processor_types().processor_types
     if obj:
         return nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
     return obj
@@ -624,13 +1063,9 @@ def get_processor_docs(processor):
             f"got: {type(processor).__name__}"
         )
 
-    with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.FlowApi().get_processor_definition(
-            group=bundle.group,
-            artifact=bundle.artifact,
-            version=bundle.version,
-            type=proc_type,
-        )
+    return nipyapi.extensions.get_extension_definition(
+        nipyapi.nifi.DocumentedTypeDTO(type=proc_type, bundle=bundle), "processor"
+    )
 
 
 def create_processor(  # pylint: disable=too-many-arguments,too-many-positional-arguments
@@ -712,12 +1147,16 @@ def get_processor(identifier, identifier_type="name", greedy=True):
     """
     assert isinstance(identifier, str)
     assert identifier_type in ["name", "id"]
+    if identifier_type == "name" and not greedy:
+        found_id = _search_unique_id(identifier, "processor_results")
+        if found_id:
+            identifier, identifier_type = found_id, "id"
     if identifier_type == "id":
         out = nipyapi.nifi.ProcessorsApi().get_processor(identifier)
     else:
         obj = list_all_processors()
         out = nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
-    return out
+    return nipyapi.utils.cache_revision(out)
 
 
 def delete_processor(processor, refresh=True, force=False):
@@ -737,7 +1176,8 @@ def delete_processor(processor, refresh=True, force=False):
     assert isinstance(processor, nipyapi.nifi.ProcessorEntity)
     assert isinstance(refresh, bool)
     assert isinstance(force, bool)
-    if refresh or force:
+    optimistic = refresh and nipyapi.config.optimistic_revisions and not force
+    if (refresh or force) and not optimistic:
         target = get_processor(processor.id, "id")
         if target is None:
             return None  # Processor does not exist
@@ -755,10 +1195,22 @@ def delete_processor(processor, refresh=True, force=False):
         # refresh state before trying delete
         target = get_processor(processor.id, "id")
         assert isinstance(target, nipyapi.nifi.ProcessorEntity)
-    with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.ProcessorsApi().delete_processor(
-            id=target.id, version=target.revision.version
+    try:
+        result = nipyapi.utils.submit_revisioned(
+            target,
+            lambda x: nipyapi.nifi.ProcessorsApi().delete_processor(
+                id=x.id, version=x.revision.version
+            ),
+            lambda x: get_processor(x, "id"),
+            optimistic,
+            partial=True,
         )
+    except nipyapi.nifi.rest.ApiException as e:
+        if optimistic and e.status == 404:
+            return None  # Processor does not exist
+        raise ValueError(e.body) from e
+    nipyapi.utils.clear_revision_cache(target.id)
+    return result
 
 
 def schedule_components(pg_id, scheduled, components=None):
@@ -887,20 +1339,12 @@ def schedule_processor(processor, scheduled, refresh=True, greedy=True, identifi
         )
         return False
 
-    if refresh:
-        target = nipyapi.canvas.get_processor(processor.id, "id")
-        assert isinstance(target, nipyapi.nifi.ProcessorEntity)
-    else:
-        target = processor
-
     # Use direct processor API for all state changes (handles all transitions
     # including from DISABLED state, which schedule_components cannot handle)
-    body = nipyapi.nifi.ProcessorRunStatusEntity(revision=target.revision, state=target_state)
-    with nipyapi.utils.rest_exceptions():
-        nipyapi.nifi.ProcessorsApi().update_run_status4(body=body, id=target.id)
+    _submit_run_status(processor, "PROCESSOR", target_state, refresh)
 
     # Wait for target state
-    return nipyapi.utils.wait_to_complete(_check_processor_state, target.id, target_state)
+    return nipyapi.utils.wait_to_complete(_check_processor_state, processor.id, target_state)
 
 
 def schedule_port(port, scheduled, refresh=True, greedy=True, identifier_type="auto"):
@@ -966,24 +1410,213 @@ def schedule_port(port, scheduled, refresh=True, greedy=True, identifier_type="a
         log.info("Port not in target state, current state %s", test_obj.component.state)
         return False
 
-    if refresh:
-        target = get_port(port.id, identifier_type="id")
-        assert isinstance(target, nipyapi.nifi.PortEntity)
-    else:
-        target = port
+    # Update run status using the appropriate API
+    _submit_run_status(port, port.port_type, target_state, refresh)
 
-    is_input = "INPUT" in target.port_type
+    # Wait for target state
+    return nipyapi.utils.wait_to_complete(_check_port_state, port.id, target_state)
 
-    # Update run status using the appropriate API
-    body = nipyapi.nifi.PortRunStatusEntity(revision=target.revision, state=target_state)
+
+def _iter_group_snapshots(snapshot):
+    """
+    Yields a ProcessGroupStatusSnapshotDTO and all of its nested group snapshots.
+
+    The nested snapshots are only populated when the status was requested
+    with recursive=True.
+    """
+    stack = [snapshot]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack += [
+            x.process_group_status_snapshot
+            for x in current.process_group_status_snapshots or []
+            if x.process_group_status_snapshot
+        ]
+
+
+def _schedule_kind(component):
+    """Returns the scheduling kind label for a component entity."""
+    if isinstance(component, nipyapi.nifi.ProcessorEntity):
+        return "PROCESSOR"
+    if isinstance(component, nipyapi.nifi.PortEntity):
+        return component.port_type
+    if isinstance(component, nipyapi.nifi.ControllerServiceEntity):
+        return "CONTROLLER_SERVICE"
+    raise TypeError(
+        f"Expected ProcessorEntity, PortEntity or ControllerServiceEntity, "
+        f"got {type(component).__name__}"
+    )
+
+
+def _schedule_state_reached(target, run_status, active_threads):
+    """Tests a status snapshot run_status against a scheduling target state."""
+    if target == "RUNNING":
+        return run_status == "Running"
+    if target == "DISABLED":
+        return run_status == "Disabled"
+    # STOPPED and RUN_ONCE complete once the component is idle
+    return run_status != "Running" and not active_threads
+
+
+def _submit_run_status(component, kind, target_state, refresh=True):
+    """
+    Submits a run status change for a single component.
+
+    Returns:
+        str: The component state reported in the update response
+    """
+    if kind == "PROCESSOR":
+        handle = nipyapi.nifi.ProcessorsApi()
+        getter, updater = handle.get_processor, handle.update_run_status4
+        body_class = nipyapi.nifi.ProcessorRunStatusEntity
+    elif kind == "CONTROLLER_SERVICE":
+        handle = nipyapi.nifi.ControllerServicesApi()
+        getter, updater = handle.get_controller_service, handle.update_run_status1
+        body_class = nipyapi.nifi.ControllerServiceRunStatusEntity
+    elif kind == "INPUT_PORT":
+        handle = nipyapi.nifi.InputPortsApi()
+        getter, updater = handle.get_input_port, handle.update_run_status2
+        body_class = nipyapi.nifi.PortRunStatusEntity
+    else:
+        handle = nipyapi.nifi.OutputPortsApi()
+        getter, updater = handle.get_output_port, handle.update_run_status3
+        body_class = nipyapi.nifi.PortRunStatusEntity
     with nipyapi.utils.rest_exceptions():
-        if is_input:
-            nipyapi.nifi.InputPortsApi().update_run_status2(body=body, id=target.id)
-        else:
-            nipyapi.nifi.OutputPortsApi().update_run_status3(body=body, id=target.id)
+        return nipyapi.utils.submit_revisioned(
+            component,
+            lambda x: updater(body=body_class(revision=x.revision, state=target_state), id=x.id),
+            getter,
+            refresh,
+            partial=True,
+        ).component.state
 
-    # Wait for target state
-    return nipyapi.utils.wait_to_complete(_check_port_state, target.id, target_state)
+
+def schedule_many(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    components, scheduled, refresh=True, pg_id="root", wait=True, max_wait=None, max_workers=None
+):
+    """
+    Set many Processors, Ports and Controller Services to a scheduled state.
+
+    The run status updates are issued concurrently, then all components are
+    waited on together through one recursive Process Group status poll (plus
+    one Controller Service listing if any services were included), rather
+    than one wait loop per component.
+
+    Args:
+        components (list): ProcessorEntity, PortEntity and/or
+            ControllerServiceEntity objects to schedule
+        scheduled (bool or str): True/False for RUNNING/STOPPED (ENABLED/DISABLED
+            for Controller Services), or one of "RUNNING", "STOPPED", "DISABLED",
+            "RUN_ONCE" for Processors and Ports, or "ENABLED", "DISABLED" for
+            Controller Services.
+        refresh (bool): Whether to fetch a fresh revision for each component
+            before updating it. Default True.
+        pg_id (str): The Process Group containing all the components, used for
+            the aggregated status poll. Defaults to the root; narrowing it
+            reduces the size of each poll.
+        wait (bool): Whether to wait for the components to reach the target
+            state. Default True.
+        max_wait (int): Seconds to wait for all components, defaults to
+            config.long_max_wait
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        list[ScheduleResult]: One result per component in input order, with
+        id, kind, state (last observed state), success (bool) and error
+        (str or None).
+
+    Raises:
+        TypeError: If a component is not a supported entity type.
+        ValueError: If scheduled is not valid for one of the component kinds.
+
+    Example::
+
+        procs = nipyapi.canvas.list_all_processors(pg.id)
+        results = nipyapi.canvas.schedule_many(procs, True, pg_id=pg.id)
+        failed = [r for r in results if not r.success]
+    """
+    # pylint: disable=too-many-locals
+    assert isinstance(components, list)
+    assert isinstance(pg_id, str)
+    kind_states = {
+        "PROCESSOR": ("RUNNING", "STOPPED", ("RUNNING", "STOPPED", "DISABLED", "RUN_ONCE")),
+        "INPUT_PORT": ("RUNNING", "STOPPED", ("RUNNING", "STOPPED", "DISABLED")),
+        "OUTPUT_PORT": ("RUNNING", "STOPPED", ("RUNNING", "STOPPED", "DISABLED")),
+        "CONTROLLER_SERVICE": ("ENABLED", "DISABLED", ("ENABLED", "DISABLED")),
+    }
+    # Validate everything before sending any request
+    targets = []
+    for component in components:
+        kind = _schedule_kind(component)
+        targets.append(
+            (component, kind, nipyapi.utils.resolve_schedule_state(scheduled, *kind_states[kind]))
+        )
+
+    submitted = nipyapi.utils.run_concurrently(
+        lambda x: _submit_run_status(*x, refresh=refresh),
+        targets,
+        max_workers=max_workers,
+        return_exceptions=True,
+    )
+    results = {}
+    pending = {}
+    for (component, kind, target_state), outcome in zip(targets, submitted):
+        if isinstance(outcome, Exception):
+            results[component.id] = ScheduleResult(component.id, kind, None, False, str(outcome))
+        else:
+            results[component.id] = ScheduleResult(component.id, kind, outcome, True, None)
+            pending[component.id] = (kind, target_state)
+
+    def _all_components_in_state():
+        status = nipyapi.nifi.FlowApi().get_process_group_status(pg_id, recursive=True)
+        for group in _iter_group_snapshots(status.process_group_status.aggregate_snapshot):
+            snapshots = [
+                x.processor_status_snapshot for x in group.processor_status_snapshots or []
+            ]
+            snapshots += [
+                x.port_status_snapshot
+                for x in (group.input_port_status_snapshots or [])
+                + (group.output_port_status_snapshots or [])
+            ]
+            for snap in snapshots:
+                if snap is None or snap.id not in pending:
+                    continue
+                results[snap.id] = results[snap.id]._replace(state=snap.run_status)
+                if _schedule_state_reached(
+                    pending[snap.id][1], snap.run_status, snap.active_thread_count
+                ):
+                    pending.pop(snap.id)
+        if any(kind == "CONTROLLER_SERVICE" for kind, _ in pending.values()):
+            services = nipyapi.nifi.FlowApi().get_controller_services_from_group(
+                pg_id, include_descendant_groups=True
+            )
+            for service in services.controller_services or []:
+                if service.id not in pending:
+                    continue
+                results[service.id] = results[service.id]._replace(state=service.component.state)
+                if service.component.state == pending[service.id][1]:
+                    pending.pop(service.id)
+        if pending:
+            log.info("Waiting for %d components to reach target state", len(pending))
+        return not pending
+
+    if wait and pending:
+        try:
+            with nipyapi.utils.rest_exceptions():
+                nipyapi.utils.wait_to_complete(
+                    _all_components_in_state,
+                    nipyapi_delay=nipyapi.config.short_retry_delay,
+                    nipyapi_max_wait=max_wait or nipyapi.config.long_max_wait,
+                )
+        except ValueError as e:
+            log.warning("schedule_many did not complete: %s", e)
+            for comp_id, (_, target_state) in pending.items():
+                results[comp_id] = results[comp_id]._replace(
+                    success=False, error=f"Did not reach state {target_state}: {e}"
+                )
+    return [results[component.id] for component, _, _ in targets]
 
 
 def update_process_group(pg, update, refresh=True, greedy=True, identifier_type="auto"):
@@ -1025,15 +1658,19 @@ def update_process_group(pg, update, refresh=True, greedy=True, identifier_type=
         identifier_type=identifier_type,
     )
     with nipyapi.utils.rest_exceptions():
-        if refresh:
-            pg = get_process_group(pg.id, "id")
-        return nipyapi.nifi.ProcessGroupsApi().update_process_group(
-            id=pg.id,
-            body=nipyapi.nifi.ProcessGroupEntity(
-                component=nipyapi.nifi.ProcessGroupDTO(id=pg.id, **update),
-                id=pg.id,
-                revision=pg.revision,
+        return nipyapi.utils.submit_revisioned(
+            pg,
+            lambda x: nipyapi.nifi.ProcessGroupsApi().update_process_group(
+                id=x.id,
+                body=nipyapi.nifi.ProcessGroupEntity(
+                    component=nipyapi.nifi.ProcessGroupDTO(id=x.id, **update),
+                    id=x.id,
+                    revision=x.revision,
+                ),
             ),
+            lambda x: get_process_group(x, "id"),
+            refresh,
+            partial=True,
         )
 
 
@@ -1255,8 +1892,10 @@ def update_processor(processor, update=None, name=None, refresh=True, auto_stop=
     if update is not None and not isinstance(update, nipyapi.nifi.ProcessorConfigDTO):
         raise ValueError("update param is not an instance of nifi.ProcessorConfigDTO")
 
+    # auto_stop needs the current state, so it always refetches when refreshing
+    optimistic = refresh and nipyapi.config.optimistic_revisions and not auto_stop
     with nipyapi.utils.rest_exceptions():
-        if refresh:
+        if refresh and not optimistic:
             processor = get_processor(processor.id, "id")
 
         was_running = processor.component.state == "RUNNING"
@@ -1279,13 +1918,19 @@ def update_processor(processor, update=None, name=None, refresh=True, auto_stop=
         if update is not None:
             dto_kwargs["config"] = update
 
-        result = nipyapi.nifi.ProcessorsApi().update_processor(
-            id=processor.id,
-            body=nipyapi.nifi.ProcessorEntity(
-                id=processor.id,
-                revision=processor.revision,
-                component=nipyapi.nifi.ProcessorDTO(**dto_kwargs),
+        result = nipyapi.utils.submit_revisioned(
+            processor,
+            lambda x: nipyapi.nifi.ProcessorsApi().update_processor(
+                id=x.id,
+                body=nipyapi.nifi.ProcessorEntity(
+                    id=x.id,
+                    revision=x.revision,
+                    component=nipyapi.nifi.ProcessorDTO(**dto_kwargs),
+                ),
             ),
+            lambda x: get_processor(x, "id"),
+            optimistic,
+            partial=True,
         )
 
         # Restart if it was running
@@ -1296,6 +1941,164 @@ def update_processor(processor, update=None, name=None, refresh=True, auto_stop=
         return result
 
 
+def _select_processors(selector, processors):
+    """Filters a processor listing by an update_processors_bulk selector."""
+    if callable(selector):
+        return [x for x in processors if selector(x)]
+    if isinstance(selector, str):
+        return [
+            x
+            for x in processors
+            if x.component.type == selector or x.component.type.endswith("." + selector)
+        ]
+    if isinstance(selector, (list, tuple, set)):
+        wanted = {x.id if isinstance(x, nipyapi.nifi.ProcessorEntity) else x for x in selector}
+        return [x for x in processors if x.id in wanted]
+    raise TypeError("selector must be a callable, a processor type, or a list of processors")
+
+
+def _static_property_keys(processor, descriptor_cache):
+    """Returns the static property keys for a processor's type and bundle, cached."""
+    bundle = processor.component.bundle
+    key = (
+        processor.component.type,
+        bundle.group if bundle else None,
+        bundle.artifact if bundle else None,
+        bundle.version if bundle else None,
+    )
+    if key not in descriptor_cache:
+        descriptors = processor.component.config.descriptors
+        if not descriptors:
+            descriptors = get_processor(processor.id, "id").component.config.descriptors
+        descriptor_cache[key] = {k for k, v in descriptors.items() if not v.dynamic}
+    return descriptor_cache[key]
+
+
+def _plan_bulk_update(processor, properties, valid_keys, auto_stop):
+    """Works out the property changes for one Processor in update_processors_bulk."""
+    current = processor.component.config.properties or {}
+    changes = {k: (current.get(k), v) for k, v in properties.items() if current.get(k) != v}
+    error = None
+    invalid = set(properties) - valid_keys if valid_keys is not None else set()
+    if invalid:
+        error = f"Property keys not in static descriptors: {sorted(invalid)}"
+    elif changes and processor.component.state == "RUNNING" and not auto_stop:
+        error = "Processor is running. Stop it first or set auto_stop=True."
+    return BulkUpdateResult(processor.id, processor.component.name, changes, error is None, error)
+
+
+def update_processors_bulk(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    selector,
+    properties,
+    pg_id="root",
+    auto_stop=False,
+    allow_dynamic=False,
+    dry_run=False,
+    max_workers=None,
+):
+    """
+    Sets the same properties on many Processors at once.
+
+    Targets are resolved from a single listing of the Process Group and its
+    descendants. Property keys are validated once per Processor type and
+    bundle, and only Processors whose values would change are updated.
+    Running Processors are stopped, updated and restarted in parallel when
+    auto_stop is set.
+
+    Args:
+        selector (callable, str or list): Which Processors to update. A
+            callable is passed each ProcessorEntity and returns a bool; a str
+            matches the Processor type, either fully qualified or the simple
+            class name (e.g. 'PublishKafka'); a list selects Processors by
+            ProcessorEntity or id.
+        properties (dict): Property key -> value to set on every target,
+            with the same semantics as prepare_processor_config
+        pg_id (str): The Process Group to search, defaults to the root
+        auto_stop (bool): Whether to stop running Processors for the update
+            and restart them afterwards. If False, running Processors are
+            reported as failed and left unchanged.
+        allow_dynamic (bool): Skip validating keys against the static
+            property descriptors
+        dry_run (bool): Only report the changes that would be made
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        list[BulkUpdateResult]: One result per selected Processor, with
+        'changes' as a dict of property key -> (old value, new value).
+        Processors that are already up to date have empty changes.
+
+    Example::
+
+        results = nipyapi.canvas.update_processors_bulk(
+            'PublishKafka', {'bootstrap.servers': 'kafka:9092'}, dry_run=True
+        )
+        for r in results:
+            print(r.name, r.changes)
+    """
+    # pylint: disable=too-many-locals
+    assert isinstance(properties, dict) and properties
+    targets = _select_processors(selector, list_all_processors(pg_id) or [])
+    descriptor_cache = {}
+    results = {}
+    to_update = []
+    for proc in targets:
+        valid_keys = None if allow_dynamic else _static_property_keys(proc, descriptor_cache)
+        results[proc.id] = _plan_bulk_update(proc, properties, valid_keys, auto_stop)
+        if results[proc.id].changes and results[proc.id].success and not dry_run:
+            to_update.append(proc)
+    if not to_update:
+        return [results[x.id] for x in targets]
+
+    running = [x for x in to_update if x.component.state == "RUNNING"]
+    if running:
+        for outcome in schedule_many(running, False, pg_id=pg_id, max_workers=max_workers):
+            if not outcome.success:
+                results[outcome.id] = results[outcome.id]._replace(
+                    success=False, error=f"Could not stop Processor: {outcome.error}"
+                )
+        to_update = [x for x in to_update if results[x.id].success]
+
+    handle = nipyapi.nifi.ProcessorsApi()
+
+    def _update(proc):
+        return nipyapi.utils.submit_revisioned(
+            proc,
+            lambda x: handle.update_processor(
+                id=x.id,
+                body=nipyapi.nifi.ProcessorEntity(
+                    id=x.id,
+                    revision=x.revision,
+                    component=nipyapi.nifi.ProcessorDTO(
+                        id=x.id, config=nipyapi.nifi.ProcessorConfigDTO(properties=properties)
+                    ),
+                ),
+            ),
+            handle.get_processor,
+            partial=True,
+        )
+
+    updated = nipyapi.utils.run_concurrently(
+        _update, to_update, max_workers=max_workers, return_exceptions=True
+    )
+    for proc, outcome in zip(to_update, updated):
+        if isinstance(outcome, Exception):
+            error = outcome.body if hasattr(outcome, "body") else str(outcome)
+            results[proc.id] = results[proc.id]._replace(success=False, error=error)
+
+    # Restart whatever was running, including Processors whose update failed
+    restart = [x for x in running if x.id in {y.id for y in to_update}]
+    if restart:
+        for outcome in schedule_many(restart, True, pg_id=pg_id, max_workers=max_workers):
+            if not outcome.success:
+                prior = results[outcome.id].error
+                error = f"Could not restart Processor: {outcome.error}"
+                results[outcome.id] = results[outcome.id]._replace(
+                    success=False, error=f"{prior}; {error}" if prior else error
+                )
+    return [results[x.id] for x in targets]
+
+
 def create_connection(source, target, relationships=None, name=None, bends=None):
     """
     Creates a connection between two objects for the given relationships
@@ -1444,7 +2247,9 @@ def get_connection(connection):
     if isinstance(connection, nipyapi.nifi.ConnectionEntity):
         connection = connection.id
     with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.ConnectionsApi().get_connection(connection)
+        return nipyapi.utils.cache_revision(
+            nipyapi.nifi.ConnectionsApi().get_connection(connection)
+        )
 
 
 def update_connection(connection, name=None, bends=None, refresh=True):
@@ -1484,38 +2289,39 @@ def update_connection(connection, name=None, bends=None, refresh=True):
 
     assert isinstance(connection, nipyapi.nifi.ConnectionEntity)
 
-    if refresh:
+    optimistic = refresh and nipyapi.config.optimistic_revisions
+    if refresh and not optimistic:
         connection = get_connection(connection.id)
 
-    # Determine updated values (None means keep existing)
-    updated_name = connection.component.name if name is None else name
-    updated_bends = connection.component.bends if bends is None else bends
-
     # Convert tuple bends to PositionDTO if needed
-    if updated_bends:
-        bend_dtos = []
-        for b in updated_bends:
-            if isinstance(b, tuple):
-                bend_dtos.append(nipyapi.nifi.PositionDTO(x=float(b[0]), y=float(b[1])))
-            else:
-                bend_dtos.append(b)
-        updated_bends = bend_dtos
+    if bends:
+        bends = [
+            nipyapi.nifi.PositionDTO(x=float(b[0]), y=float(b[1])) if isinstance(b, tuple) else b
+            for b in bends
+        ]
 
+    # The body is built from the entity submitted, so that a conflict retry
+    # keeps concurrent edits and only applies the changes requested here
     with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.ConnectionsApi().update_connection(
-            id=connection.id,
-            body=nipyapi.nifi.ConnectionEntity(
-                revision=connection.revision,
-                source_type=connection.source_type,
-                destination_type=connection.destination_type,
-                component=nipyapi.nifi.ConnectionDTO(
-                    id=connection.component.id,
-                    name=updated_name,
-                    source=connection.component.source,
-                    destination=connection.component.destination,
-                    bends=updated_bends,
+        return nipyapi.utils.submit_revisioned(
+            connection,
+            lambda x: nipyapi.nifi.ConnectionsApi().update_connection(
+                id=x.id,
+                body=nipyapi.nifi.ConnectionEntity(
+                    revision=x.revision,
+                    source_type=x.source_type,
+                    destination_type=x.destination_type,
+                    component=nipyapi.nifi.ConnectionDTO(
+                        id=x.component.id,
+                        name=x.component.name if name is None else name,
+                        source=x.component.source,
+                        destination=x.component.destination,
+                        bends=x.component.bends if bends is None else bends,
+                    ),
                 ),
             ),
+            nipyapi.nifi.ConnectionsApi().get_connection,
+            optimistic,
         )
 
 
@@ -1532,13 +2338,170 @@ def get_component_connections(component):
     assert isinstance(component, nipyapi.nifi.ProcessorEntity)
     return [
         x
-        for x in list_all_connections(pg_id=component.component.parent_group_id)
+        for x in list_all_connections(pg_id=component.component.parent_group_id, descendants=False)
         if component.id in [x.destination_id, x.source_id]
     ]
 
 
+def _csr(ends, size):
+    """Groups edge indices by their end node into CSR offset/edge arrays"""
+    offsets = array("i", [0]) * (size + 1)
+    for node in ends:
+        offsets[node + 1] += 1
+    for node in range(size):
+        offsets[node + 1] += offsets[node]
+    fill = array("i", offsets)
+    edges = array("i", [0]) * len(ends)
+    for edge, node in enumerate(ends):
+        edges[fill[node]] = edge
+        fill[node] += 1
+    return offsets, edges
+
+
+def get_connection_graph(pg_id="root", descendants=True):
+    """
+    Builds a directed graph index of the connections on the canvas.
+
+    Components and connections of every nested Process Group are collected
+    in one traversal using the trimmed 'ui' flow payload. Connections to and
+    from ports link the groups together, so reachability follows data across
+    group boundaries.
+
+    Args:
+        pg_id (str): The UUID of the Process Group to index, defaults to the
+            Canvas root
+        descendants (bool): Whether to include child Process Groups
+
+    Returns:
+        :class:`ConnectionGraph`
+
+    Example::
+
+        graph = nipyapi.canvas.get_connection_graph()
+        impacted = graph.downstream(processor)
+        feeding = graph.upstream(input_port)
+        loops = graph.find_cycles()
+    """
+    found = list_all_components(
+        pg_id,
+        ["processors", "input_ports", "output_ports", "funnels", "connections"],
+        descendants,
+        detail="ui",
+    )
+    connections = found.pop("connections")
+    components = {x.id: x for kind in found.values() for x in kind}
+    ids = list(components)
+    index = {x: n for n, x in enumerate(ids)}
+
+    def node(component_id):
+        if component_id not in index:
+            index[component_id] = len(ids)
+            ids.append(component_id)
+        return index[component_id]
+
+    edge_source = array("i", [node(x.source_id) for x in connections])
+    edge_target = array("i", [node(x.destination_id) for x in connections])
+    out_offsets, out_edges = _csr(edge_source, len(ids))
+    in_offsets, in_edges = _csr(edge_target, len(ids))
+    return ConnectionGraph(
+        ids,
+        index,
+        components,
+        connections,
+        edge_source,
+        edge_target,
+        out_offsets,
+        out_edges,
+        in_offsets,
+        in_edges,
+    )
+
+
+def _backpressure_entry(group, snapshot):
+    """Builds a BackpressureHotspot from a ConnectionStatusSnapshotDTO"""
+    count_ratio = (snapshot.percent_use_count or 0) / 100.0
+    bytes_ratio = (snapshot.percent_use_bytes or 0) / 100.0
+    predictions = snapshot.predictions
+    millis = None
+    if predictions is not None:
+        estimates = [
+            x
+            for x in (
+                predictions.predicted_millis_until_count_backpressure,
+                predictions.predicted_millis_until_bytes_backpressure,
+            )
+            if x is not None and x >= 0
+        ]
+        millis = min(estimates) if estimates else None
+    return BackpressureHotspot(
+        id=snapshot.id,
+        name=snapshot.name,
+        group_id=group.id,
+        group_name=group.name,
+        fill_ratio=max(count_ratio, bytes_ratio),
+        count_ratio=count_ratio,
+        bytes_ratio=bytes_ratio,
+        flow_files_queued=snapshot.flow_files_queued,
+        bytes_queued=snapshot.bytes_queued,
+        source_id=snapshot.source_id,
+        source_name=snapshot.source_name,
+        destination_id=snapshot.destination_id,
+        destination_name=snapshot.destination_name,
+        millis_to_backpressure=millis,
+    )
+
+
+def get_backpressure_hotspots(pg_id="root", top=10, min_fill=0.0):
+    """
+    Ranks the connections closest to backpressure across a Process Group.
+
+    Reads every connection's status from a single recursive Process Group
+    status request, and keeps only the top entries while scanning, rather
+    than listing and inspecting each connection.
+
+    The fill ratio of a connection is the larger of its queued object count
+    and queued bytes relative to its backpressure thresholds, where 1.0
+    means backpressure is applied.
+
+    Args:
+        pg_id (str): The UUID of the Process Group to scan, defaults to the
+            Canvas root
+        top (int): How many connections to return, None for all
+        min_fill (float): Only include connections at or above this ratio
+
+    Returns:
+        list[:class:`BackpressureHotspot`]: Fullest first. Each entry carries
+        the upstream (source) and downstream (destination) component of the
+        connection, and NiFi's prediction of milliseconds until
+        backpressure where analytics are enabled, else None
+
+    Example::
+
+        for hot in nipyapi.canvas.get_backpressure_hotspots(top=5, min_fill=0.8):
+            print(hot.group_name, hot.source_name, "->", hot.destination_name,
+                  hot.fill_ratio)
+    """
+    assert isinstance(pg_id, str), "pg_id should be a string"
+    with nipyapi.utils.rest_exceptions():
+        status = (
+            nipyapi.nifi.FlowApi()
+            .get_process_group_status(id=pg_id, recursive=True)
+            .process_group_status
+        )
+    entries = (
+        _backpressure_entry(group, x.connection_status_snapshot)
+        for group in _iter_group_snapshots(status.aggregate_snapshot)
+        for x in group.connection_status_snapshots or []
+        if x.connection_status_snapshot is not None
+    )
+    entries = (x for x in entries if x.fill_ratio >= min_fill)
+    if top is None:
+        return sorted(entries, key=lambda x: x.fill_ratio, reverse=True)
+    return heapq.nlargest(top, entries, key=lambda x: x.fill_ratio)
+
+
 def get_flow_components(  # pylint: disable=too-many-locals,too-many-branches
-    start_component, pg_id=None
+    start_component, pg_id=None, detail="ui"
 ):
     """
     Find all components and connections in a connected flow subgraph.
@@ -1554,10 +2517,16 @@ def get_flow_components(  # pylint: disable=too-many-locals,too-many-branches
             start the traversal from
         pg_id: Process group ID containing the flow. If None, inferred from
             start_component.component.parent_group_id
+        detail: 'ui' (default) fetches the trimmed flow payload, enough for
+            positions and connection endpoints; 'all' returns full component
+            entities, see get_flow
 
     Returns:
         FlowSubgraph named tuple with 'components' (list of component entities)
         and 'connections' (list of ConnectionEntity objects within the flow).
+        By default these are the trimmed entities of detail='ui', whose
+        processors carry no config (properties, scheduling, descriptors);
+        pass detail='all' where that is needed.
 
     Example::
 
@@ -1583,7 +2552,7 @@ def get_flow_components(  # pylint: disable=too-many-locals,too-many-branches
             raise ValueError("Cannot infer pg_id from component. Please provide pg_id explicitly.")
 
     # Single API call to get all components and connections
-    flow = get_flow(pg_id)
+    flow = get_flow(pg_id, detail)
     fc = flow.process_group_flow.flow
 
     # Build lookup map: component_id -> component entity
@@ -1616,10 +2585,10 @@ def get_flow_components(  # pylint: disable=too-many-locals,too-many-branches
     # BFS traversal from start component
     start_id = start_component.id
     visited = set()
-    queue = [start_id]
+    queue = deque([start_id])
 
     while queue:
-        current_id = queue.pop(0)
+        current_id = queue.popleft()
         if current_id in visited:
             continue
         visited.add(current_id)
@@ -1678,10 +2647,34 @@ def purge_connection(con_id):
     with nipyapi.utils.rest_exceptions():
         drop_req = nipyapi.nifi.FlowFileQueuesApi().create_drop_request(con_id)
     assert isinstance(drop_req, nipyapi.nifi.DropRequestEntity)
+    clear_flowfile_listing_cache(con_id)
     return nipyapi.utils.wait_to_complete(_autumn_leaves, con_id, drop_req)
 
 
-def list_flowfiles(connection, limit=100):
+def clear_flowfile_listing_cache(connection_id=None):
+    """
+    Discards cached FlowFile queue listings, see list_flowfiles.
+
+    Args:
+        connection_id (str): The Connection UUID, or None to clear all
+    """
+    with _flowfile_listings_lock:
+        if connection_id is None:
+            _flowfile_listings.clear()
+        else:
+            _flowfile_listings.pop(connection_id, None)
+
+
+def _cached_flowfile_listing(con_id, max_age):
+    """Returns the cached summaries for a connection if young enough, else None"""
+    with _flowfile_listings_lock:
+        cached = _flowfile_listings.get(con_id)
+    if cached is None or time.time() - cached[0] > max_age:
+        return None
+    return cached[1]
+
+
+def list_flowfiles(connection, limit=100, max_age=None):
     """
     List FlowFiles waiting in a connection's queue.
 
@@ -1689,9 +2682,17 @@ def list_flowfiles(connection, limit=100):
     Returns basic metadata for each FlowFile; use get_flowfile() to retrieve
     full details including attributes.
 
+    Each listing is remembered per connection, so that FlowFile lookups
+    without a cluster_node_id (get_flowfile_details, get_flowfile_content)
+    can reuse it for up to config.flowfile_listing_ttl seconds instead of
+    listing the queue again. purge_connection discards it.
+
     Args:
         connection: Connection ID (str) or ConnectionEntity
         limit: Maximum number of FlowFiles to return (default 100)
+        max_age: Optional age in seconds up to which a remembered listing
+            is returned instead of listing the queue. None (default) always
+            lists the queue
 
     Returns:
         list[:class:`~nipyapi.nifi.models.FlowFileSummaryDTO`]: List of FlowFile
@@ -1721,6 +2722,11 @@ def list_flowfiles(connection, limit=100):
             f"connection must be ConnectionEntity or str, got: {type(connection).__name__}"
         )
 
+    if max_age is not None:
+        cached = _cached_flowfile_listing(con_id, max_age)
+        if cached is not None:
+            return cached[:limit]
+
     def _listing_complete(con_id_, listing_req_):
         test_obj = nipyapi.nifi.FlowFileQueuesApi().get_listing_request(
             con_id_, listing_req_.listing_request.id
@@ -1749,9 +2755,10 @@ def list_flowfiles(connection, limit=100):
     except Exception:  # pylint: disable=broad-except
         pass  # Best effort cleanup
 
-    if result and result.listing_request.flow_file_summaries:
-        return result.listing_request.flow_file_summaries[:limit]
-    return []
+    summaries = (result.listing_request.flow_file_summaries if result else None) or []
+    with _flowfile_listings_lock:
+        _flowfile_listings[con_id] = (time.time(), summaries)
+    return summaries[:limit]
 
 
 def _resolve_flowfile_cluster_node(connection_id, flowfile_uuid, cluster_node_id=None):
@@ -1760,7 +2767,8 @@ def _resolve_flowfile_cluster_node(connection_id, flowfile_uuid, cluster_node_id
 
     In clustered NiFi, FlowFile operations require the cluster_node_id to identify
     which node holds the FlowFile. This helper fetches it from the queue listing
-    if not explicitly provided.
+    if not explicitly provided, reusing a recent listing of the connection
+    where possible.
 
     Args:
         connection_id: Connection ID string
@@ -1776,8 +2784,12 @@ def _resolve_flowfile_cluster_node(connection_id, flowfile_uuid, cluster_node_id
     if cluster_node_id:
         return cluster_node_id
 
-    summaries = list_flowfiles(connection_id, limit=100)
-    matching = [s for s in summaries if s.uuid == flowfile_uuid]
+    summaries = _cached_flowfile_listing(connection_id, nipyapi.config.flowfile_listing_ttl)
+    matching = [s for s in summaries or [] if s.uuid == flowfile_uuid]
+    if not matching:
+        # No recent listing, or it predates the FlowFile
+        summaries = list_flowfiles(connection_id, limit=100)
+        matching = [s for s in summaries if s.uuid == flowfile_uuid]
     if matching:
         return matching[0].cluster_node_id
 
@@ -1949,16 +2961,19 @@ def get_flowfile_content(
     return content
 
 
-def peek_flowfiles(connection, limit=1):
+def peek_flowfiles(connection, limit=1, max_workers=None):
     """
     Convenience function to list and get full details for FlowFiles at front of queue.
 
     Combines list_flowfiles() and get_flowfile() to return complete FlowFile
     details including attributes for the first N FlowFiles in the queue.
+    The details are fetched concurrently.
 
     Args:
         connection: Connection ID (str) or ConnectionEntity
         limit: Number of FlowFiles to retrieve details for (default 1)
+        max_workers: Maximum concurrent detail requests, defaults to
+            config.max_workers
 
     Returns:
         list[:class:`~nipyapi.nifi.models.FlowFileDTO`]: List of FlowFile details
@@ -1987,15 +3002,174 @@ def peek_flowfiles(connection, limit=1):
     else:
         con_id = connection
 
-    result = []
-    for summary in summaries:
-        flowfile = get_flowfile_details(
-            con_id, summary.uuid, cluster_node_id=summary.cluster_node_id
+    return nipyapi.utils.run_concurrently(
+        lambda x: _fetch_flowfile(con_id, x), summaries, max_workers=max_workers
+    )
+
+
+def _export_format(output_file, output_format=None):
+    """Validates an export format, inferring it from the file name if not given"""
+    if output_format is None:
+        if output_file.endswith((".tar", ".tar.gz", ".tgz")):
+            return "tar"
+        if output_file.endswith(".pkg"):
+            return "flowfile-v3"
+        return "ndjson"
+    if output_format not in ["ndjson", "tar", "flowfile-v3"]:
+        raise ValueError(
+            f"output_format must be 'ndjson', 'tar' or 'flowfile-v3', got: {output_format!r}"
         )
-        # Preserve cluster_node_id from summary (FlowFileDTO returns None from API)
-        flowfile.cluster_node_id = summary.cluster_node_id
-        result.append(flowfile)
-    return result
+    return output_format
+
+
+def _open_export(output_file, output_format):
+    """Opens the output of export_flowfiles for its format"""
+    if output_format == "tar":
+        mode = "w:gz" if output_file.endswith((".gz", ".tgz")) else "w"
+        return tarfile.open(output_file, mode)  # pylint: disable=consider-using-with
+    if output_format == "flowfile-v3":
+        return open(output_file, "wb")  # pylint: disable=consider-using-with
+    return open(output_file, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+
+def _fetch_flowfile(con_id, summary):
+    """Fetches the details of a listed FlowFile, keeping its cluster_node_id"""
+    flowfile = get_flowfile_details(con_id, summary.uuid, cluster_node_id=summary.cluster_node_id)
+    # Preserve cluster_node_id from summary (FlowFileDTO returns None from API)
+    flowfile.cluster_node_id = summary.cluster_node_id
+    return flowfile
+
+
+def _open_flowfile_content(con_id, summary):
+    """Opens a streamed download of a listed FlowFile's content"""
+    with nipyapi.utils.rest_exceptions():
+        return nipyapi.nifi.FlowFileQueuesApi().download_flow_file_content(
+            con_id,
+            summary.uuid,
+            cluster_node_id=summary.cluster_node_id,
+            _preload_content=False,
+        )
+
+
+def _write_base64(source, handle, chunk_size=48 * 1024):
+    """Streams a binary file object to a text handle as base64, chunk by chunk"""
+    pending = b""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        # Only whole three byte groups encode without padding
+        whole = len(pending) - len(pending) % 3
+        handle.write(base64.b64encode(pending[:whole]).decode("ascii"))
+        pending = pending[whole:]
+    handle.write(base64.b64encode(pending).decode("ascii"))
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def export_flowfiles(
+    connection, output_file, limit=100, include_content=False, output_format=None, max_workers=None
+):
+    """
+    Exports the attributes, and optionally content, of queued FlowFiles.
+
+    Lists the queue once, then fetches FlowFile details concurrently in
+    batches. Content is streamed from NiFi straight into the output file one
+    FlowFile at a time, so memory use does not depend on content sizes. This
+    is a non-destructive operation.
+
+    Three formats are supported:
+
+    - 'ndjson': one JSON object per line with the FlowFile details, including
+      the attributes dict and cluster_node_id. With include_content the raw
+      content is added base64 encoded as 'content_base64'.
+    - 'tar': a '<uuid>.json' member with the same details per FlowFile, and a
+      '<uuid>.content' member with the raw content when include_content is
+      set. Gzip compressed when the file name ends in '.gz' or '.tgz'.
+    - 'flowfile-v3': a FlowFile package v3 stream of attributes and content,
+      as read by UnpackContent or ListenHTTP, see nipyapi.flowfile_package.
+      Content is always downloaded for this format.
+
+    The cluster_node_id of each FlowFile is kept so that follow up calls,
+    such as get_flowfile_content, can be routed straight to the owning node.
+
+    Args:
+        connection: Connection ID (str) or ConnectionEntity
+        output_file (str): Path of the file to write
+        limit (int): Maximum number of FlowFiles to export (default 100, which
+            is also the most NiFi lists)
+        include_content (bool): Whether to download the content as well
+        output_format (str): 'ndjson', 'tar' or 'flowfile-v3'; inferred from
+            the file name when not given, tar for '.tar', '.tar.gz' and
+            '.tgz', flowfile-v3 for '.pkg', else ndjson
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        str: The absolute path of the written file
+
+    Example::
+
+        path = nipyapi.canvas.export_flowfiles(conn, "/tmp/queue.ndjson")
+
+        path = nipyapi.canvas.export_flowfiles(
+            conn, "/tmp/queue.tar.gz", include_content=True
+        )
+    """
+    output_format = _export_format(output_file, output_format)
+    if output_format == "flowfile-v3":
+        include_content = True
+    summaries = list_flowfiles(connection, limit=limit)
+    con_id = connection.id if isinstance(connection, nipyapi.nifi.ConnectionEntity) else connection
+    batch_size = (max_workers or nipyapi.config.max_workers) * 4
+
+    handle = _open_export(output_file, output_format)
+
+    def _add_member(name, source, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        handle.addfile(info, source)
+
+    def _contents(batch, batch_summaries):
+        # Opened one at a time, and released once the encoder moves on
+        for flowfile, summary in zip(batch, batch_summaries):
+            response = _open_flowfile_content(con_id, summary)
+            try:
+                yield flowfile.attributes, response, summary.size
+            finally:
+                response.release_conn()
+
+    with handle:
+        for start in range(0, len(summaries), batch_size):
+            end = start + batch_size
+            batch_summaries = summaries[start:end]
+            batch = nipyapi.utils.run_concurrently(
+                lambda x: _fetch_flowfile(con_id, x), batch_summaries, max_workers=max_workers
+            )
+            if output_format == "flowfile-v3":
+                nipyapi.flowfile_package.write_package(_contents(batch, batch_summaries), handle)
+                continue
+            for flowfile, summary in zip(batch, batch_summaries):
+                record = json.dumps(flowfile.to_dict())
+                if output_format == "tar":
+                    data = record.encode("utf-8")
+                    _add_member(flowfile.uuid + ".json", io.BytesIO(data), len(data))
+                elif not include_content:
+                    handle.write(record + "\n")
+                if not include_content:
+                    continue
+                response = _open_flowfile_content(con_id, summary)
+                try:
+                    if output_format == "tar":
+                        _add_member(flowfile.uuid + ".content", response, summary.size)
+                    else:
+                        handle.write(record[:-1] + ', "content_base64": "')
+                        _write_base64(response, handle)
+                        handle.write('"}\n')
+                finally:
+                    response.release_conn()
+    log.debug("Exported %d FlowFiles from %s to %s", len(summaries), con_id, output_file)
+    return os.path.abspath(output_file)
 
 
 def purge_process_group(process_group, stop=False, greedy=True, identifier_type="auto"):
@@ -2281,7 +3455,9 @@ def update_controller(  # pylint: disable=too-many-arguments,too-many-positional
     )
     assert isinstance(update, nipyapi.nifi.ControllerServiceDTO)
 
-    if refresh:
+    # auto_disable needs the current state, so it always refetches when refreshing
+    optimistic = refresh and nipyapi.config.optimistic_revisions and not auto_disable
+    if refresh and not optimistic:
         controller = get_controller(controller.id, "id")
 
     was_enabled = controller.component.state == "ENABLED"
@@ -2300,11 +3476,17 @@ def update_controller(  # pylint: disable=too-many-arguments,too-many-positional
     # Insert the ID into the update
     update.id = controller.id
     try:
-        result = nipyapi.nifi.ControllerServicesApi().update_controller_service(
-            id=controller.id,
-            body=nipyapi.nifi.ControllerServiceEntity(
-                component=update, revision=controller.revision, id=controller.id
+        result = nipyapi.utils.submit_revisioned(
+            controller,
+            lambda x: nipyapi.nifi.ControllerServicesApi().update_controller_service(
+                id=x.id,
+                body=nipyapi.nifi.ControllerServiceEntity(
+                    component=update, revision=x.revision, id=x.id
+                ),
             ),
+            lambda x: get_controller(x, "id"),
+            optimistic,
+            partial=True,
         )
     except Exception:
         # Attempt to restore enabled state if update fails
@@ -2368,17 +3550,8 @@ def schedule_controller(controller, scheduled, refresh=False, greedy=True, ident
             return True
         return False
 
-    handle = nipyapi.nifi.ControllerServicesApi()
-    if refresh:
-        controller = nipyapi.canvas.get_controller(controller.id, "id")
     # NiFi 2.x: update run status via ControllerServicesApi.update_run_status1
-    result = handle.update_run_status1(
-        id=controller.id,
-        body=nipyapi.nifi.ControllerServiceRunStatusEntity(
-            revision=controller.revision, state=target_state
-        ),
-    )
-    if not result:
+    if not _submit_run_status(controller, "CONTROLLER_SERVICE", target_state, refresh):
         raise ValueError("Scheduling request failed")
     state_test = nipyapi.utils.wait_to_complete(
         _schedule_controller_state,
@@ -2456,6 +3629,231 @@ def schedule_all_controllers(pg_id, scheduled):
     return result
 
 
+def _dependency_levels(depends_on):
+    """
+    Groups a dependency map into topological levels.
+
+    Args:
+        depends_on (dict): id -> set of ids that it depends on
+
+    Returns:
+        list[list[str]]: Levels in dependency order; each id only depends on
+        ids in earlier levels
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    remaining = {k: set(v) for k, v in depends_on.items()}
+    levels = []
+    while remaining:
+        level = sorted(k for k, v in remaining.items() if not v)
+        if not level:
+            raise ValueError(f"Controller Service reference cycle between: {sorted(remaining)}")
+        for k in level:
+            remaining.pop(k)
+        for v in remaining.values():
+            v.difference_update(level)
+        levels.append(level)
+    return levels
+
+
+def _dependency_chain(node_id, depends_on, failed):
+    """Returns the dependency path from node_id to the nearest failed service."""
+    parents = {node_id: None}
+    queue = deque([node_id])
+    while queue:
+        current = queue.popleft()
+        if current in failed and current != node_id:
+            chain = []
+            while current is not None:
+                chain.append(current)
+                current = parents[current]
+            return list(reversed(chain))
+        for dep in sorted(depends_on.get(current, ())):
+            if dep not in parents:
+                parents[dep] = current
+                queue.append(dep)
+    return [node_id]
+
+
+def get_controller_dependency_graph(pg_id="root", descendants=True):
+    """
+    Builds the reference graph between the Controller Services in a Process Group.
+
+    Edges come from Controller Service properties that identify another
+    service, plus the referencing_components reported by NiFi, using a single
+    Controller Service listing. Services in ancestor Process Groups are not
+    included.
+
+    Args:
+        pg_id (str): The UUID of the Process Group, defaults to the root
+        descendants (bool): Whether to include services in child Process Groups
+
+    Returns:
+        ControllerDependencyGraph: named tuple with 'controllers' (dict of
+        id -> ControllerServiceEntity), 'depends_on' (dict of id -> set of
+        service ids it references) and 'levels' (list of lists of ids, in the
+        order they must be enabled).
+
+    Raises:
+        ValueError: If the service references contain a cycle.
+
+    Example::
+
+        graph = nipyapi.canvas.get_controller_dependency_graph(pg.id)
+        for i, level in enumerate(graph.levels):
+            print(i, [graph.controllers[x].component.name for x in level])
+    """
+    assert isinstance(pg_id, str)
+    with nipyapi.utils.rest_exceptions():
+        listing = nipyapi.nifi.FlowApi().get_controller_services_from_group(
+            pg_id,
+            include_ancestor_groups=False,
+            include_descendant_groups=descendants,
+            include_referencing_components=True,
+        )
+    controllers = {x.id: x for x in listing.controller_services or []}
+    depends_on = {x: set() for x in controllers}
+    for cont_id, cont in controllers.items():
+        descriptors = cont.component.descriptors or {}
+        for prop, value in (cont.component.properties or {}).items():
+            descriptor = descriptors.get(prop)
+            if value in controllers and descriptor and descriptor.identifies_controller_service:
+                depends_on[cont_id].add(value)
+        for ref in cont.component.referencing_components or []:
+            if ref.id in controllers and ref.component.reference_type == "ControllerService":
+                depends_on[ref.id].add(cont_id)
+        depends_on[cont_id].discard(cont_id)
+    return ControllerDependencyGraph(
+        controllers=controllers, depends_on=depends_on, levels=_dependency_levels(depends_on)
+    )
+
+
+def schedule_controllers_ordered(
+    pg_id, scheduled, descendants=True, max_wait=None, max_workers=None
+):  # pylint: disable=too-many-locals,too-many-branches
+    """
+    Enable or Disable Controller Services level by level in dependency order.
+
+    Services are enabled after the services they reference, and disabled
+    before them. Each level is scheduled concurrently and only the services in
+    that level are polled, with a delay that backs off while they settle.
+    If a service fails to reach the target state, the services that depend on
+    it (or that it depends on, when disabling) are not attempted.
+
+    Args:
+        pg_id (str): The UUID of the Process Group
+        scheduled (bool or str): True/False for ENABLED/DISABLED, or one of
+            "ENABLED", "DISABLED".
+        descendants (bool): Whether to include services in child Process Groups
+        max_wait (int): Seconds to wait for each level, defaults to
+            config.long_max_wait
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        list[ScheduleResult]: One result per service, in scheduling order.
+        Services blocked by a failure have an error naming the dependency
+        chain to the failed service.
+
+    Raises:
+        ValueError: If scheduled is not valid or the references contain a cycle.
+
+    Example::
+
+        results = nipyapi.canvas.schedule_controllers_ordered(pg.id, True)
+        for r in results:
+            if not r.success:
+                print(r.id, r.error)
+    """
+    target_state = nipyapi.utils.resolve_schedule_state(
+        scheduled, "ENABLED", "DISABLED", ("ENABLED", "DISABLED")
+    )
+    graph = get_controller_dependency_graph(pg_id, descendants)
+    if target_state == "ENABLED":
+        levels, blockers = graph.levels, graph.depends_on
+    else:
+        # Disable dependents first; a service is blocked by its dependents
+        levels = list(reversed(graph.levels))
+        blockers = {x: set() for x in graph.controllers}
+        for cont_id, deps in graph.depends_on.items():
+            for dep in deps:
+                blockers[dep].add(cont_id)
+    handle = nipyapi.nifi.ControllerServicesApi()
+    results = {}
+    failed = set()  # failed, or blocked by a failure
+    root_failed = set()
+
+    def _level_in_state(pending):
+        for cont in nipyapi.utils.run_concurrently(
+            handle.get_controller_service, sorted(pending), max_workers=max_workers
+        ):
+            results[cont.id] = results[cont.id]._replace(state=cont.component.state)
+            if cont.component.state == target_state:
+                pending.discard(cont.id)
+        return not pending
+
+    for level in levels:
+        to_submit = []
+        for cont_id in level:
+            if blockers[cont_id] & failed:
+                chain = _dependency_chain(cont_id, blockers, root_failed)
+                results[cont_id] = ScheduleResult(
+                    cont_id,
+                    "CONTROLLER_SERVICE",
+                    graph.controllers[cont_id].component.state,
+                    False,
+                    f"Blocked by dependency chain: {' -> '.join(chain)}",
+                )
+                failed.add(cont_id)
+            elif graph.controllers[cont_id].component.state == target_state:
+                results[cont_id] = ScheduleResult(
+                    cont_id, "CONTROLLER_SERVICE", target_state, True, None
+                )
+            else:
+                to_submit.append(cont_id)
+        submitted = nipyapi.utils.run_concurrently(
+            lambda x: _submit_run_status(graph.controllers[x], "CONTROLLER_SERVICE", target_state),
+            to_submit,
+            max_workers=max_workers,
+            return_exceptions=True,
+        )
+        pending = set()
+        for cont_id, outcome in zip(to_submit, submitted):
+            if isinstance(outcome, Exception):
+                results[cont_id] = ScheduleResult(
+                    cont_id, "CONTROLLER_SERVICE", None, False, str(outcome)
+                )
+                failed.add(cont_id)
+                root_failed.add(cont_id)
+            else:
+                results[cont_id] = ScheduleResult(
+                    cont_id, "CONTROLLER_SERVICE", outcome, True, None
+                )
+                pending.add(cont_id)
+        if not pending:
+            continue
+        try:
+            with nipyapi.utils.rest_exceptions():
+                nipyapi.utils.wait_to_complete(
+                    _level_in_state,
+                    pending,
+                    nipyapi_delay=nipyapi.config.short_retry_delay / 5,
+                    nipyapi_backoff=1.5,
+                    nipyapi_max_delay=nipyapi.config.long_retry_delay,
+                    nipyapi_max_wait=max_wait or nipyapi.config.long_max_wait,
+                )
+        except ValueError as e:
+            log.warning("Controller Services did not reach %s: %s", target_state, e)
+            for cont_id in pending:
+                results[cont_id] = results[cont_id]._replace(
+                    success=False, error=f"Did not reach state {target_state}: {e}"
+                )
+            failed.update(pending)
+            root_failed.update(pending)
+    return [results[x] for level in levels for x in level]
+
+
 def get_controller(
     identifier,
     identifier_type="name",
@@ -2482,9 +3880,22 @@ def get_controller(
     assert identifier_type in ["name", "id"]
     handle = nipyapi.nifi.ControllerServicesApi()
     out = None
+    if identifier_type == "name" and not greedy:
+        found_id = _search_unique_id(identifier, "controller_service_node_results")
+        if found_id and include_reporting_tasks:
+            # Search only covers Process Groups, so check the controller level too
+            with nipyapi.utils.rest_exceptions():
+                mgmt = nipyapi.nifi.FlowApi().get_controller_services_from_controller()
+            if any(
+                x.component and x.component.name == identifier
+                for x in mgmt.controller_services or []
+            ):
+                found_id = None
+        if found_id:
+            identifier, identifier_type = found_id, "id"
     try:
         if identifier_type == "id":
-            out = handle.get_controller_service(identifier)
+            out = nipyapi.utils.cache_revision(handle.get_controller_service(identifier))
         else:
             obj = list_all_controllers(include_reporting_tasks=include_reporting_tasks)
             out = nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
@@ -2499,11 +3910,13 @@ def list_all_controller_types():
     """
     Lists all Controller Service types available on the environment
 
+    Served from the extension catalog, see
+    :func:`nipyapi.extensions.get_extension_catalog`.
+
     Returns:
         list(DocumentedTypeDTO)
     """
-    handle = nipyapi.nifi.FlowApi()
-    return handle.get_controller_service_types().controller_service_types
+    return list(nipyapi.extensions.get_extension_catalog().controllers.types)
 
 
 def get_controller_type(identifier, identifier_type="name", greedy=True):
@@ -2520,8 +3933,11 @@ def get_controller_type(identifier, identifier_type="name", greedy=True):
         list(Objects) for multiple matches
 
     """
-    with nipyapi.utils.rest_exceptions():
-        obj = list_all_controller_types()
+    if identifier_type in ["name", "bundle"]:
+        return nipyapi.extensions.find_extension_types(
+            identifier, "controller", identifier_type, greedy=greedy
+        )
+    obj = list_all_controller_types()
     if obj:
         return nipyapi.utils.filter_obj(obj, identifier, identifier_type, greedy=greedy)
     return obj
@@ -2586,13 +4002,62 @@ def get_controller_service_docs(controller):
             f"got: {type(controller).__name__}"
         )
 
-    with nipyapi.utils.rest_exceptions():
-        return nipyapi.nifi.FlowApi().get_controller_service_definition(
-            group=bundle.group,
-            artifact=bundle.artifact,
-            version=bundle.version,
-            type=cs_type,
+    return nipyapi.extensions.get_extension_definition(
+        nipyapi.nifi.DocumentedTypeDTO(type=cs_type, bundle=bundle), "controller"
+    )
+
+
+def list_all_components(pg_id="root", kinds=None, descendants=True, max_workers=None, detail="all"):
+    """
+    Collects several kinds of component in a single traversal of the canvas.
+
+    Each Process Group's flow is fetched once and every requested kind is
+    harvested from it, rather than listing each kind with its own request per
+    group. The groups on each level of the hierarchy are fetched concurrently.
+
+    Args:
+        pg_id (str): The UUID of the Process Group to start from, defaults to
+            the Canvas root
+        kinds (list[str]): The component kinds to collect, any of
+            process_groups, processors, connections, input_ports,
+            output_ports, funnels, labels, remote_process_groups.
+            Defaults to all of them
+        descendants (bool): Whether to collect from child Process Groups
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+        detail (str): 'all' or 'ui'; the flow payload to fetch, see get_flow
+
+    Returns:
+        dict: kind to list of component entities, e.g. PortEntity for
+        input_ports. process_groups holds the groups below pg_id, not pg_id
+        itself
+
+    Example::
+
+        found = nipyapi.canvas.list_all_components(kinds=["funnels", "labels"])
+        print(len(found["funnels"]), len(found["labels"]))
+    """
+    assert isinstance(pg_id, str), "pg_id should be a string"
+    kinds = list(kinds or _FLOW_COMPONENT_KINDS)
+    unknown = [x for x in kinds if x not in _FLOW_COMPONENT_KINDS]
+    if unknown:
+        raise ValueError(
+            f"Unsupported kinds {unknown}, expected any of {list(_FLOW_COMPONENT_KINDS)}"
         )
+    out = {kind: [] for kind in kinds}
+    pending = [pg_id]
+    while pending:
+        flows = nipyapi.utils.run_concurrently(
+            lambda x: get_flow(x, detail), pending, max_workers=max_workers
+        )
+        pending = []
+        for this_flow in flows:
+            contents = this_flow.process_group_flow.flow
+            for kind in kinds:
+                out[kind] += getattr(contents, kind) or []
+            if descendants:
+                pending += [x.id for x in contents.process_groups or []]
+    return out
 
 
 def list_all_by_kind(kind, pg_id="root", descendants=True, greedy=True, identifier_type="auto"):
@@ -2636,16 +4101,7 @@ def list_all_by_kind(kind, pg_id="root", descendants=True, greedy=True, identifi
             identifier_type=identifier_type,
         )
         pg_id = process_group.id
-    handle = nipyapi.nifi.ProcessGroupsApi()
-    call_function = getattr(handle, "get_" + kind)
-    out = []
-    if descendants:
-        pgs = list_all_process_groups(pg_id)
-    else:
-        pgs = [get_process_group(pg_id, "id")]
-    for pg in pgs:
-        out += getattr(call_function(pg.id), kind)
-    return out
+    return list_all_components(pg_id, [kind], descendants)[kind]
 
 
 def list_all_input_ports(pg_id="root", descendants=True):
@@ -33,6 +33,7 @@ from .detach_flow import detach_flow
 from .ensure_registry import ensure_registry
 from .export_flow_definition import export_flow_definition
 from .export_parameters import export_parameters
+from .get_backpressure_hotspots import get_backpressure_hotspots
 from .get_flow_diff import get_flow_diff
 from .get_flow_versions import get_flow_versions
 from .get_status import get_status
@@ -55,6 +56,7 @@ __all__ = [
     "start_flow",
     "stop_flow",
     "get_status",
+    "get_backpressure_hotspots",
     "list_flows",
     "list_registry_flows",
     "get_flow_versions",
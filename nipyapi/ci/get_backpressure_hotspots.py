@@ -0,0 +1,91 @@
+"""
+get_backpressure_hotspots - report the connections closest to backpressure.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import nipyapi
+
+log = logging.getLogger(__name__)
+
+
+def get_backpressure_hotspots(
+    process_group_id: Optional[str] = None,
+    top: Optional[int] = None,
+    min_fill: Optional[float] = None,
+) -> dict:
+    """
+    Report the connections closest to backpressure under a process group.
+
+    Scans every connection in the process group and its descendants from a
+    single recursive status request, and ranks them by how full their queue
+    is relative to the object count and data size backpressure thresholds.
+
+    Args:
+        process_group_id: ID of the process group to scan.
+                         Env: NIFI_PROCESS_GROUP_ID.
+                         If not provided, defaults to root process group.
+        top: Number of connections to report (default 10).
+             Env: NIFI_BACKPRESSURE_TOP.
+        min_fill: Only report connections at or above this fill ratio,
+                  0.0 to 1.0 (default 0.0). Env: NIFI_BACKPRESSURE_MIN_FILL.
+
+    Returns:
+        dict with:
+        - process_group_id: The process group scanned
+        - hotspot_count: Number of connections reported
+        - max_fill_ratio: Fill ratio of the fullest connection
+        - hotspots: List of dicts, fullest first
+
+    Each hotspot entry contains:
+        - id, name: Connection identification
+        - group_id, group_name: Process group holding the connection
+        - fill_ratio: Larger of count_ratio and bytes_ratio, 1.0 at backpressure
+        - count_ratio, bytes_ratio: Queue fill against each threshold
+        - flow_files_queued, bytes_queued: Current queue size
+        - source_id, source_name: Upstream component
+        - destination_id, destination_name: Downstream component
+        - millis_to_backpressure: NiFi's prediction, empty if unavailable
+
+    Example::
+
+        # Top 10 fullest connections on the canvas
+        nipyapi ci get_backpressure_hotspots
+
+        # Connections at least 80% full under a process group
+        nipyapi ci get_backpressure_hotspots --process_group_id PG_ID --min_fill 0.8
+    """
+    process_group_id = process_group_id or os.environ.get("NIFI_PROCESS_GROUP_ID")
+    if top is None:
+        top = int(os.environ.get("NIFI_BACKPRESSURE_TOP", "10"))
+    if min_fill is None:
+        min_fill = float(os.environ.get("NIFI_BACKPRESSURE_MIN_FILL", "0.0"))
+
+    if not process_group_id:
+        process_group_id = nipyapi.canvas.get_root_pg_id()
+        log.info("No process_group_id specified, using root process group")
+
+    log.info("Scanning connection backpressure under: %s", process_group_id)
+    hotspots = nipyapi.canvas.get_backpressure_hotspots(
+        process_group_id, top=top, min_fill=min_fill
+    )
+
+    entries = []
+    for hotspot in hotspots:
+        entry = {}
+        for key, value in hotspot._asdict().items():
+            if isinstance(value, float):
+                value = round(value, 3)
+            entry[key] = "" if value is None else str(value)
+        entries.append(entry)
+
+    log.info("Found %d connections at or above %.2f fill", len(entries), min_fill)
+
+    return {
+        "process_group_id": process_group_id,
+        "hotspot_count": str(len(entries)),
+        "max_fill_ratio": entries[0]["fill_ratio"] if entries else "0.0",
+        "hotspots": entries,
+    }
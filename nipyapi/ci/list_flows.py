@@ -12,6 +12,34 @@ import nipyapi
 log = logging.getLogger(__name__)
 
 
+def _descendant_process_groups(process_group_id):
+    """
+    Lists all nested process groups under a parent.
+
+    Enumerates the groups from one recursive status call and only fetches
+    the full entity for version controlled groups, whose version control
+    details are needed; the rest are represented by minimal entities.
+    """
+    tree = nipyapi.canvas.get_process_group_tree(process_group_id)
+    child_ids = tree.descendant_ids(include_self=False)
+    versioned_ids = [i for i in child_ids if tree.groups[i].versioned_flow_state]
+    fetched = dict(
+        zip(
+            versioned_ids,
+            nipyapi.utils.run_concurrently(
+                lambda i: nipyapi.canvas.get_process_group(i, "id"), versioned_ids
+            ),
+        )
+    )
+    return [
+        fetched.get(i)
+        or nipyapi.nifi.ProcessGroupEntity(
+            id=i, component=nipyapi.nifi.ProcessGroupDTO(id=i, name=tree.name(i))
+        )
+        for i in child_ids
+    ]
+
+
 def list_flows(  # pylint: disable=too-many-locals
     process_group_id: Optional[str] = None,
     descendants: Optional[bool] = None,
@@ -81,10 +109,7 @@ def list_flows(  # pylint: disable=too-many-locals
 
     # Get child process groups
     if descendants:
-        # Recursive: get all nested process groups
-        all_pgs = nipyapi.canvas.list_all_process_groups(process_group_id)
-        # Remove the parent from the list (it gets included)
-        all_pgs = [pg for pg in all_pgs if pg.id != process_group_id]
+        all_pgs = _descendant_process_groups(process_group_id)
         log.debug("Including all descendants")
     else:
         # Immediate children only
@@ -498,9 +498,16 @@ def main():
             self.parameters = SafeModule(nipyapi.parameters)
             self.security = SafeModule(nipyapi.security)
             self.system = SafeModule(nipyapi.system)
+            self.metrics = SafeModule(nipyapi.metrics)
+            self.sampling = SafeModule(nipyapi.sampling)
+            self.provenance = SafeModule(nipyapi.provenance)
+            self.s2s = SafeModule(nipyapi.s2s)
+            self.flowfile_package = SafeModule(nipyapi.flowfile_package)
+            self.history = SafeModule(nipyapi.history)
             self.layout = SafeModule(nipyapi.layout)
             self.extensions = SafeModule(nipyapi.extensions)
             self.bulletins = SafeModule(nipyapi.bulletins)
+            self.counters = SafeModule(nipyapi.counters)
             self.config = nipyapi.config
             self.profiles = nipyapi.profiles
             self.utils = nipyapi.utils
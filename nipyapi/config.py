@@ -48,6 +48,49 @@ long_retry_delay = 5
 long_max_wait = 120
 
 
+# --- Concurrency ------
+# Maximum number of requests bulk helpers (e.g. canvas.schedule_many) will
+# issue in parallel. The generated REST clients keep 4 pooled connections per
+# host, so raising this beyond that mostly adds connection churn.
+max_workers = 4
+
+
+# --- Revision handling ------
+# NiFi rejects writes that do not carry the current component revision. By
+# default update helpers fetch the component before each write when asked to
+# refresh. With optimistic_revisions on they instead use the revision they
+# were given, or for writes of only the changed fields the newest revision seen
+# in earlier responses, and only refetch when NiFi reports a conflict.
+optimistic_revisions = False
+# Most component revisions kept for optimistic_revisions
+revision_cache_size = 10000
+# How many times to refetch and retry a write rejected for a stale revision
+revision_conflict_retries = 3
+
+
+# --- Name lookups ------
+# Exact (non-greedy) name lookups in get_processor, get_process_group and
+# get_controller first try NiFi's canvas search, and only list the whole
+# canvas if that does not find exactly one match
+search_lookups = True
+
+
+# --- Extension Catalog ------
+# How long, in seconds, the cached list of Processor and Controller Service
+# types is trusted before checking whether NiFi's installed NARs changed
+extension_catalog_ttl = 3600
+# Optional directory to save the catalog in between sessions, keyed by NiFi
+# version and installed NARs. None keeps it in memory only.
+extension_catalog_dir = os.getenv("NIPYAPI_EXTENSION_CATALOG_DIR")
+
+
+# --- FlowFile listings ------
+# How long, in seconds, a connection's queue listing is reused to find the
+# cluster node of a FlowFile when get_flowfile_details or
+# get_flowfile_content are called without a cluster_node_id
+flowfile_listing_ttl = 10
+
+
 # --- Object Filters ------
 # This sets the mappings of where in the native datatype objects to find
 # particularly useful fields, like UUID or NAME.
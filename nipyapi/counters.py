@@ -0,0 +1,203 @@
+"""
+For reading, comparing and resetting NiFi counters.
+
+Counters are incremented by processors such as UpdateCounter and by scripted
+components, and make cheap business metrics. This module reads them as a
+compact snapshot keyed by (context, name), so that successive snapshots can
+be compared to give deltas and per-second rates, and resets them in bulk by
+pattern.
+"""
+
+import logging
+import re
+import time
+from collections import namedtuple
+
+import nipyapi
+
+__all__ = [
+    "get_counters",
+    "counter_deltas",
+    "counter_rates",
+    "poll_counters",
+    "reset_counters",
+    "CountersSnapshot",
+]
+
+log = logging.getLogger(__name__)
+
+# Named tuple for get_counters return value
+CountersSnapshot = namedtuple("CountersSnapshot", ["timestamp", "values", "ids", "nodes"])
+
+
+def _snapshot_values(snapshot, ids):
+    """Reads a CountersSnapshotDTO into {(context, name): value}, noting ids"""
+    values = {}
+    for counter in snapshot.counters or []:
+        key = (counter.context, counter.name)
+        values[key] = counter.value_count
+        ids[key] = counter.id
+    return values
+
+
+def get_counters(nodewise=False, node_ids=None, max_workers=None):
+    """
+    Takes a snapshot of the current counter values.
+
+    Args:
+        nodewise (bool): Also return each cluster node's values, read in a
+            single request that NiFi fans out to the nodes
+        node_ids (list[str]): Read only these cluster nodes, one request per
+            node made concurrently; values are then the sum across them
+        max_workers (int): Concurrent requests for node_ids, defaults to
+            config.max_workers
+
+    Returns:
+        (CountersSnapshot): timestamp in epoch seconds; values mapping
+        (context, name) to the count; ids mapping (context, name) to the
+        counter id; nodes mapping node id to its own values, or None unless
+        nodewise or node_ids is given
+
+    Example::
+
+        snap = nipyapi.counters.get_counters()
+        print(snap.values[("UpdateCounter (0a1b...)", "orders")])
+    """
+    ids = {}
+    timestamp = time.time()
+    if node_ids:
+        with nipyapi.utils.rest_exceptions():
+            entities = nipyapi.utils.run_concurrently(
+                lambda x: nipyapi.nifi.CountersApi().get_counters(cluster_node_id=x),
+                node_ids,
+                max_workers=max_workers,
+            )
+        nodes = {
+            node_id: _snapshot_values(entity.counters.aggregate_snapshot, ids)
+            for node_id, entity in zip(node_ids, entities)
+        }
+        values = {}
+        for node_values in nodes.values():
+            for key, value in node_values.items():
+                values[key] = values.get(key, 0) + value
+        return CountersSnapshot(timestamp, values, ids, nodes)
+    with nipyapi.utils.rest_exceptions():
+        counters = nipyapi.nifi.CountersApi().get_counters(nodewise=nodewise).counters
+    values = _snapshot_values(counters.aggregate_snapshot, ids)
+    nodes = None
+    if nodewise:
+        nodes = {
+            x.node_id: _snapshot_values(x.snapshot, ids) for x in counters.node_snapshots or []
+        }
+    return CountersSnapshot(timestamp, values, ids, nodes)
+
+
+def counter_deltas(before, after):
+    """
+    Returns how much each counter grew between two snapshots.
+
+    A counter that is new, or lower than before because it was reset, is
+    taken to have counted up from zero.
+
+    Args:
+        before (CountersSnapshot): The earlier snapshot
+        after (CountersSnapshot): The later snapshot
+
+    Returns:
+        dict: (context, name) to the increase, for every counter in after
+    """
+    deltas = {}
+    for key, value in after.values.items():
+        previous = before.values.get(key, 0)
+        deltas[key] = value - previous if value >= previous else value
+    return deltas
+
+
+def counter_rates(before, after):
+    """
+    Returns each counter's average increase per second between two snapshots.
+
+    Args:
+        before (CountersSnapshot): The earlier snapshot
+        after (CountersSnapshot): The later snapshot
+
+    Returns:
+        dict: (context, name) to increase per second
+    """
+    elapsed = after.timestamp - before.timestamp
+    if elapsed <= 0:
+        raise ValueError("The after snapshot must be taken later than the before snapshot")
+    return {key: delta / elapsed for key, delta in counter_deltas(before, after).items()}
+
+
+def poll_counters(interval, count=None, **kwargs):
+    """
+    Takes counter snapshots at a fixed interval, yielding the changes.
+
+    Args:
+        interval (float): Seconds between snapshots
+        count (int): Number of intervals to yield, or None to poll until the
+            generator is closed
+        **kwargs: Passed to :func:`get_counters`
+
+    Yields:
+        tuple(CountersSnapshot, dict, dict): The new snapshot, and the deltas
+        and rates since the previous one
+
+    Example::
+
+        for snap, deltas, rates in nipyapi.counters.poll_counters(60):
+            print(rates)
+    """
+    previous = get_counters(**kwargs)
+    polled = 0
+    while count is None or polled < count:
+        time.sleep(max(0.0, previous.timestamp + interval - time.time()))
+        current = get_counters(**kwargs)
+        yield current, counter_deltas(previous, current), counter_rates(previous, current)
+        previous = current
+        polled += 1
+
+
+def reset_counters(name=None, context=None, max_workers=None):
+    """
+    Resets counters to zero, across the cluster.
+
+    With no patterns every counter is reset in a single request. Otherwise
+    the matching counters are reset concurrently, one request each.
+
+    Args:
+        name (str): Regular expression searched for in counter names
+        context (str): Regular expression searched for in counter contexts,
+            which name the component that owns the counter
+        max_workers (int): Concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        list[tuple]: The (context, name) of each counter reset
+
+    Example::
+
+        nipyapi.counters.reset_counters(name="^orders_")
+    """
+    snapshot = get_counters()
+    if name is None and context is None:
+        with nipyapi.utils.rest_exceptions():
+            nipyapi.nifi.CountersApi().update_all_counters()
+        return sorted(snapshot.values)
+    name_re = re.compile(name) if name is not None else None
+    context_re = re.compile(context) if context is not None else None
+    matched = sorted(
+        key
+        for key in snapshot.values
+        if (context_re is None or context_re.search(key[0] or ""))
+        and (name_re is None or name_re.search(key[1] or ""))
+    )
+    with nipyapi.utils.rest_exceptions():
+        nipyapi.utils.run_concurrently(
+            lambda x: nipyapi.nifi.CountersApi().update_counter(snapshot.ids[x]),
+            matched,
+            max_workers=max_workers,
+        )
+    log.debug("Reset %d counters", len(matched))
+    return matched
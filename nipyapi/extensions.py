@@ -22,6 +22,13 @@ Processor Bundle Version Functions:
     - get_processor_type_version() - Get processor type for a specific bundle version
     - change_processor_bundle_version() - Change processor to a different bundle version
 
+Extension Type Catalog Functions:
+    - get_extension_catalog() - Cached, indexed Processor and Controller Service types
+    - find_extension_types() - Look up types by simple name, class name, bundle or tag
+    - get_extension_definition() - Cached Processor or Controller Service definition
+    - has_sensitive_properties() - Whether a processor's type has sensitive properties
+    - clear_extension_catalog() - Drop the in-memory catalog
+
 Python processors and other extension processors may require initialization time
 after being created (e.g., setting up a virtual environment). Use the processor
 initialization functions to detect and wait for this.
@@ -38,13 +45,39 @@ Example::
     >>> proc = nipyapi.extensions.wait_for_processor_init(proc)
 """
 
+import hashlib
 import logging
 import os
+import threading
+import time
+from collections import namedtuple
+
+import yaml
 
 import nipyapi
 
 log = logging.getLogger(__name__)
 
+# Named tuples for the extension type catalog
+ExtensionTypeIndex = namedtuple(
+    "ExtensionTypeIndex", ["types", "by_name", "by_type", "by_bundle", "by_tag"]
+)
+ExtensionCatalog = namedtuple("ExtensionCatalog", ["key", "created", "processors", "controllers"])
+
+# In-memory catalog state, see get_extension_catalog
+_catalog_state = {"catalog": None, "definitions": {}, "sensitive": {}}
+_catalog_lock = threading.RLock()
+
+# Catalog kinds: listing call, listing attribute and definition call
+_CATALOG_KINDS = {
+    "processor": ("get_processor_types", "processor_types", "get_processor_definition"),
+    "controller": (
+        "get_controller_service_types",
+        "controller_service_types",
+        "get_controller_service_definition",
+    ),
+}
+
 
 def list_nars():
     """
@@ -216,6 +249,7 @@ def upload_nar(file_path=None, file_bytes=None, filename=None, timeout=120):
     )
 
     log.info("NAR installed: %s (extensions: %d)", nar_id, result.extension_count or 0)
+    clear_extension_catalog()
     return result
 
 
@@ -309,6 +343,7 @@ def delete_nar(identifier, force=False, timeout=30):
 
     nar_summary = response.nar_summary
     log.info("NAR delete API completed: %s", identifier)
+    clear_extension_catalog()
 
     # Wait for system to reach stable state
     cleanup_complete = True
@@ -629,11 +664,8 @@ def get_processor_bundle_versions(processor_type):
         >>> for v in versions:
         ...     print(f"{v['bundle'].version}")
     """
-    with nipyapi.utils.rest_exceptions():
-        all_types = nipyapi.nifi.FlowApi().get_processor_types()
-
     matching = []
-    for proc in all_types.processor_types:
+    for proc in get_extension_catalog().processors.types:
         # Match by type name (either full or short name)
         if processor_type in proc.type:
             matching.append(
@@ -676,10 +708,7 @@ def get_processor_type_version(processor_type, version):
         >>> # Create processor with that specific version
         >>> proc = nipyapi.canvas.create_processor(pg, proc_type, (0,0), 'MyProc')
     """
-    with nipyapi.utils.rest_exceptions():
-        all_types = nipyapi.nifi.FlowApi().get_processor_types()
-
-    for proc in all_types.processor_types:
+    for proc in get_extension_catalog().processors.types:
         if processor_type in proc.type and proc.bundle.version == version:
             return proc
 
@@ -781,6 +810,273 @@ def change_processor_bundle_version(processor, target_version):
     return updated
 
 
+def _catalog_key():
+    """Identifies the installed extension set by NiFi version and NARs."""
+    version = nipyapi.system.get_nifi_version_info().ni_fi_version
+    try:
+        nars = sorted(
+            f"{x.identifier}:{x.coordinate.group}:{x.coordinate.artifact}:"
+            f"{x.coordinate.version}"
+            for x in list_nars()
+        )
+    except ValueError:
+        # NAR listing needs controller read access; fall back to the version
+        log.debug("Could not list NARs, keying extension catalog on version only")
+        nars = []
+    return f"{version}|{hashlib.sha1(';'.join(nars).encode()).hexdigest()}"
+
+
+def _catalog_path(key, *parts):
+    """Returns the on-disk location for a catalog key, or None if not persisted."""
+    if not nipyapi.config.extension_catalog_dir:
+        return None
+    folder = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(nipyapi.config.extension_catalog_dir), folder, *parts)
+
+
+def _persist(path, obj):
+    """Writes a NiFi model to disk as json, ignoring failures."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        nipyapi.utils.fs_write(nipyapi.utils.dump(obj), tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("Could not persist extension catalog to %s: %s", path, e)
+
+
+def _index_types(types):
+    """Builds the lookup indexes for a list of DocumentedTypeDTO."""
+    index = ExtensionTypeIndex(types, {}, {}, {}, {})
+    for item in types:
+        index.by_name.setdefault(item.type.rsplit(".", 1)[-1], []).append(item)
+        index.by_type.setdefault(item.type, []).append(item)
+        index.by_bundle.setdefault(item.bundle.artifact, []).append(item)
+        for tag in item.tags or []:
+            index.by_tag.setdefault(tag, []).append(item)
+    return index
+
+
+def _load_types(key, kind, from_disk=True):
+    """Loads one kind of extension types from disk if allowed, or from NiFi."""
+    list_call, attribute, _ = _CATALOG_KINDS[kind]
+    response_type = (
+        "ProcessorTypesEntity" if kind == "processor" else "ControllerServiceTypesEntity"
+    )
+    path = _catalog_path(key, f"{attribute}.json")
+    if from_disk and path and os.path.exists(path):
+        try:
+            return getattr(
+                nipyapi.utils.load(nipyapi.utils.fs_read(path), dto=("nifi", response_type)),
+                attribute,
+            )
+        except (ValueError, yaml.YAMLError) as e:
+            log.warning("Ignoring unreadable extension catalog %s: %s", path, e)
+    with nipyapi.utils.rest_exceptions():
+        listing = getattr(nipyapi.nifi.FlowApi(), list_call)()
+    if path:
+        _persist(path, listing)
+    return getattr(listing, attribute) or []
+
+
+def get_extension_catalog(refresh=False):
+    """
+    Get the indexed catalog of Processor and Controller Service types.
+
+    The catalog is kept in memory for config.extension_catalog_ttl seconds,
+    after which the type listings are fetched from NiFi again, so types that
+    do not come from NARs, such as Python processors, appear once the TTL
+    expires. If config.extension_catalog_dir is set, catalogs are also saved
+    there and reused by the first lookup of later sessions for the same NiFi
+    version and NAR set. upload_nar and delete_nar clear the catalog
+    automatically.
+
+    Args:
+        refresh (bool): Fetch the catalog from NiFi regardless of the cache
+
+    Returns:
+        ExtensionCatalog: named tuple with 'key' (NiFi version and NAR set),
+        'created' (epoch seconds), and 'processors' and 'controllers', each an
+        ExtensionTypeIndex of 'types' (list of DocumentedTypeDTO) plus dicts
+        'by_name' (simple class name), 'by_type' (fully qualified class name),
+        'by_bundle' (bundle artifact) and 'by_tag', each mapping to a list of
+        DocumentedTypeDTO.
+
+    Example::
+
+        >>> catalog = nipyapi.extensions.get_extension_catalog()
+        >>> [x.bundle.version for x in catalog.processors.by_name['GenerateFlowFile']]
+        ['2.5.0']
+    """
+    with _catalog_lock:
+        catalog = _catalog_state["catalog"]
+        now = time.time()
+        if (
+            catalog is not None
+            and not refresh
+            and now - catalog.created < nipyapi.config.extension_catalog_ttl
+        ):
+            return catalog
+        key = _catalog_key()
+        # Only a fresh session may start from disk; an expired or refreshed
+        # catalog always lists the types again
+        from_disk = catalog is None and not refresh
+        processors, controllers = nipyapi.utils.run_concurrently(
+            lambda kind: _load_types(key, kind, from_disk), ["processor", "controller"]
+        )
+        if catalog is None or catalog.key != key or refresh:
+            _catalog_state["definitions"] = {}
+            _catalog_state["sensitive"] = {}
+        catalog = ExtensionCatalog(key, now, _index_types(processors), _index_types(controllers))
+        _catalog_state["catalog"] = catalog
+        return catalog
+
+
+def clear_extension_catalog():
+    """
+    Drop the in-memory extension catalog and cached definitions.
+
+    The next lookup fetches the catalog again (or reads it from
+    config.extension_catalog_dir if it was saved for the same NiFi version
+    and NAR set).
+    """
+    with _catalog_lock:
+        _catalog_state["catalog"] = None
+        _catalog_state["definitions"] = {}
+        _catalog_state["sensitive"] = {}
+
+
+def find_extension_types(identifier, kind="processor", identifier_type="name", greedy=True):
+    """
+    Look up Processor or Controller Service types in the extension catalog.
+
+    Matches behave like nipyapi.utils.filter_obj on the type listing, but
+    exact matches and tags are served from the catalog indexes.
+
+    Args:
+        identifier (str): The value to look for
+        kind (str): 'processor' or 'controller'
+        identifier_type (str): 'name' to match the fully qualified class
+            name, 'simple_name' for the class name only, 'bundle' for the
+            bundle artifact or 'tag'
+        greedy (bool): For 'name' and 'bundle', True matches substrings,
+            False requires an exact match
+
+    Returns:
+        None for no matches, Single Object for unique match,
+        list(Objects) for multiple matches
+
+    Example::
+
+        >>> nipyapi.extensions.find_extension_types('kafka', identifier_type='tag')
+    """
+    assert kind in _CATALOG_KINDS
+    assert identifier_type in ["name", "simple_name", "bundle", "tag"]
+    catalog = get_extension_catalog()
+    index = catalog.processors if kind == "processor" else catalog.controllers
+    if identifier_type == "simple_name":
+        out = index.by_name.get(identifier, [])
+    elif identifier_type == "tag":
+        out = index.by_tag.get(identifier, [])
+    elif not greedy:
+        lookup = index.by_type if identifier_type == "name" else index.by_bundle
+        out = lookup.get(identifier, [])
+    elif identifier_type == "name":
+        out = [x for x in index.types if identifier in x.type]
+    else:
+        out = [x for x in index.types if identifier in x.bundle.artifact]
+    if not out:
+        return None
+    if len(out) > 1:
+        return list(out)
+    return out[0]
+
+
+def get_extension_definition(extension_type, kind="processor"):
+    """
+    Get the full definition of a Processor or Controller Service type, cached.
+
+    Definitions are kept with the extension catalog, so they are dropped
+    when it changes, and saved alongside it if config.extension_catalog_dir
+    is set.
+
+    Args:
+        extension_type (DocumentedTypeDTO): The type, from the catalog or
+            get_processor_type / get_controller_type. Anything with 'type' and
+            'bundle' attributes may be used.
+        kind (str): 'processor' or 'controller'
+
+    Returns:
+        ProcessorDefinition or ControllerServiceDefinition
+    """
+    assert kind in _CATALOG_KINDS
+    bundle = extension_type.bundle
+    def_key = (kind, bundle.group, bundle.artifact, bundle.version, extension_type.type)
+    catalog = get_extension_catalog()
+    with _catalog_lock:
+        cached = _catalog_state["definitions"].get(def_key)
+    if cached is not None:
+        return cached
+    response_type = "ProcessorDefinition" if kind == "processor" else "ControllerServiceDefinition"
+    path = _catalog_path(
+        catalog.key, "definitions", hashlib.sha1("|".join(def_key).encode()).hexdigest() + ".json"
+    )
+    definition = None
+    if path and os.path.exists(path):
+        try:
+            definition = nipyapi.utils.load(
+                nipyapi.utils.fs_read(path), dto=("nifi", response_type)
+            )
+        except (ValueError, yaml.YAMLError) as e:
+            log.warning("Ignoring unreadable extension definition %s: %s", path, e)
+    if definition is None:
+        with nipyapi.utils.rest_exceptions():
+            definition = getattr(nipyapi.nifi.FlowApi(), _CATALOG_KINDS[kind][2])(
+                group=bundle.group,
+                artifact=bundle.artifact,
+                version=bundle.version,
+                type=extension_type.type,
+            )
+        if path:
+            _persist(path, definition)
+    with _catalog_lock:
+        _catalog_state["definitions"][def_key] = definition
+    return definition
+
+
+def has_sensitive_properties(processor):
+    """
+    Whether a Processor's type and bundle declares any sensitive property.
+
+    Once a Processor of a given type and bundle is found to declare a
+    sensitive property that is not dynamic, the type is remembered with the
+    extension catalog and other Processors of that type are not inspected.
+
+    Args:
+        processor (ProcessorEntity): The Processor to check
+
+    Returns:
+        bool
+    """
+    bundle = processor.component.bundle
+    key = (
+        processor.component.type,
+        bundle.group if bundle else None,
+        bundle.artifact if bundle else None,
+        bundle.version if bundle else None,
+    )
+    with _catalog_lock:
+        if _catalog_state["sensitive"].get(key):
+            return True
+    descriptors = (processor.component.config.descriptors or {}).values()
+    sensitive = [x for x in descriptors if x.sensitive is True]
+    # Dynamic properties vary per Processor, so only declared ones are kept
+    if any(x.dynamic is not True for x in sensitive):
+        with _catalog_lock:
+            _catalog_state["sensitive"][key] = True
+    return bool(sensitive)
+
+
 def _check_nar_install_complete(identifier):
     """
     Check if a NAR installation is complete.
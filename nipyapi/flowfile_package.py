@@ -0,0 +1,434 @@
+"""
+For encoding and decoding FlowFiles in NiFi's FlowFile package v3 format.
+
+FlowFile package v3 is the 'application/flowfile-v3' stream written by
+MergeContent and PackageFlowFile, and read by UnpackContent and ListenHTTP.
+Each FlowFile is framed as the magic header 'NiFiFF3', the attribute count,
+each attribute key and value as length prefixed UTF-8, the content length as
+an eight byte integer, and then the content.
+
+Content is never copied without need. The encoder passes bytes-like content,
+including mmaps, through as memoryview slices, reads files and generators a
+chunk at a time, and only coalesces headers and small contents into its
+bounded buffer. The decoder yields each FlowFile's attributes with a
+:class:`ContentReader` positioned over its content, which for in-memory
+input is a view onto the original buffer.
+"""
+
+import io
+import os
+import stat
+import struct
+
+__all__ = [
+    "iter_encode",
+    "write_package",
+    "encode",
+    "iter_decode",
+    "decode",
+    "ContentReader",
+    "MAGIC_HEADER",
+]
+
+# Marks the start of every FlowFile in a v3 package
+MAGIC_HEADER = b"NiFiFF3"
+
+# Field lengths below this fit in two bytes, larger ones are escaped to four
+_MAX_SHORT_LENGTH = 0xFFFF
+
+# Default size of the encoder's buffer and of each chunk read from files
+_CHUNK_SIZE = 64 * 1024
+
+
+def _field_length(value):
+    """Encodes an attribute count or string length"""
+    if value < _MAX_SHORT_LENGTH:
+        return struct.pack(">H", value)
+    return struct.pack(">Hi", _MAX_SHORT_LENGTH, value)
+
+
+def _header(attributes, size):
+    """Encodes the magic header, attributes and content length of a FlowFile"""
+    parts = [MAGIC_HEADER, _field_length(len(attributes))]
+    for key, value in attributes.items():
+        for text in (key, value):
+            encoded = str(text).encode("utf-8")
+            parts.append(_field_length(len(encoded)))
+            parts.append(encoded)
+    parts.append(struct.pack(">q", size))
+    return b"".join(parts)
+
+
+def _as_view(content):
+    """Returns a flat byte memoryview of bytes-like content, or None"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    try:
+        view = memoryview(content)
+    except TypeError:
+        return None
+    return view.cast("B") if view.format != "B" or view.ndim != 1 else view
+
+
+def _stream_size(stream):
+    """
+    Returns the bytes left in a file object from its current position.
+
+    The size on disk is only trusted for regular files, as sockets and pipes
+    report zero. Other streams are measured by seeking, and a stream that
+    cannot seek, such as an HTTP response, needs its size given.
+    """
+    try:
+        info = os.fstat(stream.fileno())
+        if stat.S_ISREG(info.st_mode):
+            return info.st_size - stream.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    seekable = getattr(stream, "seekable", None)
+    if seekable is None or not seekable():
+        raise ValueError("A size must be given for content read from a stream that cannot seek")
+    position = stream.tell()
+    end = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return end - position
+
+
+def _content_chunks(content, size, chunk_size):
+    """
+    Resolves content to its size and an iterator of bytes-like chunks.
+
+    Returns:
+        tuple(int, iterator)
+    """
+    view = _as_view(content)
+    if view is not None:
+        if size is not None and size != view.nbytes:
+            raise ValueError(f"Content is {view.nbytes} bytes, but size {size} was given")
+
+        def _slices():
+            for start in range(0, view.nbytes, chunk_size):
+                end = start + chunk_size
+                yield view[start:end]
+
+        return view.nbytes, _slices()
+    if hasattr(content, "read"):
+        if size is None:
+            size = _stream_size(content)
+
+        def _read():
+            remaining = size
+            while remaining:
+                chunk = content.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise ValueError(f"File content ended {remaining} bytes short of {size}")
+                remaining -= len(chunk)
+                yield chunk
+
+        return size, _read()
+    if size is None:
+        raise ValueError("A size must be given for content supplied as an iterable of chunks")
+
+    def _checked():
+        seen = 0
+        for chunk in content:
+            seen += len(chunk)
+            yield chunk
+        if seen != size:
+            raise ValueError(f"Content generator produced {seen} bytes, expected {size}")
+
+    return size, _checked()
+
+
+def iter_encode(flowfiles, chunk_size=_CHUNK_SIZE):
+    """
+    Encodes FlowFiles as a v3 package, yielding it in chunks.
+
+    Headers and contents smaller than the space left in the buffer are
+    gathered into a buffer of at most chunk_size bytes, or one header if
+    that alone is larger. Larger bytes-like
+    contents are yielded as memoryview slices of the original object, and
+    files and generators are read one chunk at a time, so memory use stays
+    bounded by chunk_size however large the FlowFiles are.
+
+    Args:
+        flowfiles (iterable): (attributes, content) or (attributes, content,
+            size) tuples. Content may be bytes-like (bytes, bytearray,
+            memoryview, mmap), str, a binary file object read from its
+            current position, or an iterable of bytes chunks. size is
+            required for iterables and for file objects that cannot seek,
+            such as pipes, sockets and HTTP responses
+        chunk_size (int): Buffer and read size in bytes
+
+    Yields:
+        bytes-like chunks of the package, to be written in order
+
+    Example::
+
+        with open("/tmp/out.pkg", "wb") as out:
+            for chunk in nipyapi.flowfile_package.iter_encode(
+                [({"filename": "a.txt"}, b"hello")]
+            ):
+                out.write(chunk)
+    """
+    assert isinstance(chunk_size, int) and chunk_size > 0
+    buffer = bytearray()
+    for item in flowfiles:
+        attributes, content = item[0] or {}, item[1]
+        size, chunks = _content_chunks(content, item[2] if len(item) > 2 else None, chunk_size)
+        header = _header(attributes, size)
+        if buffer and len(buffer) + len(header) > chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+        buffer += header
+        if size <= chunk_size - len(buffer):
+            for chunk in chunks:
+                buffer += chunk
+        else:
+            for chunk in chunks:
+                if buffer:
+                    yield bytes(buffer)
+                    buffer.clear()
+                yield chunk
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def write_package(flowfiles, output, chunk_size=_CHUNK_SIZE):
+    """
+    Writes FlowFiles as a v3 package to a file.
+
+    Args:
+        flowfiles (iterable): As for iter_encode
+        output (str or file): Path to write, or a binary file object
+        chunk_size (int): Buffer and read size in bytes
+
+    Returns:
+        (int): The number of bytes written
+
+    Example::
+
+        with open("big.bin", "rb") as content:
+            nipyapi.flowfile_package.write_package(
+                [({"filename": "big.bin"}, content)], "/tmp/big.pkg"
+            )
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "wb") as handle:
+            return write_package(flowfiles, handle, chunk_size)
+    written = 0
+    for chunk in iter_encode(flowfiles, chunk_size):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def encode(flowfiles):
+    """
+    Encodes FlowFiles as a v3 package in memory.
+
+    Args:
+        flowfiles (iterable): As for iter_encode
+
+    Returns:
+        (bytes): The package
+    """
+    return b"".join(iter_encode(flowfiles))
+
+
+class ContentReader(io.RawIOBase):
+    """
+    A read-only file object over one FlowFile's content within a package.
+
+    Reads never run past the end of the content. For packages decoded from
+    memory, getbuffer() returns the content as a memoryview of the original
+    buffer without copying. A reader is only valid until the decoder moves
+    to the next FlowFile, at which point any unread content is skipped.
+
+    Attributes:
+        size (int): The content length in bytes
+    """
+
+    def __init__(self, size, stream=None, view=None):
+        super().__init__()
+        self.size = size
+        self._stream = stream
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    @property
+    def remaining(self):
+        """The number of content bytes not yet read"""
+        return self.size - self._position
+
+    def readinto(self, buffer):
+        target = memoryview(buffer).cast("B")
+        count = min(len(target), self.remaining)
+        if not count:
+            return 0
+        if self._view is not None:
+            start = self._position
+            end = start + count
+            target[:count] = self._view[start:end]
+        else:
+            count = self._stream.readinto(target[:count])
+            if not count:
+                raise ValueError("Package ended part way through FlowFile content")
+        self._position += count
+        return count
+
+    def readall(self):
+        if self._view is not None:
+            start = self._position
+            data = bytes(self._view[start:])
+        else:
+            data = self._stream.read(self.remaining)
+            if len(data) < self.remaining:
+                raise ValueError("Package ended part way through FlowFile content")
+        self._position = self.size
+        return data
+
+    def getbuffer(self):
+        """
+        Returns the whole content as a memoryview, without copying.
+
+        Raises:
+            io.UnsupportedOperation: if the package is being read from a file
+        """
+        if self._view is None:
+            raise io.UnsupportedOperation("Content is streamed, use read() instead")
+        return self._view
+
+    def skip(self):
+        """Discards any unread content"""
+        if self._view is None:
+            remaining = self.remaining
+            if self._stream.seekable():
+                self._stream.seek(remaining, io.SEEK_CUR)
+            else:
+                while remaining:
+                    chunk = self._stream.read(min(remaining, _CHUNK_SIZE))
+                    if not chunk:
+                        raise ValueError("Package ended part way through FlowFile content")
+                    remaining -= len(chunk)
+        self._position = self.size
+
+
+def _read_exact(stream, size):
+    """Reads exactly size bytes from a stream, or None at a clean end"""
+    data = stream.read(size)
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    if not data:
+        return None
+    if len(data) < size:
+        raise ValueError("Package ended part way through a FlowFile header")
+    return data
+
+
+def _decode_stream(stream):
+    """Yields (attributes, ContentReader) from a binary file object"""
+
+    def _required(size):
+        data = _read_exact(stream, size)
+        if data is None:
+            raise ValueError("Package ended part way through a FlowFile header")
+        return data
+
+    def _length():
+        value = struct.unpack(">H", _required(2))[0]
+        return struct.unpack(">i", _required(4))[0] if value == _MAX_SHORT_LENGTH else value
+
+    while True:
+        magic = _read_exact(stream, len(MAGIC_HEADER))
+        if magic is None:
+            return
+        if magic != MAGIC_HEADER:
+            raise ValueError(f"Not a FlowFile package v3 stream, found header {magic!r}")
+        attributes = {}
+        for _ in range(_length()):
+            key = _required(_length()).decode("utf-8")
+            attributes[key] = _required(_length()).decode("utf-8")
+        reader = ContentReader(struct.unpack(">q", _required(8))[0], stream=stream)
+        yield attributes, reader
+        reader.skip()
+
+
+def _decode_buffer(view):
+    """Yields (attributes, ContentReader) from a memoryview, without copying content"""
+    position = 0
+    total = view.nbytes
+
+    def _take(size):
+        nonlocal position
+        end = position + size
+        if end > total:
+            raise ValueError("Package ended part way through a FlowFile")
+        chunk = view[position:end]
+        position = end
+        return chunk
+
+    def _length():
+        value = struct.unpack(">H", _take(2))[0]
+        return struct.unpack(">i", _take(4))[0] if value == _MAX_SHORT_LENGTH else value
+
+    while position < total:
+        magic = _take(len(MAGIC_HEADER))
+        if magic != MAGIC_HEADER:
+            raise ValueError(f"Not a FlowFile package v3 stream, found header {bytes(magic)!r}")
+        attributes = {}
+        for _ in range(_length()):
+            key = str(_take(_length()), "utf-8")
+            attributes[key] = str(_take(_length()), "utf-8")
+        size = struct.unpack(">q", _take(8))[0]
+        yield attributes, ContentReader(size, view=_take(size))
+
+
+def iter_decode(source):
+    """
+    Decodes a v3 package lazily, one FlowFile at a time.
+
+    Only the current FlowFile's attributes are held in memory; its content
+    is read on demand through the yielded reader. Unread content is skipped
+    when iteration moves on.
+
+    Args:
+        source: The package as bytes-like data (bytes, bytearray,
+            memoryview, mmap), or a binary file object
+
+    Yields:
+        tuple(dict, ContentReader): attributes and a reader over the content
+
+    Example::
+
+        with open("/tmp/out.pkg", "rb") as f:
+            for attributes, content in nipyapi.flowfile_package.iter_decode(f):
+                print(attributes["filename"], content.size)
+    """
+    view = _as_view(source) if not isinstance(source, str) else None
+    if view is not None:
+        return _decode_buffer(view)
+    if not hasattr(source, "read"):
+        raise TypeError(f"Expected bytes-like data or a file object, got {type(source).__name__}")
+    return _decode_stream(source)
+
+
+def decode(source):
+    """
+    Decodes a whole v3 package into memory.
+
+    Args:
+        source: As for iter_decode
+
+    Returns:
+        list[tuple(dict, bytes)]: attributes and content per FlowFile
+    """
+    return [(attributes, reader.read()) for attributes, reader in iter_decode(source)]
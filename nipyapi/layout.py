@@ -582,7 +582,7 @@ def get_canvas_bounds(pg_id: str = None, components: list = None) -> dict:
             all_positions.append(pos)
     elif pg_id is not None:
         # Mode 1: Fetch all components from process group
-        flow = nipyapi.canvas.get_flow(pg_id)
+        flow = nipyapi.canvas.get_flow(pg_id, "ui")
         fc = flow.process_group_flow.flow
 
         for component_list in [
@@ -675,7 +675,7 @@ def find_flow_spine(  # pylint: disable=too-many-locals,too-many-branches,too-ma
         spine_ids = nipyapi.layout.find_flow_spine(pg.id, prefer_success=True)
 
         # Get actual component entities
-        flow = nipyapi.canvas.get_flow(pg.id)
+        flow = nipyapi.canvas.get_flow(pg.id, "ui")
         components_map = {p.id: p for p in flow.process_group_flow.flow.processors}
         spine = [components_map[cid] for cid in spine_ids if cid in components_map]
 
@@ -684,7 +684,7 @@ def find_flow_spine(  # pylint: disable=too-many-locals,too-many-branches,too-ma
             pos = nipyapi.layout.grid_position(row=i, col=0)
             nipyapi.layout.move_component(comp, pos)
     """
-    flow = nipyapi.canvas.get_flow(pg_id)
+    flow = nipyapi.canvas.get_flow(pg_id, "ui")
     fc = flow.process_group_flow.flow
     connections = fc.connections or []
 
@@ -852,7 +852,7 @@ def get_side_branches(pg_id: str, spine: list = None, recursive: bool = True) ->
         return {}
 
     # Get connections to map out the graph
-    flow = nipyapi.canvas.get_flow(pg_id)
+    flow = nipyapi.canvas.get_flow(pg_id, "ui")
     connections = flow.process_group_flow.flow.connections or []
 
     # Build adjacency list
@@ -926,7 +926,7 @@ def suggest_flow_layout(  # pylint: disable=too-many-locals,too-many-branches
     comp_positions = {}
 
     # Build a map of component types for centering decisions
-    flow = nipyapi.canvas.get_flow(pg_id)
+    flow = nipyapi.canvas.get_flow(pg_id, "ui")
     fc = flow.process_group_flow.flow
     component_types = {}
     for p in fc.processors or []:
@@ -1087,18 +1087,21 @@ def move_processor(processor, position: tuple, refresh: bool = True, include_ret
     current_pos = get_position(processor)
     offset = (position[0] - current_pos[0], position[1] - current_pos[1])
 
-    if refresh:
-        processor = nipyapi.canvas.get_processor(processor.id, "id")
-
-    result = nipyapi.nifi.ProcessorsApi().update_processor(
-        id=processor.id,
-        body=nipyapi.nifi.ProcessorEntity(
-            revision=processor.revision,
-            component=nipyapi.nifi.ProcessorDTO(
-                id=processor.component.id,
-                position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+    result = nipyapi.utils.submit_revisioned(
+        processor,
+        lambda x: nipyapi.nifi.ProcessorsApi().update_processor(
+            id=x.id,
+            body=nipyapi.nifi.ProcessorEntity(
+                revision=x.revision,
+                component=nipyapi.nifi.ProcessorDTO(
+                    id=x.component.id,
+                    position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+                ),
             ),
         ),
+        lambda x: nipyapi.canvas.get_processor(x, "id"),
+        refresh,
+        partial=True,
     )
 
     # Move retry bends to match UI behavior
@@ -1127,18 +1130,21 @@ def move_process_group(process_group, position: tuple, refresh: bool = True):
     Returns:
         Updated ProcessGroupEntity
     """
-    if refresh:
-        process_group = nipyapi.canvas.get_process_group(process_group.id, "id")
-
-    return nipyapi.nifi.ProcessGroupsApi().update_process_group(
-        id=process_group.id,
-        body=nipyapi.nifi.ProcessGroupEntity(
-            revision=process_group.revision,
-            component=nipyapi.nifi.ProcessGroupDTO(
-                id=process_group.component.id,
-                position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+    return nipyapi.utils.submit_revisioned(
+        process_group,
+        lambda x: nipyapi.nifi.ProcessGroupsApi().update_process_group(
+            id=x.id,
+            body=nipyapi.nifi.ProcessGroupEntity(
+                revision=x.revision,
+                component=nipyapi.nifi.ProcessGroupDTO(
+                    id=x.component.id,
+                    position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+                ),
             ),
         ),
+        lambda x: nipyapi.canvas.get_process_group(x, "id"),
+        refresh,
+        partial=True,
     )
 
 
@@ -1154,18 +1160,21 @@ def move_funnel(funnel, position: tuple, refresh: bool = True):
     Returns:
         Updated FunnelEntity
     """
-    if refresh:
-        funnel = nipyapi.canvas.get_funnel(funnel.id)
-
-    return nipyapi.nifi.FunnelsApi().update_funnel(
-        id=funnel.id,
-        body=nipyapi.nifi.FunnelEntity(
-            revision=funnel.revision,
-            component=nipyapi.nifi.FunnelDTO(
-                id=funnel.component.id,
-                position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+    return nipyapi.utils.submit_revisioned(
+        funnel,
+        lambda x: nipyapi.nifi.FunnelsApi().update_funnel(
+            id=x.id,
+            body=nipyapi.nifi.FunnelEntity(
+                revision=x.revision,
+                component=nipyapi.nifi.FunnelDTO(
+                    id=x.component.id,
+                    position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+                ),
             ),
         ),
+        nipyapi.canvas.get_funnel,
+        refresh,
+        partial=True,
     )
 
 
@@ -1183,24 +1192,30 @@ def move_port(port, position: tuple, refresh: bool = True):
     """
     port_type = port.component.type if hasattr(port.component, "type") else None
 
-    if refresh:
-        if port_type == "INPUT_PORT":
-            port = nipyapi.nifi.InputPortsApi().get_input_port(id=port.id)
-        else:
-            port = nipyapi.nifi.OutputPortsApi().get_output_port(id=port.id)
-
-    body = nipyapi.nifi.PortEntity(
-        revision=port.revision,
-        component=nipyapi.nifi.PortDTO(
-            id=port.component.id,
-            position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+    if port_type == "INPUT_PORT":
+        handle = nipyapi.nifi.InputPortsApi()
+        getter, updater = handle.get_input_port, handle.update_input_port
+    else:
+        handle = nipyapi.nifi.OutputPortsApi()
+        getter, updater = handle.get_output_port, handle.update_output_port
+
+    return nipyapi.utils.submit_revisioned(
+        port,
+        lambda x: updater(
+            id=x.id,
+            body=nipyapi.nifi.PortEntity(
+                revision=x.revision,
+                component=nipyapi.nifi.PortDTO(
+                    id=x.component.id,
+                    position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+                ),
+            ),
         ),
+        getter,
+        refresh,
+        partial=True,
     )
 
-    if port_type == "INPUT_PORT":
-        return nipyapi.nifi.InputPortsApi().update_input_port(id=port.id, body=body)
-    return nipyapi.nifi.OutputPortsApi().update_output_port(id=port.id, body=body)
-
 
 def move_label(label, position: tuple, refresh: bool = True):
     """
@@ -1214,18 +1229,22 @@ def move_label(label, position: tuple, refresh: bool = True):
     Returns:
         Updated LabelEntity
     """
-    if refresh:
-        label = nipyapi.nifi.LabelsApi().get_label(id=label.id)
-
-    return nipyapi.nifi.LabelsApi().update_label(
-        id=label.id,
-        body=nipyapi.nifi.LabelEntity(
-            revision=label.revision,
-            component=nipyapi.nifi.LabelDTO(
-                id=label.component.id,
-                position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+    handle = nipyapi.nifi.LabelsApi()
+    return nipyapi.utils.submit_revisioned(
+        label,
+        lambda x: handle.update_label(
+            id=x.id,
+            body=nipyapi.nifi.LabelEntity(
+                revision=x.revision,
+                component=nipyapi.nifi.LabelDTO(
+                    id=x.component.id,
+                    position=nipyapi.nifi.PositionDTO(x=float(position[0]), y=float(position[1])),
+                ),
             ),
         ),
+        handle.get_label,
+        refresh,
+        partial=True,
     )
 
 
@@ -1467,7 +1486,7 @@ def suggest_pg_position(parent_pg_id: str) -> tuple:
         pos = nipyapi.layout.suggest_pg_position(root_pg_id)
         new_pg = nipyapi.canvas.create_process_group(root, "New PG", location=pos)
     """
-    flow = nipyapi.canvas.get_flow(parent_pg_id)
+    flow = nipyapi.canvas.get_flow(parent_pg_id, "ui")
     fc = flow.process_group_flow.flow
 
     existing_pgs = fc.process_groups or []
@@ -1535,7 +1554,7 @@ def align_pg_grid(  # pylint: disable=too-many-locals
         for m in moves:
             print(f"{m['name']}: {m['from']} -> {m['to']}")
     """
-    flow = nipyapi.canvas.get_flow(parent_pg_id)
+    flow = nipyapi.canvas.get_flow(parent_pg_id, "ui")
     fc = flow.process_group_flow.flow
 
     existing_pgs = fc.process_groups or []
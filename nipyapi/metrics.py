@@ -0,0 +1,411 @@
+"""
+For retrieving NiFi component metrics in compact, analysis friendly forms.
+
+Status history is returned as columns: one array of timestamps and one array
+per metric, rather than a list of snapshot objects. The arrays are NumPy
+int64 arrays when NumPy is installed, or standard library ``array('q')``
+otherwise; both support len(), indexing and iteration, so callers that only
+chart or diff values need not care which they get.
+
+Flow metrics are read from NiFi's Prometheus endpoint as a stream, one
+sample at a time, so large flows can be filtered down to the few families or
+components of interest without holding the whole exposition in memory.
+"""
+
+import json
+import logging
+import re
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import nipyapi
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+__all__ = [
+    "get_status_history",
+    "get_status_histories",
+    "StatusHistory",
+    "HISTORY_KINDS",
+    "parse_prometheus",
+    "iter_flow_metrics",
+    "get_component_metrics",
+    "MetricSample",
+]
+
+log = logging.getLogger(__name__)
+
+# Named tuple for get_status_history return value
+StatusHistory = namedtuple(
+    "StatusHistory", ["component_id", "kind", "details", "fields", "aggregate", "nodes"]
+)
+
+# Named tuple for a single parsed Prometheus sample
+MetricSample = namedtuple("MetricSample", ["name", "family", "labels", "value", "timestamp"])
+
+# Supported kinds mapped to their FlowApi status history call
+HISTORY_KINDS = {
+    "processor": "get_processor_status_history",
+    "connection": "get_connection_status_history",
+    "process_group": "get_process_group_status_history",
+    "remote_process_group": "get_remote_process_group_status_history",
+}
+
+_ENTITY_KINDS = (
+    ("ProcessorEntity", "processor"),
+    ("ConnectionEntity", "connection"),
+    ("ProcessGroupEntity", "process_group"),
+    ("RemoteProcessGroupEntity", "remote_process_group"),
+)
+
+# Timestamp formats NiFi has used when not sending epoch milliseconds
+_TIMESTAMP_FORMATS = ("%m/%d/%Y %H:%M:%S.%f %Z", "%m/%d/%Y %H:%M:%S %Z")
+
+
+def _int_column(values):
+    """Returns a list of ints as a NumPy int64 array, or array('q') without NumPy"""
+    if numpy is not None:
+        return numpy.asarray(values, dtype=numpy.int64)
+    return array("q", values)
+
+
+def _epoch_millis(value):
+    """Converts a NiFi status snapshot timestamp to epoch milliseconds"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if value.isdigit():
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        parsed = None
+        for fmt in _TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            raise ValueError(f"Unrecognised status history timestamp: {value!r}") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _columns(snapshots, fields):
+    """
+    Pivots raw statusSnapshots into columns.
+
+    Returns:
+        dict: 'timestamp' and each field name to an int column, in time order
+    """
+    snapshots = sorted(
+        ((_epoch_millis(x["timestamp"]), x.get("statusMetrics") or {}) for x in snapshots),
+        key=lambda x: x[0],
+    )
+    out = {"timestamp": _int_column([x[0] for x in snapshots])}
+    for field in fields:
+        out[field] = _int_column([x[1].get(field, 0) for x in snapshots])
+    return out
+
+
+def _resolve_kind(component, kind):
+    """Returns the component id and history kind for an id or entity"""
+    component_id = getattr(component, "id", component)
+    if not isinstance(component_id, str):
+        raise TypeError(f"component must be an id or entity, got: {type(component).__name__}")
+    if kind is None:
+        kind = next(
+            (label for name, label in _ENTITY_KINDS if type(component).__name__ == name),
+            None,
+        )
+        if kind is None:
+            raise ValueError("kind is required when component is given by id")
+    if kind not in HISTORY_KINDS:
+        raise ValueError(f"kind must be one of {sorted(HISTORY_KINDS)}, got: {kind!r}")
+    return component_id, kind
+
+
+def get_status_history(component, kind=None):
+    """
+    Fetches the status history of a component as columnar arrays.
+
+    The response is decoded straight from JSON into columns, skipping the
+    per-snapshot model objects.
+
+    Args:
+        component: The component UUID, or its entity
+        kind (str): One of 'processor', 'connection', 'process_group' or
+            'remote_process_group'. Inferred when an entity is given
+
+    Returns:
+        :class:`StatusHistory`: with
+
+        - component_id, kind: as requested
+        - details (dict): NiFi's component details, e.g. Name and Type
+        - fields (dict): metric field name to its descriptor dict (label,
+          description, formatter)
+        - aggregate (dict): 'timestamp' in epoch milliseconds and one column
+          per metric field, across the cluster
+        - nodes (dict): node address ('host:port') to the same columns for
+          that node; empty when NiFi is not clustered
+
+    Example::
+
+        history = nipyapi.metrics.get_status_history(processor)
+        times = history.aggregate["timestamp"]
+        written = history.aggregate["bytesWritten"]
+    """
+    component_id, kind = _resolve_kind(component, kind)
+    call = getattr(nipyapi.nifi.FlowApi(), HISTORY_KINDS[kind])
+    with nipyapi.utils.rest_exceptions():
+        response = call(component_id, _preload_content=False)
+    history = json.loads(response.data).get("statusHistory") or {}
+    fields = {x["field"]: x for x in history.get("fieldDescriptors") or []}
+    nodes = {}
+    for node in history.get("nodeSnapshots") or []:
+        address = f"{node.get('address')}:{node.get('apiPort')}"
+        nodes[address] = _columns(node.get("statusSnapshots") or [], fields)
+    return StatusHistory(
+        component_id=component_id,
+        kind=kind,
+        details=history.get("componentDetails") or {},
+        fields=fields,
+        aggregate=_columns(history.get("aggregateSnapshots") or [], fields),
+        nodes=nodes,
+    )
+
+
+def get_status_histories(components, kind=None, max_workers=None):
+    """
+    Fetches the status history of many components concurrently.
+
+    Args:
+        components (list): Component UUIDs or entities
+        kind (str): History kind for all components, see get_status_history.
+            Inferred per entity when not given
+        max_workers (int): Maximum concurrent requests, defaults to
+            config.max_workers
+
+    Returns:
+        dict: component UUID to :class:`StatusHistory`
+
+    Example::
+
+        procs = nipyapi.canvas.list_all_processors(pg.id)
+        histories = nipyapi.metrics.get_status_histories(procs)
+    """
+    results = nipyapi.utils.run_concurrently(
+        lambda x: get_status_history(x, kind), list(components), max_workers=max_workers
+    )
+    return {x.component_id: x for x in results}
+
+
+def _parse_labels(text, start):
+    """
+    Parses a Prometheus label set beginning after the opening brace.
+
+    Returns:
+        tuple(dict, int): the labels and the index after the closing brace
+    """
+    labels = {}
+    pos = start
+    while True:
+        while text[pos] in " ,":
+            pos += 1
+        if text[pos] == "}":
+            return labels, pos + 1
+        equals = text.index("=", pos)
+        key = text[pos:equals].strip()
+        pos = text.index('"', equals) + 1
+        value = []
+        while text[pos] != '"':
+            if text[pos] == "\\":
+                pos += 1
+                value.append("\n" if text[pos] == "n" else text[pos])
+            else:
+                value.append(text[pos])
+            pos += 1
+        labels[key] = "".join(value)
+        pos += 1
+
+
+def _parse_sample(line, family):
+    """Parses one Prometheus sample line into a MetricSample"""
+    brace = line.find("{")
+    space = line.find(" ")
+    if brace != -1 and (space == -1 or brace < space):
+        name = line[:brace]
+        labels, end = _parse_labels(line, brace + 1)
+        rest = line[end:].split()
+    else:
+        name, *rest = line.split()
+        labels = {}
+    if family is None or not name.startswith(family):
+        family = name
+    return MetricSample(
+        name=name,
+        family=family,
+        labels=labels,
+        value=float(rest[0]),
+        timestamp=int(rest[1]) if len(rest) > 1 else None,
+    )
+
+
+def parse_prometheus(lines, families=None, labels=None, component_ids=None):
+    """
+    Parses Prometheus text exposition lazily, yielding matching samples.
+
+    Lines are consumed one at a time, and samples are discarded as soon as
+    they fail a filter, so memory use does not grow with the input.
+
+    Args:
+        lines: Iterable of text lines (str or bytes), e.g. an open file or a
+            streamed HTTP response
+        families (list[str]): Only yield samples of these metric families.
+            A family matches its own samples and suffixed ones such as
+            '_total' or '_bucket'
+        labels (dict): Only yield samples carrying all of these label values
+        component_ids (list[str]): Only yield samples whose 'component_id'
+            label is one of these
+
+    Yields:
+        :class:`MetricSample`: name, family, labels dict, float value and
+        optional timestamp in epoch milliseconds
+
+    Example::
+
+        with open("metrics.txt") as f:
+            for sample in nipyapi.metrics.parse_prometheus(
+                f, families=["nifi_amount_items_queued"]
+            ):
+                print(sample.labels["component_name"], sample.value)
+    """
+    families = set(families) if families else None
+    component_ids = set(component_ids) if component_ids else None
+    labels = labels or {}
+    family = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            parts = line.split(None, 3)
+            if len(parts) > 2 and parts[1] in ("TYPE", "HELP"):
+                family = parts[2]
+            continue
+        if families is not None:
+            # Cheap prefix check before parsing the label set
+            name = re.split(r"[{\s]", line, maxsplit=1)[0]
+            if family not in families and name not in families:
+                continue
+        sample = _parse_sample(line, family)
+        if component_ids is not None and sample.labels.get("component_id") not in component_ids:
+            continue
+        if any(sample.labels.get(k) != v for k, v in labels.items()):
+            continue
+        yield sample
+
+
+def iter_flow_metrics(families=None, labels=None, component_ids=None, reporting_strategy=None):
+    """
+    Streams the flow's Prometheus metrics from NiFi, yielding matching samples.
+
+    The response body is read line by line as it arrives rather than
+    buffered. Filters are also sent to NiFi as sample name and label value
+    patterns, so servers supporting them return less data; they are always
+    applied again client side. Metrics are reported by the node serving the
+    request.
+
+    NiFi 2 reports only process group samples by default, so when
+    component_ids is given every component is requested unless
+    reporting_strategy says otherwise.
+
+    Args:
+        families (list[str]): Metric families to keep, see parse_prometheus
+        labels (dict): Label values samples must carry
+        component_ids (list[str]): Component UUIDs to keep
+        reporting_strategy (str): NiFi's flow metrics reporting strategy,
+            such as 'ALL_PROCESS_GROUPS' or 'ALL_COMPONENTS'; defaults to
+            'ALL_COMPONENTS' with component_ids, else the server default
+
+    Yields:
+        :class:`MetricSample`
+
+    Example::
+
+        queued = {
+            x.labels["component_id"]: x.value
+            for x in nipyapi.metrics.iter_flow_metrics(
+                families=["nifi_amount_items_queued"]
+            )
+        }
+    """
+    kwargs = {}
+    if families:
+        # Counters and histograms report suffixed samples such as _total
+        kwargs["sample_name"] = "^({})(_.*)?$".format("|".join(re.escape(x) for x in families))
+    if component_ids:
+        kwargs["sample_label_value"] = "^({})$".format(
+            "|".join(re.escape(x) for x in component_ids)
+        )
+        reporting_strategy = reporting_strategy or "ALL_COMPONENTS"
+    if reporting_strategy:
+        kwargs["flow_metrics_reporting_strategy"] = reporting_strategy
+    with nipyapi.utils.rest_exceptions():
+        response = nipyapi.nifi.FlowApi().get_flow_metrics(
+            "prometheus", _preload_content=False, **kwargs
+        )
+    try:
+        yield from parse_prometheus(response, families, labels, component_ids)
+    finally:
+        response.release_conn()
+
+
+def get_component_metrics(families=None, component_ids=None, labels=None, reporting_strategy=None):
+    """
+    Collects flow metrics into one compact dict per component.
+
+    Args:
+        families (list[str]): Metric families to keep, see parse_prometheus
+        component_ids (list[str]): Component UUIDs to keep
+        labels (dict): Label values samples must carry
+        reporting_strategy (str): See :func:`iter_flow_metrics`
+
+    Returns:
+        dict: component UUID to a dict of 'name', 'type', 'parent_id' and
+        'metrics', which maps each sample name to its value. Where several
+        samples share a name for one component, e.g. differing only in
+        other labels, their values are summed. Samples without a
+        component_id label are skipped.
+
+    Example::
+
+        found = nipyapi.metrics.get_component_metrics(
+            families=["nifi_amount_items_queued", "nifi_amount_threads_active"]
+        )
+        for component_id, entry in found.items():
+            print(entry["name"], entry["metrics"])
+    """
+    out = {}
+    for sample in iter_flow_metrics(families, labels, component_ids, reporting_strategy):
+        component_id = sample.labels.get("component_id")
+        if component_id is None:
+            continue
+        entry = out.get(component_id)
+        if entry is None:
+            entry = out[component_id] = {
+                "name": sample.labels.get("component_name"),
+                "type": sample.labels.get("component_type"),
+                "parent_id": sample.labels.get("parent_id"),
+                "metrics": {},
+            }
+        metrics = entry["metrics"]
+        metrics[sample.name] = metrics.get(sample.name, 0.0) + sample.value
+    return out
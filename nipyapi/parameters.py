@@ -3,6 +3,7 @@ For Managing NiFi Parameter Contexts
 """
 
 import logging
+from collections import namedtuple
 
 import nipyapi
 from nipyapi.nifi import (
@@ -19,6 +20,11 @@ log = logging.getLogger(__name__)
 # Sentinel object to distinguish "value not provided" from "value is None"
 _NOT_PROVIDED = object()
 
+# Named tuple for get_parameter_context_graph return value
+ParameterContextGraph = namedtuple(
+    "ParameterContextGraph", ["root_id", "contexts", "inherits", "owners"]
+)
+
 __all__ = [
     "list_all_parameter_contexts",
     "list_orphaned_contexts",
@@ -33,6 +39,8 @@ __all__ = [
     "assign_context_to_process_group",
     "remove_context_from_process_group",
     # Hierarchy functions
+    "get_parameter_context_graph",
+    "ParameterContextGraph",
     "get_parameter_context_hierarchy",
     "get_parameter_ownership_map",
     "update_parameter_in_context",
@@ -506,33 +514,33 @@ def get_parameter_context_hierarchy(context_id, include_bindings=False, include_
         ...     print(f"{ctx['name']}: {bindings} bindings")
     """
     enforce_min_ver("1.10.0")
+    graph = get_parameter_context_graph(context_id)
+    nodes = {}
+
+    def _node(ctx_id):
+        # Contexts inherited along several paths share one dict
+        if ctx_id not in nodes:
+            nodes[ctx_id] = _context_summary(
+                graph.contexts[ctx_id], include_bindings, include_parameters
+            )
+            nodes[ctx_id]["inherited"] = [_node(x) for x in graph.inherits[ctx_id]]
+        return nodes[ctx_id]
+
+    return _node(graph.root_id)
 
-    ctx = get_parameter_context(context_id, identifier_type="id")
-    if ctx is None:
-        raise ValueError(f"Parameter context not found: {context_id}")
 
+def _context_summary(ctx, include_bindings, include_parameters):
+    """Describes one Parameter Context for get_parameter_context_hierarchy."""
     result = {
         "id": ctx.id,
         "name": ctx.component.name,
-        "inherited": [],
     }
 
     # Include parameters if requested (default: True for backwards compatibility)
     if include_parameters:
-        result["parameters"] = []
-        for p in ctx.component.parameters or []:
-            param = p.parameter
-            assets = param.referenced_assets or []
-            result["parameters"].append(
-                {
-                    "name": param.name,
-                    "description": param.description,
-                    "sensitive": param.sensitive or False,
-                    "value": None if param.sensitive else param.value,
-                    "has_asset": bool(assets),
-                    "asset_name": assets[0].name if assets else None,
-                }
-            )
+        result["parameters"] = [
+            _parameter_summary(p.parameter) for p in ctx.component.parameters or []
+        ]
 
     # Include bound process groups if requested
     if include_bindings:
@@ -540,17 +548,104 @@ def get_parameter_context_hierarchy(context_id, include_bindings=False, include_
             {"id": pg.id, "name": pg.component.name}
             for pg in (ctx.component.bound_process_groups or [])
         ]
+    return result
 
-    # Recurse into inherited contexts with same flags
-    for ipc in ctx.component.inherited_parameter_contexts or []:
-        child_hierarchy = get_parameter_context_hierarchy(
-            ipc.id,
-            include_bindings=include_bindings,
-            include_parameters=include_parameters,
-        )
-        result["inherited"].append(child_hierarchy)
 
-    return result
+def _parameter_summary(param):
+    """Describes one ParameterDTO, hiding sensitive values."""
+    assets = param.referenced_assets or []
+    return {
+        "name": param.name,
+        "description": param.description,
+        "sensitive": param.sensitive or False,
+        "value": None if param.sensitive else param.value,
+        "has_asset": bool(assets),
+        "asset_name": assets[0].name if assets else None,
+    }
+
+
+def get_parameter_context_graph(context_id):
+    """
+    Get the inheritance graph of a parameter context with a parameter index.
+
+    All contexts are read from a single listing; any inherited context
+    missing from it is fetched individually, concurrently. Contexts
+    inherited along several paths appear once.
+
+    Args:
+        context_id (str): The ID of the root parameter context
+
+    Returns:
+        ParameterContextGraph: named tuple with 'root_id', 'contexts' (dict of
+        id -> ParameterContextEntity for the root and every context it
+        inherits from), 'inherits' (dict of id -> list of directly inherited
+        context ids, in precedence order) and 'owners' (dict of parameter
+        name -> id of the context that owns it, as reported by
+        get_parameter_ownership_map: where several contexts define a name,
+        the one reached last walking each inheritance path depth first).
+
+    Raises:
+        ValueError: If the root or an inherited context cannot be found or
+            read
+
+    Example::
+
+        >>> graph = get_parameter_context_graph(context_id)
+        >>> owner = graph.contexts[graph.owners["PostgreSQL Username"]]
+        >>> print(owner.component.name)
+    """
+    enforce_min_ver("1.10.0")
+    contexts = {x.id: x for x in list_all_parameter_contexts() or [] if x.component}
+    inherits = {}
+    pending = [context_id]
+    while pending:
+        missing = [x for x in pending if x not in contexts]
+        fetched = nipyapi.utils.run_concurrently(
+            lambda x: get_parameter_context(x, identifier_type="id"), missing
+        )
+        for ctx_id, ctx in zip(missing, fetched):
+            if ctx is None:
+                raise ValueError(f"Parameter context not found: {ctx_id}")
+            if ctx.component is None:
+                raise ValueError(f"Parameter context not readable: {ctx_id}")
+            contexts[ctx_id] = ctx
+        next_pending = []
+        for ctx_id in pending:
+            if ctx_id in inherits:
+                continue
+            inherits[ctx_id] = [
+                x.id for x in contexts[ctx_id].component.inherited_parameter_contexts or []
+            ]
+            next_pending += [x for x in inherits[ctx_id] if x not in inherits]
+        pending = list(dict.fromkeys(next_pending))
+
+    # Owners are as get_parameter_ownership_map has always reported them: a
+    # depth-first walk of every inheritance path where later definitions
+    # win, so a context shared by several paths counts at its last visit.
+    # Visiting inherited contexts in reverse and listing each after them
+    # gives every context once, in reverse order of its last visit, so here
+    # the first definition found wins.
+    order = []
+    seen = set()
+
+    def _walk(ctx_id):
+        seen.add(ctx_id)
+        for x in reversed(inherits[ctx_id]):
+            if x not in seen:
+                _walk(x)
+        order.append(ctx_id)
+
+    _walk(context_id)
+    owners = {}
+    for ctx_id in order:
+        for p in contexts[ctx_id].component.parameters or []:
+            owners.setdefault(p.parameter.name, ctx_id)
+    return ParameterContextGraph(
+        root_id=context_id,
+        contexts={x: contexts[x] for x in inherits},
+        inherits=inherits,
+        owners=owners,
+    )
 
 
 def get_parameter_ownership_map(context_id):
@@ -577,24 +672,24 @@ def get_parameter_ownership_map(context_id):
     """
     enforce_min_ver("1.10.0")
 
-    hierarchy = get_parameter_context_hierarchy(context_id)
+    graph = get_parameter_context_graph(context_id)
+    params = {
+        (ctx_id, p.parameter.name): p.parameter
+        for ctx_id, ctx in graph.contexts.items()
+        for p in ctx.component.parameters or []
+    }
     ownership_map = {}
-
-    def _traverse(h):
-        for param in h["parameters"]:
-            ownership_map[param["name"]] = {
-                "context_id": h["id"],
-                "context_name": h["name"],
-                "description": param["description"],
-                "sensitive": param["sensitive"],
-                "has_asset": param["has_asset"],
-                "asset_name": param["asset_name"],
-                "current_value": param["value"],
-            }
-        for child in h["inherited"]:
-            _traverse(child)
-
-    _traverse(hierarchy)
+    for name, ctx_id in graph.owners.items():
+        summary = _parameter_summary(params[(ctx_id, name)])
+        ownership_map[name] = {
+            "context_id": ctx_id,
+            "context_name": graph.contexts[ctx_id].component.name,
+            "description": summary["description"],
+            "sensitive": summary["sensitive"],
+            "has_asset": summary["has_asset"],
+            "asset_name": summary["asset_name"],
+            "current_value": summary["value"],
+        }
     return ownership_map
 
 
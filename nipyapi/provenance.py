@@ -0,0 +1,937 @@
+"""
+For searching NiFi's provenance repository.
+
+Provenance searches in NiFi are asynchronous: a query is submitted, polled
+until the server reports it finished, and then deleted to free the results
+held on the server. The functions here wrap that cycle, so a single call
+returns events, and clean up the server side query even when interrupted.
+
+NiFi caps the number of events a single query returns. For large result sets
+:func:`iter_events` splits the time range into windows, narrowing any window
+that hits the cap, and yields events one window at a time.
+
+Event content is downloaded straight to disk, several events at a time, with
+each distinct content claim fetched only once however many events share it.
+
+Lineage is built up as a :class:`LineageGraph`, expanded towards parents or
+children on demand. Completed lineage results are cached for the session, so
+revisiting part of a lineage does not query NiFi again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+
+import nipyapi
+
+__all__ = [
+    "submit_query",
+    "get_query",
+    "delete_query",
+    "query_events",
+    "iter_events",
+    "export_events",
+    "get_search_options",
+    "download_contents",
+    "replay_events",
+    "EventContent",
+    "ReplayResult",
+    "get_lineage",
+    "LineageGraph",
+    "clear_lineage_cache",
+]
+
+log = logging.getLogger(__name__)
+
+# Searchable field identifiers for the arguments accepted by the query functions
+_FIELD_IDS = {
+    "component_id": "ProcessorID",
+    "flowfile_uuid": "FlowFileUUID",
+    "event_type": "EventType",
+}
+
+# Named tuple for a downloaded event content, path is None on failure
+EventContent = namedtuple("EventContent", ["event_id", "direction", "path", "size", "error"])
+
+# Named tuple for the outcome of replaying one event
+ReplayResult = namedtuple("ReplayResult", ["event_id", "success", "event", "error"])
+
+# Bytes read from a content response per write to disk
+_CHUNK_SIZE = 1024 * 1024
+
+# Completed LineageResultsDTO per (request type, uuid or event id, cluster node)
+_lineage_cache = {}
+_lineage_cache_lock = threading.Lock()
+
+# Date format accepted by NiFi for provenance request bounds
+_REQUEST_DATE_FORMAT = "%m/%d/%Y %H:%M:%S UTC"
+
+
+def _epoch_seconds(value):
+    """Converts a datetime or epoch seconds value to integer epoch seconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, (int, float)):
+        return int(value)
+    raise TypeError(f"Expected datetime or epoch seconds, got {type(value).__name__}")
+
+
+def _format_date(seconds):
+    """Formats epoch seconds as a NiFi provenance request date"""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime(_REQUEST_DATE_FORMAT)
+
+
+def _parse_date(value):
+    """
+    Parses a NiFi provenance date string to epoch seconds.
+
+    Returns:
+        int or None: None if the value is empty or its time zone is unknown
+    """
+    if not value:
+        return None
+    stamp, _, zone = value.rpartition(" ")
+    if zone not in ("UTC", "GMT", "Z"):
+        return None
+    for fmt in ("%m/%d/%Y %H:%M:%S.%f", "%m/%d/%Y %H:%M:%S"):
+        try:
+            parsed = datetime.strptime(stamp, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        return int(parsed.timestamp())
+    return None
+
+
+def _search_terms(component_id=None, flowfile_uuid=None, attributes=None, event_type=None):
+    """Builds the searchTerms dict for a ProvenanceRequestDTO"""
+    terms = {}
+    named = {
+        "component_id": component_id,
+        "flowfile_uuid": flowfile_uuid,
+        "event_type": event_type,
+    }
+    for arg, value in named.items():
+        if value is not None:
+            terms[_FIELD_IDS[arg]] = value
+    terms.update(attributes or {})
+    return {
+        key: nipyapi.nifi.ProvenanceSearchValueDTO(value=str(value), inverse=False)
+        for key, value in terms.items()
+    }
+
+
+def submit_query(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    component_id=None,
+    flowfile_uuid=None,
+    attributes=None,
+    event_type=None,
+    start=None,
+    end=None,
+    max_results=1000,
+    cluster_node_id=None,
+):
+    """
+    Submits a provenance search, returning without waiting for results.
+
+    Most callers want :func:`query_events` or :func:`iter_events`, which
+    also wait for the query to finish and delete it afterwards.
+
+    Args:
+        component_id (str): Only events generated by this component
+        flowfile_uuid (str): Only events for this FlowFile
+        attributes (dict): Further search terms, keyed by indexed attribute
+            name or searchable field id such as 'Filename'
+        event_type (str): Only events of this type, e.g. 'DROP'
+        start (datetime or int): Earliest event time, as a datetime (naive
+            values are taken as UTC) or epoch seconds
+        end (datetime or int): Latest event time
+        max_results (int): Most events the server should return
+        cluster_node_id (str): Only search this cluster node
+
+    Returns:
+        (ProvenanceDTO): The submitted query, with its id
+    """
+    request = nipyapi.nifi.ProvenanceRequestDTO(
+        search_terms=_search_terms(component_id, flowfile_uuid, attributes, event_type),
+        max_results=max_results,
+        summarize=False,
+        incremental_results=False,
+        cluster_node_id=cluster_node_id,
+    )
+    if start is not None:
+        request.start_date = _format_date(_epoch_seconds(start))
+    if end is not None:
+        request.end_date = _format_date(_epoch_seconds(end))
+    body = nipyapi.nifi.ProvenanceEntity(provenance=nipyapi.nifi.ProvenanceDTO(request=request))
+    with nipyapi.utils.rest_exceptions():
+        return nipyapi.nifi.ProvenanceApi().submit_provenance_request(body).provenance
+
+
+def get_query(query_id, cluster_node_id=None):
+    """
+    Fetches the current state of a submitted provenance search.
+
+    Args:
+        query_id (str): The id of the submitted query
+        cluster_node_id (str): The node the query was submitted to, if any
+
+    Returns:
+        (ProvenanceDTO): Check 'finished' before reading 'results'
+    """
+    with nipyapi.utils.rest_exceptions():
+        return (
+            nipyapi.nifi.ProvenanceApi()
+            .get_provenance(query_id, summarize=False, cluster_node_id=cluster_node_id)
+            .provenance
+        )
+
+
+def delete_query(query_id, cluster_node_id=None):
+    """
+    Deletes a provenance search and the results held for it on the server.
+
+    Args:
+        query_id (str): The id of the submitted query
+        cluster_node_id (str): The node the query was submitted to, if any
+
+    Returns:
+        (ProvenanceDTO): The deleted query
+    """
+    with nipyapi.utils.rest_exceptions():
+        return (
+            nipyapi.nifi.ProvenanceApi()
+            .delete_provenance(query_id, cluster_node_id=cluster_node_id)
+            .provenance
+        )
+
+
+def _run_query(terms, start, end, max_results, max_wait):
+    """
+    Submits a query, waits for it with backoff, and always deletes it.
+
+    Args:
+        terms (dict): Search keyword arguments for submit_query
+
+    Returns:
+        (ProvenanceResultsDTO): The finished query's results
+    """
+    cluster_node_id = terms.get("cluster_node_id")
+    query = submit_query(start=start, end=end, max_results=max_results, **terms)
+
+    def _finished():
+        current = get_query(query.id, cluster_node_id)
+        return current if current.finished else False
+
+    try:
+        if not query.finished:
+            query = nipyapi.utils.wait_to_complete(
+                _finished,
+                nipyapi_delay=nipyapi.config.short_retry_delay / 5,
+                nipyapi_backoff=1.5,
+                nipyapi_max_delay=nipyapi.config.long_retry_delay,
+                nipyapi_max_wait=max_wait or nipyapi.config.long_max_wait,
+            )
+    finally:
+        try:
+            delete_query(query.id, cluster_node_id)
+        except ValueError as e:
+            log.warning("Could not delete provenance query %s: %s", query.id, e)
+    results = query.results
+    if results.errors:
+        log.warning("Provenance query %s reported errors: %s", query.id, results.errors)
+    return results
+
+
+def query_events(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    component_id=None,
+    flowfile_uuid=None,
+    attributes=None,
+    event_type=None,
+    start=None,
+    end=None,
+    max_results=1000,
+    cluster_node_id=None,
+    max_wait=None,
+):
+    """
+    Runs one provenance search to completion and returns its events.
+
+    The query is polled with an increasing delay until it finishes, and is
+    deleted from the server afterwards whether or not it succeeded. NiFi
+    returns at most max_results events, newest first; use
+    :func:`iter_events` when more may match.
+
+    Args:
+        component_id (str): Only events generated by this component
+        flowfile_uuid (str): Only events for this FlowFile
+        attributes (dict): Further search terms, keyed by indexed attribute
+            name or searchable field id such as 'Filename'
+        event_type (str): Only events of this type, e.g. 'DROP'
+        start (datetime or int): Earliest event time, as a datetime (naive
+            values are taken as UTC) or epoch seconds
+        end (datetime or int): Latest event time
+        max_results (int): Most events to return
+        cluster_node_id (str): Only search this cluster node
+        max_wait (int): Seconds to wait for the query, defaults to
+            config.long_max_wait
+
+    Returns:
+        list[ProvenanceEventDTO]
+
+    Example::
+
+        events = nipyapi.provenance.query_events(flowfile_uuid=ff_uuid)
+    """
+    terms = {
+        "component_id": component_id,
+        "flowfile_uuid": flowfile_uuid,
+        "attributes": attributes,
+        "event_type": event_type,
+        "cluster_node_id": cluster_node_id,
+    }
+    results = _run_query(terms, start, end, max_results, max_wait)
+    return results.provenance_events or []
+
+
+def iter_events(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    component_id=None,
+    flowfile_uuid=None,
+    attributes=None,
+    event_type=None,
+    start=None,
+    end=None,
+    window=3600,
+    page_size=1000,
+    cluster_node_id=None,
+    max_wait=None,
+):
+    """
+    Yields every matching provenance event, oldest window first.
+
+    The time range is searched in windows of at most page_size events. A
+    window that hits the cap is halved and searched again; windows that come
+    back sparse double the next window's span. Adjacent windows share their
+    boundary second, and events already yielded from the previous window are
+    skipped. Within a window events are yielded in event id order.
+
+    When start is not given a single unbounded search is tried first, which
+    is all that is needed for most FlowFile or component lookups; windowing
+    only begins, from the oldest matching event, if that search was capped.
+
+    Args:
+        component_id (str): Only events generated by this component
+        flowfile_uuid (str): Only events for this FlowFile
+        attributes (dict): Further search terms, keyed by indexed attribute
+            name or searchable field id such as 'Filename'
+        event_type (str): Only events of this type, e.g. 'DROP'
+        start (datetime or int): Earliest event time, as a datetime (naive
+            values are taken as UTC) or epoch seconds
+        end (datetime or int): Latest event time, defaults to now
+        window (int): Initial window span in seconds
+        page_size (int): Most events requested per window
+        cluster_node_id (str): Only search this cluster node
+        max_wait (int): Seconds to wait for each window's query
+
+    Yields:
+        ProvenanceEventDTO
+
+    Example::
+
+        for event in nipyapi.provenance.iter_events(
+            component_id=proc.id, start=datetime(2024, 1, 1)
+        ):
+            print(event.event_time, event.event_type, event.flow_file_uuid)
+    """
+    assert isinstance(window, int) and window > 0
+    assert isinstance(page_size, int) and page_size > 0
+    terms = {
+        "component_id": component_id,
+        "flowfile_uuid": flowfile_uuid,
+        "attributes": attributes,
+        "event_type": event_type,
+        "cluster_node_id": cluster_node_id,
+    }
+    end = int(time.time()) if end is None else _epoch_seconds(end)
+    if start is None:
+        results = _run_query(terms, None, end, page_size, max_wait)
+        events = results.provenance_events or []
+        if (results.total_count or 0) <= len(events):
+            yield from sorted(events, key=lambda x: x.event_id)
+            return
+        start = _parse_date(results.oldest_event)
+        if start is None:
+            raise ValueError(
+                "Too many events to return in one search, and the oldest event time "
+                f"{results.oldest_event!r} could not be read; please supply start"
+            )
+    else:
+        start = _epoch_seconds(start)
+    if start > end:
+        raise ValueError("start must not be after end")
+
+    cursor = start
+    span = window
+    previous = set()
+    while True:
+        upper = min(cursor + span, end)
+        results = _run_query(terms, cursor, upper, page_size, max_wait)
+        events = results.provenance_events or []
+        if (results.total_count or 0) > len(events):
+            if upper - cursor > 1:
+                span = max((upper - cursor) // 2, 1)
+                continue
+            log.warning(
+                "More than %d events in one second at %s, only %d returned",
+                page_size,
+                _format_date(cursor),
+                len(events),
+            )
+        current = set()
+        for event in sorted(events, key=lambda x: x.event_id):
+            key = (event.cluster_node_id, event.event_id)
+            current.add(key)
+            if key not in previous:
+                yield event
+        previous = current
+        if upper >= end:
+            return
+        if len(events) < page_size // 2:
+            span *= 2
+        cursor = upper
+
+
+def export_events(output_file, **kwargs):
+    """
+    Writes matching provenance events to a newline delimited JSON file.
+
+    Events are streamed from :func:`iter_events` and written as they
+    arrive, so the export is not limited by NiFi's per query cap or held in
+    memory.
+
+    Args:
+        output_file (str): Path of the file to write
+        **kwargs: Search arguments passed to :func:`iter_events`
+
+    Returns:
+        (int): The number of events written
+
+    Example::
+
+        count = nipyapi.provenance.export_events(
+            "/tmp/drops.ndjson", event_type="DROP", start=datetime(2024, 1, 1)
+        )
+    """
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as handle:
+        for event in iter_events(**kwargs):
+            handle.write(json.dumps(event.to_dict(), default=str) + "\n")
+            count += 1
+    log.debug("Exported %d provenance events to %s", count, os.path.abspath(output_file))
+    return count
+
+
+def get_search_options():
+    """
+    Lists the fields that provenance searches can filter on.
+
+    Returns:
+        (list[ProvenanceSearchableFieldDTO]): Each has an 'id' usable as a
+        key in the attributes argument of the query functions
+    """
+    with nipyapi.utils.rest_exceptions():
+        return (
+            nipyapi.nifi.ProvenanceApi().get_search_options().provenance_options.searchable_fields
+        )
+
+
+class _ByteBudget:
+    """Blocks callers until their bytes fit within a shared limit"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        """Waits for room for size bytes; an oversized request runs alone"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.used == 0 or self.used + size <= self.limit)
+            self.used += size
+
+    def release(self, size):
+        """Returns size bytes to the budget"""
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+def _content_claim(event, direction):
+    """
+    Identifies the content claim behind an event's input or output content.
+
+    Returns:
+        tuple or None: container, section, identifier, offset and size, or
+        None if the content is not available
+    """
+    if not getattr(event, direction + "_content_available"):
+        return None
+    return tuple(
+        getattr(event, direction + "_content_claim_" + field)
+        for field in ("container", "section", "identifier", "offset", "file_size_bytes")
+    )
+
+
+def _download_content(event, direction, path, budget):
+    """Streams one event's content to path, returning the bytes written"""
+    size = getattr(event, direction + "_content_claim_file_size_bytes") or 0
+    api = nipyapi.nifi.ProvenanceEventsApi()
+    fetch = api.get_input_content if direction == "input" else api.get_output_content
+    budget.acquire(size)
+    try:
+        with nipyapi.utils.rest_exceptions():
+            response = fetch(
+                event.id, cluster_node_id=event.cluster_node_id, _preload_content=False
+            )
+        partial = path + ".part"
+        try:
+            with open(partial, "wb") as handle:
+                for chunk in response.stream(_CHUNK_SIZE):
+                    handle.write(chunk)
+        finally:
+            response.release_conn()
+        os.replace(partial, path)
+    finally:
+        budget.release(size)
+    return os.path.getsize(path)
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def download_contents(
+    events,
+    output_dir,
+    directions=("input", "output"),
+    max_workers=None,
+    max_bytes_in_flight=64 * 1024 * 1024,
+):
+    """
+    Downloads the content of many provenance events to disk concurrently.
+
+    Each content response is streamed to its file in chunks rather than read
+    into memory. Events often share content, for example a FlowFile's output
+    at one processor is its input at the next, so content is identified by
+    its repository claim and each distinct claim is downloaded once, to a
+    file named from the claim. Files already present from an earlier run are
+    not downloaded again.
+
+    Args:
+        events (iterable[ProvenanceEventDTO]): Events to fetch content for,
+            e.g. from query_events or iter_events
+        output_dir (str): Directory to write content files to, created if
+            missing
+        directions (tuple[str]): 'input', 'output' or both
+        max_workers (int): Concurrent downloads, defaults to
+            config.max_workers
+        max_bytes_in_flight (int): Downloads wait while the claimed sizes of
+            those already running would exceed this; a single larger
+            content is still downloaded, alone
+
+    Returns:
+        list[EventContent]: One entry per event and direction with content
+        available, in input order. Entries sharing a claim share a path.
+        Failed downloads have path None and the error message set.
+
+    Example::
+
+        events = nipyapi.provenance.query_events(component_id=proc.id)
+        for item in nipyapi.provenance.download_contents(events, "/tmp/triage"):
+            print(item.event_id, item.direction, item.path)
+    """
+    for direction in directions:
+        if direction not in ("input", "output"):
+            raise ValueError(f"direction must be 'input' or 'output', got: {direction!r}")
+    os.makedirs(output_dir, exist_ok=True)
+    wanted = []
+    claims = {}
+    for event in events:
+        for direction in directions:
+            claim = _content_claim(event, direction)
+            if claim is None:
+                continue
+            wanted.append((event, direction, claim))
+            if claim not in claims:
+                digest = hashlib.sha1(repr(claim).encode("utf-8")).hexdigest()
+                claims[claim] = (event, direction, os.path.join(output_dir, digest + ".content"))
+
+    budget = _ByteBudget(max_bytes_in_flight)
+    to_fetch = [x for x in claims.values() if not os.path.exists(x[2])]
+    fetched = nipyapi.utils.run_concurrently(
+        lambda x: _download_content(x[0], x[1], x[2], budget),
+        to_fetch,
+        max_workers=max_workers,
+        return_exceptions=True,
+    )
+    errors = {}
+    for (_, _, path), outcome in zip(to_fetch, fetched):
+        if isinstance(outcome, Exception):
+            log.warning("Could not download provenance content to %s: %s", path, outcome)
+            errors[path] = str(outcome)
+    log.debug(
+        "Downloaded %d of %d distinct contents for %d event contents",
+        len(to_fetch) - len(errors),
+        len(claims),
+        len(wanted),
+    )
+
+    out = []
+    for event, direction, claim in wanted:
+        path = claims[claim][2]
+        if path in errors:
+            out.append(EventContent(event.event_id, direction, None, None, errors[path]))
+        else:
+            out.append(EventContent(event.event_id, direction, path, os.path.getsize(path), None))
+    return out
+
+
+def replay_events(events, rate=None, predicate=None):
+    """
+    Replays provenance events, optionally filtered and rate limited.
+
+    Each replay re-enqueues the event's FlowFile content ahead of the
+    component that generated it. Events are replayed one at a time in input
+    order; events NiFi reports as not replayable are skipped and reported.
+
+    Args:
+        events (iterable[ProvenanceEventDTO]): Events to replay
+        rate (float): Most replays to submit per second, unlimited if None
+        predicate (callable): Only replay events for which this returns True
+
+    Returns:
+        list[ReplayResult]: One per event attempted, with the new replay
+        event on success or the reason on failure
+
+    Example::
+
+        drops = nipyapi.provenance.query_events(component_id=proc.id)
+        results = nipyapi.provenance.replay_events(
+            drops, rate=5, predicate=lambda x: x.event_type == "DROP"
+        )
+    """
+    assert rate is None or rate > 0
+    interval = 1.0 / rate if rate else 0.0
+    next_at = time.monotonic()
+    results = []
+    for event in events:
+        if predicate is not None and not predicate(event):
+            continue
+        if not event.replay_available:
+            reason = event.replay_explanation or "Replay not available"
+            results.append(ReplayResult(event.event_id, False, None, reason))
+            continue
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_at = time.monotonic() + interval
+        body = nipyapi.nifi.SubmitReplayRequestEntity(
+            event_id=event.event_id, cluster_node_id=event.cluster_node_id
+        )
+        try:
+            with nipyapi.utils.rest_exceptions():
+                replayed = nipyapi.nifi.ProvenanceEventsApi().submit_replay(body).provenance_event
+        except ValueError as e:
+            log.warning("Could not replay provenance event %s: %s", event.event_id, e)
+            results.append(ReplayResult(event.event_id, False, None, str(e)))
+            continue
+        results.append(ReplayResult(event.event_id, True, replayed, None))
+    return results
+
+
+def clear_lineage_cache(flowfile_uuid=None):
+    """
+    Discards cached lineage results, see get_lineage.
+
+    Args:
+        flowfile_uuid (str): Only discard the lineage of this FlowFile, or
+            None to clear all, including expansions
+    """
+    with _lineage_cache_lock:
+        if flowfile_uuid is None:
+            _lineage_cache.clear()
+            return
+        for key in [x for x in _lineage_cache if x[:2] == ("FLOWFILE", flowfile_uuid)]:
+            del _lineage_cache[key]
+
+
+def _lineage_results(request_type, target, cluster_node_id=None, max_wait=None, refresh=False):
+    """
+    Runs a lineage request to completion, or returns its cached results.
+
+    Args:
+        request_type (str): 'FLOWFILE', 'PARENTS' or 'CHILDREN'
+        target (str): FlowFile uuid for 'FLOWFILE', else the event id
+
+    Returns:
+        (LineageResultsDTO)
+    """
+    key = (request_type, target, cluster_node_id)
+    if not refresh:
+        with _lineage_cache_lock:
+            cached = _lineage_cache.get(key)
+        if cached is not None:
+            return cached
+    request = nipyapi.nifi.LineageRequestDTO(
+        lineage_request_type=request_type, cluster_node_id=cluster_node_id
+    )
+    if request_type == "FLOWFILE":
+        request.uuid = target
+    else:
+        request.event_id = int(target)
+    api = nipyapi.nifi.ProvenanceApi()
+    with nipyapi.utils.rest_exceptions():
+        lineage = api.submit_lineage_request(
+            nipyapi.nifi.LineageEntity(lineage=nipyapi.nifi.LineageDTO(request=request))
+        ).lineage
+
+    def _finished():
+        with nipyapi.utils.rest_exceptions():
+            current = api.get_lineage(lineage.id, cluster_node_id=cluster_node_id).lineage
+        return current if current.finished else False
+
+    try:
+        if not lineage.finished:
+            lineage = nipyapi.utils.wait_to_complete(
+                _finished,
+                nipyapi_delay=nipyapi.config.short_retry_delay / 5,
+                nipyapi_backoff=1.5,
+                nipyapi_max_delay=nipyapi.config.long_retry_delay,
+                nipyapi_max_wait=max_wait or nipyapi.config.long_max_wait,
+            )
+    finally:
+        try:
+            with nipyapi.utils.rest_exceptions():
+                api.delete_lineage(lineage.id, cluster_node_id=cluster_node_id)
+        except ValueError as e:
+            log.warning("Could not delete lineage query %s: %s", lineage.id, e)
+    results = lineage.results
+    if results.errors:
+        log.warning("Lineage query for %s reported errors: %s", target, results.errors)
+    else:
+        with _lineage_cache_lock:
+            _lineage_cache[key] = results
+    return results
+
+
+class LineageGraph:  # pylint: disable=too-many-instance-attributes
+    """
+    A provenance lineage DAG held in memory and grown on demand.
+
+    Nodes are ProvenanceNodeDTO keyed by id: the event id for 'EVENT' nodes
+    and the FlowFile uuid for 'FLOWFILE' nodes. Parent and child lookups are
+    indexed, and each expansion only adds the nodes and links not already
+    present. Create one with :func:`get_lineage`.
+
+    Attributes:
+        nodes (dict): Node id to ProvenanceNodeDTO
+        loaded_uuids (set): FlowFile uuids whose lineage has been fetched
+        cluster_node_id (str): Cluster node the lineage is fetched from
+    """
+
+    def __init__(self, cluster_node_id=None, max_wait=None):
+        self.nodes = {}
+        self.loaded_uuids = set()
+        self.cluster_node_id = cluster_node_id
+        self.max_wait = max_wait
+        self._children = {}
+        self._parents = {}
+        self._events = {}
+        self._expanded = set()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node_id):
+        return node_id in self.nodes
+
+    def add_results(self, results):
+        """
+        Merges lineage results into the graph.
+
+        Args:
+            results (LineageResultsDTO): Results of a lineage request
+
+        Returns:
+            (int): The number of nodes added
+        """
+        added = 0
+        for node in results.nodes or []:
+            if node.id in self.nodes:
+                continue
+            self.nodes[node.id] = node
+            self._children.setdefault(node.id, [])
+            self._parents.setdefault(node.id, [])
+            if node.type == "EVENT":
+                self._events.setdefault(node.flow_file_uuid, []).append(node.id)
+            added += 1
+        for link in results.links or []:
+            children = self._children.setdefault(link.source_id, [])
+            if link.target_id not in children:
+                children.append(link.target_id)
+                self._parents.setdefault(link.target_id, []).append(link.source_id)
+        return added
+
+    def children(self, node_id):
+        """Returns the ids of the nodes linked from node_id"""
+        return list(self._children.get(node_id, []))
+
+    def parents(self, node_id):
+        """Returns the ids of the nodes linked to node_id"""
+        return list(self._parents.get(node_id, []))
+
+    def events(self, flowfile_uuid):
+        """Returns the event nodes recorded for a FlowFile, oldest first"""
+        found = [self.nodes[x] for x in self._events.get(flowfile_uuid, [])]
+        return sorted(found, key=lambda x: x.millis or 0)
+
+    def _reach(self, node_id, step):
+        """Breadth first walk over the loaded graph from node_id"""
+        seen = {node_id}
+        queue = deque([node_id])
+        out = []
+        while queue:
+            for other in step(queue.popleft()):
+                if other not in seen:
+                    seen.add(other)
+                    out.append(other)
+                    queue.append(other)
+        return out
+
+    def descendants(self, node_id):
+        """Returns the ids of every loaded node downstream of node_id"""
+        return self._reach(node_id, lambda x: self._children.get(x, []))
+
+    def ancestors(self, node_id):
+        """Returns the ids of every loaded node upstream of node_id"""
+        return self._reach(node_id, lambda x: self._parents.get(x, []))
+
+    def pending(self, direction="children"):
+        """
+        Lists the events whose related FlowFiles have not been fetched yet.
+
+        Args:
+            direction (str): 'children' for forks and clones, or 'parents'
+                for joins
+
+        Returns:
+            list[str]: Event node ids that expand() would fetch for
+        """
+        attr = "child_uuids" if direction == "children" else "parent_uuids"
+        return [
+            node.id
+            for node in self.nodes.values()
+            if node.type == "EVENT"
+            and (node.id, direction) not in self._expanded
+            and set(getattr(node, attr) or []) - self.loaded_uuids
+        ]
+
+    def _merge_expansion(self, event_id, direction, results):
+        """Records a completed expansion and merges its results"""
+        self._expanded.add((event_id, direction))
+        attr = "child_uuids" if direction == "children" else "parent_uuids"
+        self.loaded_uuids.update(getattr(self.nodes[event_id], attr) or [])
+        return self.add_results(results)
+
+    def expand(self, event_id, direction="children"):
+        """
+        Fetches the lineage of an event's child or parent FlowFiles.
+
+        Args:
+            event_id (str): Id of an event node in the graph
+            direction (str): 'children' or 'parents'
+
+        Returns:
+            (int): The number of nodes added
+        """
+        if direction not in ("children", "parents"):
+            raise ValueError(f"direction must be 'children' or 'parents', got: {direction!r}")
+        if event_id not in self.nodes:
+            raise ValueError(f"Event {event_id} is not in the lineage graph")
+        if (event_id, direction) in self._expanded:
+            return 0
+        results = _lineage_results(direction.upper(), event_id, self.cluster_node_id, self.max_wait)
+        return self._merge_expansion(event_id, direction, results)
+
+    def expand_all(self, direction="children", max_depth=None, max_workers=None):
+        """
+        Expands every pending event, level by level, until none remain.
+
+        The expansions of each level are fetched concurrently, so a fan-out
+        of many clones costs one round of requests per level rather than one
+        request per hop in sequence.
+
+        Args:
+            direction (str): 'children' or 'parents'
+            max_depth (int): Most levels to expand, unlimited if None
+            max_workers (int): Concurrent lineage requests, defaults to
+                config.max_workers
+
+        Returns:
+            (int): The number of nodes added
+        """
+        if direction not in ("children", "parents"):
+            raise ValueError(f"direction must be 'children' or 'parents', got: {direction!r}")
+        added = 0
+        depth = 0
+        level = self.pending(direction)
+        while level and (max_depth is None or depth < max_depth):
+            fetched = nipyapi.utils.run_concurrently(
+                lambda x: _lineage_results(
+                    direction.upper(), x, self.cluster_node_id, self.max_wait
+                ),
+                level,
+                max_workers=max_workers,
+            )
+            for event_id, results in zip(level, fetched):
+                added += self._merge_expansion(event_id, direction, results)
+            depth += 1
+            level = self.pending(direction)
+        return added
+
+
+def get_lineage(flowfile_uuid, cluster_node_id=None, max_wait=None, refresh=False):
+    """
+    Builds the lineage graph of a FlowFile.
+
+    The lineage request is submitted, polled with an increasing delay, and
+    deleted once complete. Results are cached by FlowFile uuid for the
+    session, and expansions by event id, so repeat calls and expansions of
+    already seen events do not query NiFi again.
+
+    Args:
+        flowfile_uuid (str): The FlowFile to trace
+        cluster_node_id (str): Cluster node to query, if any
+        max_wait (int): Seconds to wait for each lineage request, defaults
+            to config.long_max_wait
+        refresh (bool): Ignore cached results for this FlowFile
+
+    Returns:
+        (LineageGraph): Expand it with expand() or expand_all()
+
+    Example::
+
+        graph = nipyapi.provenance.get_lineage(ff_uuid)
+        graph.expand_all("children")
+        for node_id in graph.descendants(ff_uuid):
+            print(graph.nodes[node_id].event_type)
+    """
+    graph = LineageGraph(cluster_node_id, max_wait)
+    graph.add_results(
+        _lineage_results("FLOWFILE", flowfile_uuid, cluster_node_id, max_wait, refresh)
+    )
+    graph.loaded_uuids.add(flowfile_uuid)
+    return graph
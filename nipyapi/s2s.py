@@ -0,0 +1,525 @@
+"""
+For sending and receiving FlowFiles through NiFi's HTTP site-to-site protocol.
+
+FlowFiles are exchanged with public input and output ports in transactions:
+a transaction is created on a peer, a batch of FlowFiles is streamed in one
+request, both sides compare a CRC32 checksum of the bytes exchanged, and the
+transaction is then committed. Nothing is committed on either side unless
+the checksums match.
+
+Transactions are spread across the cluster's peers by their reported queue
+sizes, each peer has its own connection pool, and open transactions have
+their time to live extended in the background while a batch is in progress.
+"""
+
+import logging
+import struct
+import threading
+import zlib
+from collections import namedtuple
+
+import nipyapi
+
+__all__ = [
+    "get_peers",
+    "send_flowfiles",
+    "receive_flowfiles",
+    "clear_peer_clients",
+    "DataPacket",
+    "Peer",
+    "TransferResult",
+    "TransferError",
+]
+
+log = logging.getLogger(__name__)
+
+# Named tuple for a FlowFile in transit, content is bytes-like
+DataPacket = namedtuple("DataPacket", ["attributes", "content"])
+
+# Named tuple for a site-to-site peer, url is its nifi-api base
+Peer = namedtuple("Peer", ["url", "hostname", "port", "secure", "flow_file_count"])
+
+# Named tuple for one committed transaction
+TransferResult = namedtuple(
+    "TransferResult", ["peer", "transaction_id", "flow_files", "bytes", "checksum"]
+)
+
+
+class TransferError(ValueError):
+    """
+    Raised when some batches of a send fail.
+
+    Attributes:
+        results (list[TransferResult]): Transactions that were committed
+            before or alongside the failures, in batch order; their
+            FlowFiles were accepted by NiFi and must not be sent again
+        errors (list[Exception]): The error of each failed batch
+    """
+
+    def __init__(self, message, results, errors):
+        super().__init__(message)
+        self.results = results
+        self.errors = errors
+
+
+# Site-to-site HTTP headers
+_PROTOCOL_VERSION_HEADER = "x-nifi-site-to-site-protocol-version"
+_PROTOCOL_VERSION = "1"
+_TTL_HEADER = "x-nifi-site-to-site-server-transaction-ttl"
+
+# Site-to-site response codes used when committing transactions
+_CONFIRM_TRANSACTION = 12
+_TRANSACTION_FINISHED = 13
+_CANCEL_TRANSACTION = 15
+_BAD_CHECKSUM = 19
+
+# Default transaction time to live in seconds, if the server does not say
+_DEFAULT_TTL = 30
+
+# ApiClient per peer url, each with its own connection pool
+_peer_clients = {}
+_peer_clients_lock = threading.Lock()
+
+
+def clear_peer_clients():
+    """Discards the per peer API clients and their connection pools"""
+    with _peer_clients_lock:
+        _peer_clients.clear()
+
+
+def _peer_client(url):
+    """Returns the ApiClient for a peer, creating it on first use"""
+    with _peer_clients_lock:
+        client = _peer_clients.get(url)
+        if client is None:
+            client = nipyapi.nifi.ApiClient(host=url.rstrip("/"))
+            client.rest_client = nipyapi.nifi.rest.RESTClientObject(
+                maxsize=max(nipyapi.config.max_workers, 4)
+            )
+            client.set_default_header(_PROTOCOL_VERSION_HEADER, _PROTOCOL_VERSION)
+            _peer_clients[url] = client
+    return client
+
+
+def get_peers():
+    """
+    Lists the site-to-site peers of the connected NiFi.
+
+    Returns:
+        list[Peer]: One per node, with its nifi-api url and the number of
+        FlowFiles it reports as queued
+    """
+    client = _peer_client(nipyapi.config.nifi_config.host)
+    with nipyapi.utils.rest_exceptions():
+        peers = nipyapi.nifi.SiteToSiteApi(client).get_peers().peers or []
+    return [
+        Peer(
+            url="{}://{}:{}/nifi-api".format("https" if x.secure else "http", x.hostname, x.port),
+            hostname=x.hostname,
+            port=x.port,
+            secure=x.secure,
+            flow_file_count=x.flow_file_count or 0,
+        )
+        for x in peers
+    ]
+
+
+def _encode_packet(packet):
+    """
+    Frames one FlowFile in the site-to-site data packet format.
+
+    Returns:
+        list: bytes-like parts, the content as a view of the caller's buffer
+    """
+    attributes, content = packet
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    parts = [struct.pack(">i", len(attributes))]
+    for key, value in attributes.items():
+        for text in (key, value):
+            encoded = str(text).encode("utf-8")
+            parts.append(struct.pack(">i", len(encoded)))
+            parts.append(encoded)
+    content = memoryview(content)
+    parts.append(struct.pack(">q", content.nbytes))
+    parts.append(content)
+    return parts
+
+
+def _read_exact(stream, size, state):
+    """Reads exactly size bytes, updating the running checksum in state"""
+    if not size:
+        return b""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ValueError("Site-to-site stream ended part way through a FlowFile")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    state["checksum"] = zlib.crc32(data, state["checksum"])
+    state["bytes"] += size
+    return data
+
+
+def _read_field(stream, size, state):
+    """Reads exactly size bytes that must be present"""
+    data = _read_exact(stream, size, state)
+    if data is None:
+        raise ValueError("Site-to-site stream ended part way through a FlowFile")
+    return data
+
+
+def _read_string(stream, state):
+    """Reads a length prefixed UTF-8 string"""
+    size = struct.unpack(">i", _read_field(stream, 4, state))[0]
+    return _read_field(stream, size, state).decode("utf-8")
+
+
+def _decode_packets(stream, state):
+    """Yields DataPackets from a site-to-site data packet stream"""
+    while True:
+        header = _read_exact(stream, 4, state)
+        if header is None:
+            return
+        attributes = {}
+        for _ in range(struct.unpack(">i", header)[0]):
+            key = _read_string(stream, state)
+            attributes[key] = _read_string(stream, state)
+        size = struct.unpack(">q", _read_field(stream, 8, state))[0]
+        yield DataPacket(attributes, _read_field(stream, size, state))
+
+
+def _keep_alive(extend, ttl):
+    """
+    Extends a transaction's time to live in the background, every half TTL.
+
+    Returns:
+        callable: stops extending the transaction and waits for the thread
+    """
+    stopped = threading.Event()
+
+    def _run():
+        while not stopped.wait(max(ttl / 2.0, 1.0)):
+            try:
+                with nipyapi.utils.rest_exceptions():
+                    extend()
+            except ValueError as e:
+                log.warning("Could not extend site-to-site transaction: %s", e)
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+
+    def _stop():
+        stopped.set()
+        thread.join()
+
+    return _stop
+
+
+def _create_transaction(api, port_type, port_id):
+    """
+    Creates a transaction on a peer's port.
+
+    Returns:
+        tuple(str, int): the transaction id and its time to live in seconds
+    """
+    with nipyapi.utils.rest_exceptions():
+        _, _, headers = api.create_port_transaction_with_http_info(port_type, port_id)
+    location = headers.get("Location")
+    if not location:
+        raise ValueError(f"Peer did not return a transaction location for port {port_id}")
+    ttl = headers.get(_TTL_HEADER)
+    return location.rstrip("/").rsplit("/", 1)[-1], int(ttl) if ttl else _DEFAULT_TTL
+
+
+def _cancel_transaction(api, port_type, port_id, transaction_id):
+    """Cancels a transaction, ignoring failures as the server expires it anyway"""
+    try:
+        with nipyapi.utils.rest_exceptions():
+            if port_type == "input-ports":
+                api.commit_input_port_transaction(_CANCEL_TRANSACTION, port_id, transaction_id)
+            else:
+                api.commit_output_port_transaction(_CANCEL_TRANSACTION, 0, port_id, transaction_id)
+    except ValueError as e:
+        log.debug("Could not cancel site-to-site transaction %s: %s", transaction_id, e)
+
+
+def _send_batch(peer, port_id, batch):
+    """Sends one batch of DataPackets in a single transaction"""
+    api = nipyapi.nifi.DataTransferApi(_peer_client(peer.url))
+    parts = [x for packet in batch for x in _encode_packet(packet)]
+    # The generated client sends bytes bodies only, so the batch is copied
+    # once into a single request body, which batch_bytes keeps bounded
+    body = b"".join(parts)
+    checksum = zlib.crc32(body)
+    transaction_id, ttl = _create_transaction(api, "input-ports", port_id)
+    stop_keep_alive = _keep_alive(
+        lambda: api.extend_input_port_transaction_ttl(port_id, transaction_id), ttl
+    )
+    committed = False
+    try:
+        with nipyapi.utils.rest_exceptions():
+            response = api.receive_flow_files(
+                port_id, transaction_id, body=body, _preload_content=False
+            )
+        server_checksum = int(response.data.decode("utf-8").strip())
+        if server_checksum != checksum:
+            with nipyapi.utils.rest_exceptions():
+                api.commit_input_port_transaction(_BAD_CHECKSUM, port_id, transaction_id)
+            committed = True
+            raise ValueError(
+                f"Checksum mismatch sending to {peer.url}: sent {checksum}, "
+                f"peer received {server_checksum}"
+            )
+        with nipyapi.utils.rest_exceptions():
+            result = api.commit_input_port_transaction(
+                _CONFIRM_TRANSACTION, port_id, transaction_id
+            )
+        committed = True
+        if result.response_code != _TRANSACTION_FINISHED:
+            raise ValueError(
+                f"Transaction {transaction_id} on {peer.url} was not committed: "
+                f"{result.response_code} {result.message}"
+            )
+    finally:
+        stop_keep_alive()
+        if not committed:
+            _cancel_transaction(api, "input-ports", port_id, transaction_id)
+    return TransferResult(peer.url, transaction_id, len(batch), len(body), checksum)
+
+
+def _port_id(port):
+    """Returns the id of a port given as an entity or id string"""
+    if isinstance(port, str):
+        return port
+    if hasattr(port, "id"):
+        return port.id
+    raise TypeError(f"port must be a PortEntity or id string, got {type(port).__name__}")
+
+
+def _as_packet(item):
+    """
+    Normalises a DataPacket, (attributes, content) pair, or bare content.
+
+    str content is encoded as UTF-8 here, so that its size is counted in
+    bytes.
+    """
+    if isinstance(item, (bytes, bytearray, memoryview, str)):
+        attributes, content = {}, item
+    else:
+        attributes, content = item
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return DataPacket(dict(attributes or {}), content)
+
+
+def _batches(flowfiles, batch_size, batch_bytes):
+    """Groups FlowFiles into batches bounded by count and content size"""
+    batch = []
+    size = 0
+    for item in flowfiles:
+        packet = _as_packet(item)
+        batch.append(packet)
+        size += memoryview(packet.content).nbytes
+        if len(batch) >= batch_size or size >= batch_bytes:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+def send_flowfiles(
+    port,
+    flowfiles,
+    batch_size=500,
+    batch_bytes=16 * 1024 * 1024,
+    max_workers=None,
+    peers=None,
+):
+    """
+    Sends FlowFiles to a public input port over HTTP site-to-site.
+
+    FlowFiles are grouped into batches, and each batch is sent in its own
+    transaction with one request, verified by checksum and committed. Each
+    batch goes to the peer expected to have the fewest FlowFiles queued,
+    starting from the counts the peers report and adding the batches already
+    assigned. Up to max_workers batches are in flight at once, each peer
+    reusing its own pooled connections.
+
+    Args:
+        port (PortEntity or str): The public input port, or its id
+        flowfiles (iterable): DataPackets, (attributes dict, content) pairs,
+            or bare content; content may be bytes, bytearray, memoryview or
+            str. Consumed lazily, one round of batches at a time
+        batch_size (int): Most FlowFiles per transaction
+        batch_bytes (int): A batch is closed once its content reaches this
+        max_workers (int): Concurrent transactions, defaults to
+            config.max_workers
+        peers (list[Peer]): Peers to use, defaults to get_peers()
+
+    Returns:
+        list[TransferResult]: One per committed transaction, in batch order
+
+    Raises:
+        TransferError: If any batch fails. No further batches are sent, and
+            its results list every transaction that was committed, so that
+            a retry can skip the FlowFiles NiFi already accepted
+
+    Example::
+
+        results = nipyapi.s2s.send_flowfiles(
+            port,
+            (({"filename": f"{i}.txt"}, b"hello") for i in range(10000)),
+        )
+        print(sum(x.flow_files for x in results))
+    """
+    port_id = _port_id(port)
+    peers = peers or get_peers()
+    if not peers:
+        raise ValueError("No site-to-site peers are available")
+    queued = {x.url: x.flow_file_count for x in peers}
+    by_url = {x.url: x for x in peers}
+    workers = max_workers or nipyapi.config.max_workers
+    results = []
+    pending = []
+
+    def _flush():
+        sent = nipyapi.utils.run_concurrently(
+            lambda x: _send_batch(x[0], port_id, x[1]),
+            pending,
+            max_workers=workers,
+            return_exceptions=True,
+        )
+        pending.clear()
+        errors = [x for x in sent if isinstance(x, Exception)]
+        results.extend(x for x in sent if not isinstance(x, Exception))
+        if errors:
+            raise TransferError(
+                f"{len(errors)} site-to-site batches to port {port_id} failed, "
+                f"{len(results)} were committed: {errors[0]}",
+                results,
+                errors,
+            )
+
+    for batch in _batches(flowfiles, batch_size, batch_bytes):
+        url = min(queued, key=queued.get)
+        queued[url] += len(batch)
+        pending.append((by_url[url], batch))
+        if len(pending) >= workers:
+            _flush()
+    if pending:
+        _flush()
+    log.debug(
+        "Sent %d FlowFiles to port %s in %d transactions",
+        sum(x.flow_files for x in results),
+        port_id,
+        len(results),
+    )
+    return results
+
+
+def _receive_transaction(peer, port_id):
+    """
+    Receives one transaction's FlowFiles from an output port.
+
+    Yields DataPackets as they are read, and commits once the stream is
+    exhausted. If the consumer stops early the transaction is cancelled, and
+    NiFi keeps the FlowFiles queued.
+    """
+    api = nipyapi.nifi.DataTransferApi(_peer_client(peer.url))
+    transaction_id, ttl = _create_transaction(api, "output-ports", port_id)
+    stop_keep_alive = _keep_alive(
+        lambda: api.extend_output_port_transaction_ttl(port_id, transaction_id), ttl
+    )
+    committed = False
+    response = None
+    try:
+        with nipyapi.utils.rest_exceptions():
+            response = api.transfer_flow_files(port_id, transaction_id, _preload_content=False)
+        if response.status != 202:
+            # 200 means the port had nothing to send
+            return
+        state = {"checksum": 0, "bytes": 0}
+        count = 0
+        for packet in _decode_packets(response, state):
+            count += 1
+            yield packet
+        with nipyapi.utils.rest_exceptions():
+            result = api.commit_output_port_transaction(
+                _CONFIRM_TRANSACTION, state["checksum"], port_id, transaction_id
+            )
+        committed = True
+        # Output port commits are confirmed with CONFIRM_TRANSACTION, unlike
+        # input ports which finish with TRANSACTION_FINISHED
+        if result.response_code == _BAD_CHECKSUM:
+            raise ValueError(
+                f"Checksum mismatch receiving from {peer.url}: transaction "
+                f"{transaction_id} was rejected, its FlowFiles stay queued"
+            )
+        if result.response_code != _CONFIRM_TRANSACTION:
+            raise ValueError(
+                f"Transaction {transaction_id} on {peer.url} was not committed: "
+                f"{result.response_code} {result.message}"
+            )
+        log.debug("Received %d FlowFiles, %d bytes, from %s", count, state["bytes"], peer.url)
+    finally:
+        stop_keep_alive()
+        if response is not None:
+            response.release_conn()
+        if not committed:
+            _cancel_transaction(api, "output-ports", port_id, transaction_id)
+
+
+def receive_flowfiles(port, max_transactions=None, peers=None):
+    """
+    Receives FlowFiles from a public output port over HTTP site-to-site.
+
+    Transactions are opened one after another, each on the peer expected to
+    have the most FlowFiles queued, until every peer has returned an empty
+    transaction or max_transactions is reached. Each transaction's stream is read
+    incrementally and committed, after checksum verification, only once all
+    of its FlowFiles have been yielded; stopping iteration early cancels the
+    open transaction so its FlowFiles stay queued in NiFi.
+
+    Args:
+        port (PortEntity or str): The public output port, or its id
+        max_transactions (int): Most transactions to open, unlimited if None
+        peers (list[Peer]): Peers to use, defaults to get_peers()
+
+    Yields:
+        DataPacket: attributes dict and content bytes
+
+    Example::
+
+        for packet in nipyapi.s2s.receive_flowfiles(port, max_transactions=10):
+            print(packet.attributes.get("filename"), len(packet.content))
+    """
+    port_id = _port_id(port)
+    peers = peers or get_peers()
+    if not peers:
+        raise ValueError("No site-to-site peers are available")
+    queued = {x.url: x.flow_file_count for x in peers}
+    by_url = {x.url: x for x in peers}
+    exhausted = set()
+    transactions = 0
+    while max_transactions is None or transactions < max_transactions:
+        candidates = {k: v for k, v in queued.items() if k not in exhausted}
+        if not candidates:
+            return
+        url = max(candidates, key=candidates.get)
+        received = 0
+        for packet in _receive_transaction(by_url[url], port_id):
+            received += 1
+            yield packet
+        transactions += 1
+        if received:
+            queued[url] = max(queued[url] - received, 0)
+        else:
+            exhausted.add(url)
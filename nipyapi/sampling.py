@@ -0,0 +1,551 @@
+"""
+For sampling NiFi component status into a local time-series store.
+
+A :class:`StatusSampler` runs in a background thread, fetching recursive
+process group status at a fixed interval and recording process group, and
+optionally processor and connection, figures in a :class:`StatusStore`, a
+single SQLite file. Rows are only written when a component's figures change,
+with a full keyframe every so often, so idle components cost almost nothing
+to keep. Old samples are folded into coarser buckets, each the time
+weighted average of the figures held during it, and eventually dropped.
+
+NiFi reports In, Out, Read and Written as totals over a rolling five minute
+window, so per-second rates are those totals divided by the window length;
+:meth:`StatusStore.rates` does this for a component over time.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import nipyapi
+
+__all__ = [
+    "StatusStore",
+    "StatusSampler",
+    "sample_status",
+    "StatusSample",
+    "RatePoint",
+    "SAMPLE_FIELDS",
+    "SAMPLE_KINDS",
+]
+
+log = logging.getLogger(__name__)
+
+# Figures recorded per component and sample, None where a kind has no such figure
+SAMPLE_FIELDS = [
+    "flowfiles_in",
+    "bytes_in",
+    "flowfiles_out",
+    "bytes_out",
+    "flowfiles_queued",
+    "bytes_queued",
+    "active_threads",
+]
+
+# Component kinds mapped to their key in a status snapshot
+SAMPLE_KINDS = {
+    "process_group": "processGroupStatusSnapshots",
+    "processor": "processorStatusSnapshots",
+    "connection": "connectionStatusSnapshots",
+}
+
+# Named tuple for one stored sample of one component
+StatusSample = namedtuple(
+    "StatusSample", ["timestamp", "component_id", "resolution"] + SAMPLE_FIELDS
+)
+
+# Named tuple for per-second rates of one component at one time
+RatePoint = namedtuple(
+    "RatePoint", ["timestamp", "flowfiles_in", "bytes_in", "flowfiles_out", "bytes_out"]
+)
+
+# Seconds covered by NiFi's In and Out status figures
+_STATUS_WINDOW = 300
+
+# Snapshot JSON keys for each of SAMPLE_FIELDS
+_JSON_FIELDS = [
+    "flowFilesIn",
+    "bytesIn",
+    "flowFilesOut",
+    "bytesOut",
+    "flowFilesQueued",
+    "bytesQueued",
+    "activeThreadCount",
+]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS components ("
+    "component_id TEXT PRIMARY KEY, kind TEXT, name TEXT, group_id TEXT)",
+    "CREATE TABLE IF NOT EXISTS samples ("
+    "timestamp INTEGER, component_id TEXT, resolution INTEGER, "
+    + ", ".join(f"{x} INTEGER" for x in SAMPLE_FIELDS)
+    + ", PRIMARY KEY (component_id, resolution, timestamp)) WITHOUT ROWID",
+]
+
+
+def _epoch_millis(value):
+    """Converts a datetime, naive meaning UTC, or epoch seconds to epoch millis"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)):
+        return int(value * 1000)
+    raise TypeError(f"Expected datetime or epoch seconds, got {type(value).__name__}")
+
+
+def _fold_rows(rows, hold_until, bucket):
+    """
+    Time-weights a component's full resolution rows into buckets.
+
+    Args:
+        rows (list): (timestamp, values) in timestamp order, values following
+            SAMPLE_FIELDS
+        hold_until (int): Epoch millis the last row holds until, or None to
+            hold it only to the end of its bucket
+        bucket (int): Bucket size in milliseconds
+
+    Returns:
+        dict: bucket start to a tuple of averaged values following
+        SAMPLE_FIELDS, None where no figure was held
+    """
+    totals = {}
+    for position, (start, values) in enumerate(rows):
+        if position + 1 < len(rows):
+            end = rows[position + 1][0]
+        elif hold_until is not None:
+            end = hold_until
+        else:
+            end = start // bucket * bucket + bucket
+        while start < end:
+            bucket_start = start // bucket * bucket
+            segment_end = min(end, bucket_start + bucket)
+            weight = segment_end - start
+            sums = totals.setdefault(bucket_start, [[0, 0] for _ in SAMPLE_FIELDS])
+            for total, value in zip(sums, values):
+                if value is not None:
+                    total[0] += value * weight
+                    total[1] += weight
+            start = segment_end
+    return {
+        key: tuple(round(x / w) if w else None for x, w in sums) for key, sums in totals.items()
+    }
+
+
+def _walk_status(snapshot, kinds, parent_id=None):
+    """
+    Yields (kind, component_id, name, group_id, values) for a group snapshot
+    and everything beneath it, limited to the requested kinds.
+    """
+    if "process_group" in kinds:
+        yield (
+            "process_group",
+            snapshot["id"],
+            snapshot.get("name"),
+            parent_id,
+            tuple(snapshot.get(x) for x in _JSON_FIELDS),
+        )
+    for kind in ("processor", "connection"):
+        if kind not in kinds:
+            continue
+        inner = kind + "StatusSnapshot"
+        for entity in snapshot.get(SAMPLE_KINDS[kind]) or []:
+            child = entity.get(inner) or {}
+            yield (
+                kind,
+                entity["id"],
+                child.get("name"),
+                snapshot["id"],
+                tuple(child.get(x) for x in _JSON_FIELDS),
+            )
+    for entity in snapshot.get(SAMPLE_KINDS["process_group"]) or []:
+        yield from _walk_status(entity["processGroupStatusSnapshot"], kinds, snapshot["id"])
+
+
+def sample_status(pg_id="root", kinds=("process_group",)):
+    """
+    Takes one status sample of a process group and all groups beneath it.
+
+    The status is fetched in a single request and parsed from the raw JSON,
+    keeping the per-sample cost low on large flows.
+
+    Args:
+        pg_id (str): The process group to sample, defaults to the root group
+        kinds (iterable): Any of SAMPLE_KINDS to include
+
+    Returns:
+        list[tuple]: (kind, component_id, name, group_id, values) per
+        component, where values follow SAMPLE_FIELDS
+    """
+    unknown = set(kinds) - set(SAMPLE_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown kinds {sorted(unknown)}, expected any of {list(SAMPLE_KINDS)}")
+    with nipyapi.utils.rest_exceptions():
+        response = nipyapi.nifi.FlowApi().get_process_group_status(
+            pg_id, recursive=True, _preload_content=False
+        )
+    snapshot = json.loads(response.data)["processGroupStatus"]["aggregateSnapshot"]
+    return list(_walk_status(snapshot, set(kinds)))
+
+
+class StatusStore:
+    """
+    A compact SQLite store of component status samples.
+
+    Samples are kept at full resolution for downsample_after seconds, then
+    folded into buckets of resolution seconds, and deleted entirely after
+    retention seconds. Each stored figure is taken to hold until the
+    component's next row, so a bucket is the average weighted by how long
+    each figure held, including figures carried in from earlier rows. Call
+    housekeep() to apply this; a StatusSampler does so periodically. The
+    store may be shared between a sampler thread and readers.
+
+    Args:
+        path (str): SQLite file to create or open, or ':memory:'
+        retention (int): Seconds to keep any sample
+        downsample_after (int): Seconds to keep full resolution samples
+        resolution (int): Bucket size in seconds for older samples
+
+    Example::
+
+        store = nipyapi.sampling.StatusStore("/var/lib/nifi-status.db")
+        for point in store.rates(pg_id, start=time.time() - 3600):
+            print(point.timestamp, point.flowfiles_out, point.bytes_out)
+    """
+
+    def __init__(self, path, retention=7 * 86400, downsample_after=86400, resolution=300):
+        assert 0 < resolution <= downsample_after <= retention
+        self.path = path
+        self.retention = retention
+        self.downsample_after = downsample_after
+        self.resolution = resolution
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def close(self):
+        """Closes the underlying database"""
+        with self._lock:
+            self._db.close()
+
+    def write(self, timestamp, rows, components=None):
+        """
+        Records samples taken at one time.
+
+        Args:
+            timestamp (int): Epoch milliseconds of the sample
+            rows (iterable): (component_id, values) pairs, values following
+                SAMPLE_FIELDS
+            components (iterable): (component_id, kind, name, group_id) to
+                record or update
+
+        Returns:
+            (int): The number of rows written
+        """
+        rows = [(timestamp, x, 0) + tuple(values) for x, values in rows]
+        placeholders = ", ".join("?" * (3 + len(SAMPLE_FIELDS)))
+        with self._lock:
+            with self._db:
+                if components:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO components VALUES (?, ?, ?, ?)", components
+                    )
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO samples VALUES ({placeholders})", rows
+                )
+        return len(rows)
+
+    def housekeep(self, now=None):
+        """
+        Downsamples and deletes old samples according to the store's policy.
+
+        Args:
+            now (int): Epoch milliseconds to treat as the current time
+
+        Returns:
+            (tuple): Counts of (downsampled, deleted) full resolution and
+            expired rows
+        """
+        now = now if now is not None else int(time.time() * 1000)
+        bucket = self.resolution * 1000
+        # Only whole buckets are folded, so a bucket is never averaged twice
+        cutoff = (now - self.downsample_after * 1000) // bucket * bucket
+        with self._lock:
+            with self._db:
+                folded = 0
+                for (component_id,) in self._db.execute(
+                    "SELECT DISTINCT component_id FROM samples "
+                    "WHERE resolution = 0 AND timestamp < ?",
+                    (cutoff,),
+                ).fetchall():
+                    folded += self._fold(component_id, cutoff, bucket)
+                expired = self._db.execute(
+                    "DELETE FROM samples WHERE timestamp < ?", (now - self.retention * 1000,)
+                ).rowcount
+                self._db.execute(
+                    "DELETE FROM components WHERE component_id NOT IN "
+                    "(SELECT DISTINCT component_id FROM samples)"
+                )
+        return folded, expired
+
+    def _fold(self, component_id, cutoff, bucket):
+        """Folds one component's full resolution rows before cutoff into buckets"""
+        rows = [
+            (x[0], x[1:])
+            for x in self._db.execute(
+                f"SELECT timestamp, {', '.join(SAMPLE_FIELDS)} FROM samples "
+                "WHERE component_id = ? AND resolution = 0 AND timestamp < ? "
+                "ORDER BY timestamp",
+                (component_id, cutoff),
+            )
+        ]
+        following = self._db.execute(
+            "SELECT timestamp FROM samples WHERE component_id = ? AND resolution = 0 "
+            "AND timestamp >= ? ORDER BY timestamp LIMIT 1",
+            (component_id, cutoff),
+        ).fetchone()
+        # A component still being sampled held its last figures up to the cutoff
+        buckets = _fold_rows(rows, cutoff if following else None, bucket)
+        placeholders = ", ".join("?" * (3 + len(SAMPLE_FIELDS)))
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO samples VALUES ({placeholders})",
+            [(key, component_id, self.resolution) + values for key, values in buckets.items()],
+        )
+        self._db.execute(
+            "DELETE FROM samples WHERE component_id = ? AND resolution = 0 AND timestamp < ?",
+            (component_id, cutoff),
+        )
+        if following and following[0] > cutoff:
+            # Keep the held figures for the stretch before the next stored row
+            self._db.execute(
+                f"INSERT INTO samples VALUES ({placeholders})",
+                (cutoff, component_id, 0) + rows[-1][1],
+            )
+        return len(rows)
+
+    def components(self, kind=None):
+        """
+        Lists the components with stored samples.
+
+        Args:
+            kind (str): Only components of this kind
+
+        Returns:
+            list[tuple]: (component_id, kind, name, group_id)
+        """
+        query = "SELECT component_id, kind, name, group_id FROM components"
+        args = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            args = (kind,)
+        with self._lock:
+            return self._db.execute(query + " ORDER BY kind, name", args).fetchall()
+
+    def samples(self, component_id, start=None, end=None):
+        """
+        Returns a component's stored samples, oldest first.
+
+        Unchanged figures are not stored, so each sample holds until the
+        next; downsampled buckets carry their resolution in seconds, full
+        resolution samples a resolution of 0.
+
+        Args:
+            component_id (str): The component to read
+            start (datetime or float): Earliest time, as datetime or epoch
+                seconds
+            end (datetime or float): Latest time
+
+        Returns:
+            list[StatusSample]
+        """
+        query = "SELECT * FROM samples WHERE component_id = ?"
+        args = [component_id]
+        if start is not None:
+            query += " AND timestamp >= ?"
+            args.append(_epoch_millis(start))
+        if end is not None:
+            query += " AND timestamp <= ?"
+            args.append(_epoch_millis(end))
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY timestamp", args).fetchall()
+        return [StatusSample(*x) for x in rows]
+
+    def rates(self, component_id, start=None, end=None):
+        """
+        Returns a component's In and Out rates per second over time.
+
+        Args:
+            component_id (str): The component to read
+            start (datetime or float): Earliest time
+            end (datetime or float): Latest time
+
+        Returns:
+            list[RatePoint]: Rates averaged over NiFi's five minute window
+            ending at each sample, None where the kind reports no such figure
+        """
+
+        def _rate(value):
+            return None if value is None else value / _STATUS_WINDOW
+
+        return [
+            RatePoint(
+                x.timestamp,
+                _rate(x.flowfiles_in),
+                _rate(x.bytes_in),
+                _rate(x.flowfiles_out),
+                _rate(x.bytes_out),
+            )
+            for x in self.samples(component_id, start, end)
+        ]
+
+
+# pylint: disable=too-many-instance-attributes
+class StatusSampler:
+    """
+    Samples component status into a StatusStore from a background thread.
+
+    Each sample is one recursive status request. The time taken is measured
+    and, if it exceeds max_overhead of the interval, the interval is
+    stretched so that sampling never occupies more than that share of the
+    time, however large the flow. Counters describing the sampler's own cost
+    are kept in stats.
+
+    Args:
+        store (StatusStore): Where to record samples
+        pg_id (str): Process group to sample, defaults to the root group
+        interval (float): Seconds between samples
+        kinds (iterable): Any of SAMPLE_KINDS to record
+        max_overhead (float): Largest fraction of wall time to spend sampling
+        keyframe_every (int): Write every component's figures every this
+            many samples, even if unchanged
+
+    Example::
+
+        store = nipyapi.sampling.StatusStore("/var/lib/nifi-status.db")
+        with nipyapi.sampling.StatusSampler(store, interval=30, kinds=["processor"]):
+            time.sleep(3600)
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        store,
+        pg_id="root",
+        interval=60,
+        kinds=("process_group",),
+        max_overhead=0.05,
+        keyframe_every=60,
+    ):
+        assert interval > 0 and 0 < max_overhead <= 1
+        self.store = store
+        self.pg_id = pg_id
+        self.interval = interval
+        self.kinds = tuple(kinds)
+        self.max_overhead = max_overhead
+        self.keyframe_every = keyframe_every
+        self.stats = {
+            "samples": 0,
+            "errors": 0,
+            "rows_written": 0,
+            "rows_unchanged": 0,
+            "last_duration": 0.0,
+            "total_duration": 0.0,
+            "cpu_seconds": 0.0,
+            "effective_interval": interval,
+        }
+        self._last = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_housekeeping = 0.0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        """Whether the background thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def sample_once(self):
+        """
+        Takes and stores one sample in the calling thread.
+
+        Returns:
+            (int): The number of rows written
+        """
+        timestamp = int(time.time() * 1000)
+        sampled = sample_status(self.pg_id, self.kinds)
+        keyframe = self.stats["samples"] % self.keyframe_every == 0
+        rows, components = [], []
+        for kind, component_id, name, group_id, values in sampled:
+            previous = self._last.get(component_id)
+            if keyframe or previous is None:
+                components.append((component_id, kind, name, group_id))
+            if keyframe or previous != values:
+                rows.append((component_id, values))
+            self._last[component_id] = values
+        written = self.store.write(timestamp, rows, components)
+        self.stats["samples"] += 1
+        self.stats["rows_written"] += written
+        self.stats["rows_unchanged"] += len(sampled) - written
+        return written
+
+    def _run(self):
+        """Sampling loop for the background thread"""
+        while not self._stop.is_set():
+            started, cpu_started = time.monotonic(), time.thread_time()
+            try:
+                self.sample_once()
+                if started - self._last_housekeeping >= self.store.resolution:
+                    self.store.housekeep()
+                    self._last_housekeeping = started
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                self.stats["errors"] += 1
+                log.warning("Status sample failed: %s", e)
+            duration = time.monotonic() - started
+            self.stats["last_duration"] = duration
+            self.stats["total_duration"] += duration
+            self.stats["cpu_seconds"] += time.thread_time() - cpu_started
+            interval = max(self.interval, duration / self.max_overhead)
+            self.stats["effective_interval"] = interval
+            self._stop.wait(interval - duration)
+
+    def start(self):
+        """
+        Starts sampling in a daemon thread.
+
+        Returns:
+            (StatusSampler): self, for chaining
+        """
+        if self.running:
+            raise ValueError("Sampler is already running")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="nipyapi-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stops sampling, waiting for any sample in progress to finish.
+
+        Args:
+            timeout (float): Seconds to wait for the thread to finish
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
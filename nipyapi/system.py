@@ -3,6 +3,9 @@ For system and cluster level functions interacting with the underlying NiFi
 Services
 """
 
+import statistics
+from collections import namedtuple
+
 import nipyapi
 
 __all__ = [
@@ -11,8 +14,41 @@ __all__ = [
     "get_node",
     "get_nifi_version_info",
     "get_registry_version_info",
+    "get_cluster_diagnostics",
+    "ClusterDiagnostics",
+    "NodeOutlier",
+    "NODE_DIAGNOSTIC_COLUMNS",
+]
+
+# Numeric columns of each node row returned by get_cluster_diagnostics
+NODE_DIAGNOSTIC_COLUMNS = [
+    "heap_used_bytes",
+    "heap_max_bytes",
+    "heap_utilization",
+    "non_heap_used_bytes",
+    "total_threads",
+    "daemon_threads",
+    "processor_load_average",
+    "gc_collection_count",
+    "gc_collection_millis",
+    "flowfile_repo_utilization",
+    "content_repo_utilization",
+    "provenance_repo_utilization",
+    "active_threads",
+    "terminated_threads",
+    "flowfiles_queued",
+    "bytes_queued",
 ]
 
+# Result of get_cluster_diagnostics
+ClusterDiagnostics = namedtuple("ClusterDiagnostics", ["nodes", "aggregates", "outliers", "jmx"])
+
+# A node whose value for a column stands apart from the rest of the cluster
+NodeOutlier = namedtuple("NodeOutlier", ["node_id", "address", "column", "value", "median"])
+
+# Scales the median absolute deviation to a normal standard deviation
+_MAD_SCALE = 1.4826
+
 
 def get_system_diagnostics():
     """
@@ -113,3 +149,157 @@ def get_registry_version_info():
         pass
     # Could not determine; raise to allow caller to handle defaults
     raise ValueError("Unable to determine NiFi Registry version from About API response")
+
+
+def _utilization(usages):
+    """Returns the highest used fraction of one or more storage repositories"""
+    if usages is None:
+        return None
+    if not isinstance(usages, list):
+        usages = [usages]
+    fractions = [x.used_space_bytes / x.total_space_bytes for x in usages if x.total_space_bytes]
+    return max(fractions) if fractions else None
+
+
+def _diagnostics_row(snapshot):
+    """Flattens a SystemDiagnosticsSnapshotDTO into node row columns"""
+    collections = snapshot.garbage_collection or []
+    max_heap = snapshot.max_heap_bytes
+    return {
+        "heap_used_bytes": snapshot.used_heap_bytes,
+        "heap_max_bytes": max_heap,
+        "heap_utilization": (snapshot.used_heap_bytes / max_heap if max_heap else None),
+        "non_heap_used_bytes": snapshot.used_non_heap_bytes,
+        "total_threads": snapshot.total_threads,
+        "daemon_threads": snapshot.daemon_threads,
+        "processor_load_average": snapshot.processor_load_average,
+        "gc_collection_count": sum(x.collection_count or 0 for x in collections),
+        "gc_collection_millis": sum(x.collection_millis or 0 for x in collections),
+        "flowfile_repo_utilization": _utilization(snapshot.flow_file_repository_storage_usage),
+        "content_repo_utilization": _utilization(snapshot.content_repository_storage_usage),
+        "provenance_repo_utilization": _utilization(snapshot.provenance_repository_storage_usage),
+        "uptime": snapshot.uptime,
+    }
+
+
+def _status_row(snapshot):
+    """Flattens a ProcessGroupStatusSnapshotDTO into node row columns"""
+    return {
+        "active_threads": snapshot.active_thread_count,
+        "terminated_threads": snapshot.terminated_thread_count,
+        "flowfiles_queued": snapshot.flow_files_queued,
+        "bytes_queued": snapshot.bytes_queued,
+    }
+
+
+def _node_rows(diagnostics, status):
+    """Joins nodewise diagnostics and status into one row per node"""
+    nodes = {}
+    if diagnostics.node_snapshots:
+        for node in diagnostics.node_snapshots:
+            nodes[node.node_id] = {"node_id": node.node_id, "address": node.address}
+            nodes[node.node_id].update(_diagnostics_row(node.snapshot))
+    else:
+        nodes[None] = {"node_id": None, "address": None}
+        nodes[None].update(_diagnostics_row(diagnostics.aggregate_snapshot))
+    if status.node_snapshots:
+        for node in status.node_snapshots:
+            if node.node_id in nodes:
+                nodes[node.node_id].update(_status_row(node.status_snapshot))
+    elif None in nodes:
+        nodes[None].update(_status_row(status.aggregate_snapshot))
+    rows = sorted(nodes.values(), key=lambda x: x["address"] or "")
+    for row in rows:
+        for column in NODE_DIAGNOSTIC_COLUMNS:
+            row.setdefault(column, None)
+    return rows
+
+
+def _aggregate(rows):
+    """Returns min, max, mean and sum of each numeric column across nodes"""
+    aggregates = {}
+    for column in NODE_DIAGNOSTIC_COLUMNS:
+        values = [x[column] for x in rows if x[column] is not None]
+        if values:
+            aggregates[column] = {
+                "min": min(values),
+                "max": max(values),
+                "mean": statistics.fmean(values),
+                "sum": sum(values),
+            }
+    return aggregates
+
+
+def _outliers(rows, threshold):
+    """
+    Flags node values more than threshold robust deviations from the median.
+
+    The median absolute deviation is used rather than the standard deviation
+    so that one misbehaving node cannot mask itself by inflating the spread.
+    """
+    outliers = []
+    if len(rows) < 3:
+        return outliers
+    for column in NODE_DIAGNOSTIC_COLUMNS:
+        values = [x[column] for x in rows if x[column] is not None]
+        if len(values) < 3:
+            continue
+        median = statistics.median(values)
+        spread = _MAD_SCALE * statistics.median(abs(x - median) for x in values)
+        if not spread:
+            continue
+        for row in rows:
+            value = row[column]
+            if value is not None and abs(value - median) > threshold * spread:
+                outliers.append(NodeOutlier(row["node_id"], row["address"], column, value, median))
+    return outliers
+
+
+def get_cluster_diagnostics(pg_id="root", jmx_filter=None, outlier_threshold=3.0):
+    """
+    Collects heap, GC, repository, thread and queue figures for every node.
+
+    Nodewise system diagnostics, nodewise process group status and,
+    optionally, JMX metrics are requested concurrently, then joined into one
+    row per node. A standalone instance is returned as a single row with a
+    node_id of None.
+
+    Args:
+        pg_id (str): Process group whose status supplies the active thread
+            and queue columns, defaults to the root group
+        jmx_filter (str): If given, a regular expression of MBean names to
+            also fetch. NiFi only serves JMX metrics for the node that
+            receives the request, so these are not per node.
+        outlier_threshold (float): How many robust standard deviations from
+            the cluster median a node value must be to be flagged
+
+    Returns:
+        (ClusterDiagnostics): nodes is a list of dicts sorted by address with
+        node_id, address, uptime and the NODE_DIAGNOSTIC_COLUMNS;
+        aggregates maps each column to its min, max, mean and sum; outliers
+        is a list of NodeOutlier; jmx maps bean names to their attributes,
+        or is None
+
+    Example::
+
+        diags = nipyapi.system.get_cluster_diagnostics()
+        for outlier in diags.outliers:
+            print(outlier.address, outlier.column, outlier.value, outlier.median)
+    """
+    calls = [
+        lambda: nipyapi.nifi.SystemDiagnosticsApi().get_system_diagnostics(nodewise=True),
+        lambda: nipyapi.nifi.FlowApi().get_process_group_status(pg_id, nodewise=True),
+    ]
+    if jmx_filter is not None:
+        calls.append(
+            lambda: nipyapi.nifi.SystemDiagnosticsApi().get_jmx_metrics(bean_name_filter=jmx_filter)
+        )
+    with nipyapi.utils.rest_exceptions():
+        results = nipyapi.utils.run_concurrently(lambda x: x(), calls, max_workers=len(calls))
+    rows = _node_rows(results[0].system_diagnostics, results[1].process_group_status)
+    jmx = None
+    if jmx_filter is not None:
+        jmx = {}
+        for metric in results[2].jmx_metrics_results or []:
+            jmx.setdefault(metric.bean_name, {})[metric.attribute_name] = metric.attribute_value
+    return ClusterDiagnostics(rows, _aggregate(rows), _outliers(rows, outlier_threshold), jmx)
@@ -10,7 +10,10 @@ import logging
 import operator
 import os
 import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import copy
 from datetime import datetime, timezone
@@ -35,6 +38,12 @@ __all__ = [
     "resolve_entity",
     "resolve_schedule_state",
     "wait_to_complete",
+    "run_concurrently",
+    "cache_revision",
+    "get_cached_revision",
+    "clear_revision_cache",
+    "is_revision_conflict",
+    "submit_revisioned",
     "is_endpoint_up",
     "set_endpoint",
     "infer_object_label_from_class",
@@ -52,6 +61,11 @@ __all__ = [
 ]
 
 log = logging.getLogger(__name__)
+
+# Latest known RevisionDTO per component id, least recently used first,
+# see cache_revision
+_revision_cache = OrderedDict()
+_revision_lock = threading.Lock()
 DOCKER_AVAILABLE = False  # Docker management removed in 1.x (NiFi 2.x)
 
 # UUID pattern: 8-4-4-4-12 hexadecimal characters
@@ -472,6 +486,10 @@ def wait_to_complete(test_function, *args, **kwargs):
             config.short_retry_delay
         max_wait (int): the maximum number of seconds before issuing a Timeout,
             defaults to config.short_max_wait
+        backoff (float): Multiplier applied to the delay after each attempt,
+            defaults to 1 (fixed delay)
+        max_delay (float): Upper bound for the delay when backoff is used,
+            defaults to config.long_retry_delay
         *args: Any args to pass through to the test function
         **kwargs: Any Keword Args to pass through to the test function
 
@@ -481,6 +499,8 @@ def wait_to_complete(test_function, *args, **kwargs):
     log.info("Called wait_to_complete for function %s", test_function.__name__)
     delay = kwargs.pop("nipyapi_delay", nipyapi.config.short_retry_delay)
     max_wait = kwargs.pop("nipyapi_max_wait", nipyapi.config.short_max_wait)
+    backoff = kwargs.pop("nipyapi_backoff", 1)
+    max_delay = kwargs.pop("nipyapi_max_delay", nipyapi.config.long_retry_delay)
     timeout = time.time() + max_wait
     while time.time() < timeout:
         log.debug("Calling test_function")
@@ -491,10 +511,199 @@ def wait_to_complete(test_function, *args, **kwargs):
             return test_result
         log.info("Function output evaluated to False, sleeping...")
         time.sleep(delay)
+        if backoff != 1:
+            delay = min(delay * backoff, max(max_delay, delay))
     log.info("Hit Timeout, raising TimeOut Error")
     raise ValueError("Timed Out waiting for {0} to complete".format(test_function.__name__))
 
 
+def run_concurrently(func, items, max_workers=None, return_exceptions=False):
+    """
+    Calls func once for each item using a bounded thread pool.
+
+    Results are returned in the same order as items. Single items, or a
+    max_workers of 1, are processed serially in the calling thread.
+
+    Args:
+        func: Function taking a single item as its argument
+        items (iterable): The items to process
+        max_workers (int): Maximum number of concurrent calls, defaults to
+            config.max_workers
+        return_exceptions (bool): If True, an exception raised for an item is
+            returned in its result slot instead of being raised. If False
+            (default), the first exception in item order is raised once all
+            calls have finished.
+
+    Returns:
+        list: The result of func for each item, in input order
+
+    Example::
+
+        procs = nipyapi.utils.run_concurrently(
+            lambda x: nipyapi.canvas.get_processor(x, "id"), proc_ids
+        )
+    """
+    items = list(items)
+    max_workers = max_workers or nipyapi.config.max_workers
+    assert isinstance(max_workers, int) and max_workers > 0
+
+    def _call(item):
+        try:
+            return func(item)
+        except Exception as e:  # pylint: disable=broad-except
+            if not return_exceptions:
+                raise
+            return e
+
+    if len(items) <= 1 or max_workers == 1:
+        return [_call(x) for x in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(_call, x) for x in items]
+    # Executor exit waits for all calls, so no request is left in flight
+    return [f.result() for f in futures]
+
+
+def cache_revision(entities):
+    """
+    Records the revision of one or more NiFi entities in the revision cache.
+
+    Entities without an id or revision version are ignored, as are revisions
+    older than the one already cached. The cache holds at most
+    config.revision_cache_size components, dropping the least recently used.
+
+    Args:
+        entities: A NiFi entity with 'id' and 'revision', or a list of them
+
+    Returns:
+        The entities passed in, for chaining
+    """
+    items = entities if isinstance(entities, (list, tuple)) else [entities]
+    with _revision_lock:
+        for item in items:
+            revision = getattr(item, "revision", None)
+            entity_id = getattr(item, "id", None)
+            if entity_id is None or revision is None or revision.version is None:
+                continue
+            known = _revision_cache.get(entity_id)
+            if known is None or known.version <= revision.version:
+                _revision_cache[entity_id] = revision
+            _revision_cache.move_to_end(entity_id)
+        while len(_revision_cache) > nipyapi.config.revision_cache_size:
+            _revision_cache.popitem(last=False)
+    return entities
+
+
+def get_cached_revision(entity_id):
+    """
+    Returns the latest cached RevisionDTO for a component id, or None.
+
+    Args:
+        entity_id (str): The component UUID
+    """
+    with _revision_lock:
+        revision = _revision_cache.get(entity_id)
+        if revision is not None:
+            _revision_cache.move_to_end(entity_id)
+        return revision
+
+
+def clear_revision_cache(entity_id=None):
+    """
+    Removes one component, or every component, from the revision cache.
+
+    Args:
+        entity_id (str): The component UUID, or None to clear the whole cache
+    """
+    with _revision_lock:
+        if entity_id is None:
+            _revision_cache.clear()
+        else:
+            _revision_cache.pop(entity_id, None)
+
+
+def is_revision_conflict(err):
+    """
+    Checks whether an API error is NiFi rejecting a stale component revision.
+
+    NiFi also answers 409 when a component is in the wrong state for the
+    request (e.g. updating a running Processor), which retrying cannot fix, so
+    only the stale revision message is treated as a conflict.
+
+    Args:
+        err (ApiException): The exception raised by the generated client
+
+    Returns:
+        bool: True if the request may succeed with a fresh revision
+    """
+    return getattr(err, "status", None) == 409 and "is not the most up-to-date revision" in str(
+        getattr(err, "body", "") or ""
+    )
+
+
+def submit_revisioned(component, submit, fetch, refresh=True, partial=False):
+    """
+    Runs a write that needs the current revision of a component.
+
+    With refresh off the component's own revision is used as given. With
+    refresh on, and config.optimistic_revisions off, the component is fetched
+    first as before. With config.optimistic_revisions on, the component's own
+    revision is sent, and if NiFi rejects it as stale the component is fetched
+    again and the write retried, up to config.revision_conflict_retries times
+    with a doubling delay.
+
+    A newer cached revision is only substituted when the component carries
+    no revision, or when the write is partial. A write that resends fields
+    read from the component, such as a connection's name and bends, must not
+    be submitted under a newer revision than the one it was read at, as that
+    would silently overwrite a concurrent change instead of conflicting.
+    As a conflict is retried with the refetched entity, submit must build
+    its body from the entity it is called with, changing only the fields
+    the caller asked to change, never from the stale entity it closed over.
+
+    Args:
+        component: The NiFi entity to write, with 'id' and 'revision'
+        submit (callable): Called with the entity to write from, and builds
+            the request body from it; returns the API response
+        fetch (callable): Called with the component id, returns a fresh entity
+        refresh (bool): Whether the component's revision may be stale
+        partial (bool): Whether submit sends only the fields being changed,
+            so that the newest cached revision may safely be used
+
+    Returns:
+        The response from submit, whose revision is cached
+
+    Raises:
+        ApiException: As raised by submit, once retries are exhausted
+    """
+    retries = 0
+    target = component
+    if refresh and not nipyapi.config.optimistic_revisions:
+        target = fetch(component.id)
+    elif refresh:
+        retries = nipyapi.config.revision_conflict_retries
+        cached = get_cached_revision(component.id)
+        if cached is not None and (
+            component.revision is None or (partial and cached.version > component.revision.version)
+        ):
+            target = copy(component)
+            target.revision = cached
+    delay = nipyapi.config.short_retry_delay / 5
+    while True:
+        try:
+            return cache_revision(submit(target))
+        except nipyapi.nifi.rest.ApiException as e:
+            if retries <= 0 or not is_revision_conflict(e):
+                raise
+            log.info("Stale revision for %s, refetching and retrying", component.id)
+            clear_revision_cache(component.id)
+            retries -= 1
+            time.sleep(delay)
+            delay *= 2
+            target = fetch(component.id)
+            if target is None:
+                raise
+
+
 def is_endpoint_up(endpoint_url):  # pylint: disable=too-many-return-statements
     """
     Tests if a URL is available for requests
@@ -585,6 +794,13 @@ def set_endpoint(endpoint_url, ssl=False, login=False, username=None, password=N
 
     # remove any trailing slash to avoid hard to spot errors
     configuration.host = endpoint_url.rstrip("/")
+    if service == "nifi":
+        # Cached server state belongs to the previous endpoint
+        clear_revision_cache()
+        nipyapi.extensions.clear_extension_catalog()
+        nipyapi.canvas.clear_flowfile_listing_cache()
+        nipyapi.provenance.clear_lineage_cache()
+        nipyapi.s2s.clear_peer_clients()
 
     # Handle authentication - maintain backwards compatibility with ssl parameter
     if ssl and login and "https://" in endpoint_url:
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark get_flow and get_flow_components with detail='all' against 'ui'.
+
+Builds a temporary process group holding a chain of UpdateAttribute
+processors, each with a few properties set, then times fetching it at both
+detail levels and reports the response size. The group is removed afterwards.
+Requires a running NiFi reachable through a nipyapi profile.
+
+Usage:
+    python resources/scripts/bench_flow_detail.py [--profile NAME] [--processors N]
+        [--repeat R]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import nipyapi
+
+
+def _build_group(name, count):
+    """Creates a process group holding a chain of count processors"""
+    root = nipyapi.canvas.get_process_group(nipyapi.canvas.get_root_pg_id(), "id")
+    pg = nipyapi.canvas.create_process_group(root, name, location=(0.0, 0.0))
+    proc_type = nipyapi.canvas.get_processor_type("UpdateAttribute")
+
+    def _create(index):
+        return nipyapi.canvas.create_processor(
+            parent_pg=pg,
+            processor=proc_type,
+            location=(float(index % 20) * 400, float(index // 20) * 200),
+            name=f"{name}_{index}",
+            config=nipyapi.nifi.ProcessorConfigDTO(
+                properties={f"attribute.{x}": f"${{filename}}-{x}" for x in range(5)},
+                auto_terminated_relationships=["success"] if index == count - 1 else None,
+            ),
+        )
+
+    procs = nipyapi.utils.run_concurrently(_create, range(count))
+    nipyapi.utils.run_concurrently(
+        lambda x: nipyapi.canvas.create_connection(procs[x], procs[x + 1], ["success"]),
+        range(count - 1),
+    )
+    return pg, procs[0]
+
+
+def _payload_bytes(pg_id, detail):
+    """Returns the size of the raw flow response at the given detail"""
+    response = nipyapi.nifi.FlowApi().get_flow(
+        pg_id, ui_only=detail == "ui", _preload_content=False
+    )
+    return len(response.data)
+
+
+def _measure(label, repeat, func):
+    """Runs func repeat times, returning the median seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    print(f"{label:<36} {median * 1000:9.1f} ms median of {repeat}")
+    return median
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--profile",
+        default=os.getenv("NIPYAPI_PROFILE", "single-user"),
+        help="nipyapi profile to connect with",
+    )
+    parser.add_argument("--processors", type=int, default=500, help="Processors in the group")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    args = parser.parse_args()
+
+    nipyapi.profiles.switch(args.profile)
+    name = "nipyapi_bench_flow_detail"
+    print(f"Building {args.processors} processors and {args.processors - 1} connections")
+    pg, start = _build_group(name, args.processors)
+    try:
+        for detail in ["all", "ui"]:
+            size = _payload_bytes(pg.id, detail)
+            print(f"detail={detail!r}: {size / 2**10:.1f} KiB response")
+            _measure(
+                f"get_flow detail={detail!r}",
+                args.repeat,
+                lambda d=detail: nipyapi.canvas.get_flow(pg.id, d),
+            )
+            _measure(
+                f"get_flow_components detail={detail!r}",
+                args.repeat,
+                lambda d=detail: nipyapi.canvas.get_flow_components(start, pg.id, d),
+            )
+    finally:
+        nipyapi.canvas.delete_process_group(
+            nipyapi.canvas.get_process_group(pg.id, "id"), force=True
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Benchmark the FlowFile package v3 codec on large multi-FlowFile streams.
+
+Encodes a set of FlowFiles to a temporary file, then decodes it back, for
+several content sources and read modes, reporting throughput and peak
+traced memory. Each case is run twice, as tracing slows the timed run.
+No NiFi instance is required.
+
+Usage:
+    python resources/scripts/bench_flowfile_package.py [--count N] [--size BYTES]
+"""
+
+import argparse
+import mmap
+import os
+import tempfile
+import time
+import tracemalloc
+
+from nipyapi import flowfile_package
+
+
+def _measure(label, total_bytes, func):
+    """Runs func, printing its throughput, then again to trace peak memory"""
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<34} {elapsed:8.3f}s {total_bytes / elapsed / 2**20:10.1f} MiB/s "
+        f"{peak / 2**20:8.2f} MiB peak"
+    )
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=2000, help="FlowFiles per stream")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="Content bytes each")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size)
+    attributes = {"filename": "bench.bin", "mime.type": "application/octet-stream"}
+    total = args.count * args.size
+    print(f"{args.count} FlowFiles of {args.size} bytes, {total / 2**20:.1f} MiB of content")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        content_path = os.path.join(workdir, "content.bin")
+        package_path = os.path.join(workdir, "stream.pkg")
+        with open(content_path, "wb") as handle:
+            handle.write(payload)
+
+        _measure(
+            "encode bytes -> file",
+            total,
+            lambda: flowfile_package.write_package(
+                ((attributes, payload) for _ in range(args.count)), package_path
+            ),
+        )
+
+        def _encode_files():
+            with open(content_path, "rb") as source:
+                for _ in range(args.count):
+                    source.seek(0)
+                    yield attributes, source, args.size
+
+        _measure(
+            "encode file objects -> file",
+            total,
+            lambda: flowfile_package.write_package(_encode_files(), package_path),
+        )
+
+        half = args.size // 2
+        halves = [payload[:half], payload[half:]]
+
+        def _encode_generators():
+            for _ in range(args.count):
+                yield attributes, iter(halves), args.size
+
+        _measure(
+            "encode generators -> file",
+            total,
+            lambda: flowfile_package.write_package(_encode_generators(), package_path),
+        )
+
+        def _decode_file(read):
+            with open(package_path, "rb") as handle:
+                for _, reader in flowfile_package.iter_decode(handle):
+                    if read:
+                        reader.read()
+
+        _measure("decode file, skip content", total, lambda: _decode_file(False))
+        _measure("decode file, read content", total, lambda: _decode_file(True))
+
+        def _decode_mmap():
+            with open(package_path, "rb") as handle:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for _, reader in flowfile_package.iter_decode(mapped):
+                        view = reader.getbuffer()
+                        assert view.nbytes == args.size
+                        view.release()
+
+        _measure("decode mmap, zero-copy views", total, _decode_mmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ import time
 import uuid
 from tests import conftest
 import nipyapi
-from nipyapi import canvas, nifi, utils, config, parameters
+from nipyapi import canvas, nifi, utils, config, parameters, flowfile_package
 from nipyapi.nifi import ProcessGroupFlowEntity, ProcessGroupEntity
 from nipyapi.nifi import ProcessorTypesEntity, DocumentedTypeDTO
 
@@ -34,6 +34,36 @@ def test_get_flow():
         _ = canvas.get_flow('definitelyNotAPG')
 
 
+def test_get_flow_ui_detail(fix_pg, fix_proc):
+    f_pg = fix_pg.generate()
+    f_p1 = fix_proc.generate(parent_pg=f_pg)
+    f_p2 = fix_proc.generate(parent_pg=f_pg)
+    canvas.create_connection(f_p1, f_p2, ['success'])
+    full = canvas.get_flow(f_pg.id)
+    slim = canvas.get_flow(f_pg.id, detail='ui')
+    assert isinstance(slim, ProcessGroupFlowEntity)
+    full_fc = full.process_group_flow.flow
+    slim_fc = slim.process_group_flow.flow
+    assert {x.id for x in slim_fc.processors} == {x.id for x in full_fc.processors}
+    assert slim_fc.connections[0].source_id == f_p1.id
+    assert slim_fc.processors[0].position is not None
+    # The trimmed payload is smaller on the wire
+    sizes = {}
+    for ui_only in (False, True):
+        resp, _, _ = nifi.FlowApi().get_flow_with_http_info(
+            f_pg.id, ui_only=ui_only, _preload_content=False
+        )
+        sizes[ui_only] = len(resp.data)
+    assert sizes[True] < sizes[False]
+    # Threaded through the recursion and the graph helpers
+    r = canvas.recurse_flow(f_pg.id, detail='ui')
+    assert r.process_group_flow.id == f_pg.id
+    sub = canvas.get_flow_components(f_p1)
+    assert {x.id for x in sub.components} == {f_p1.id, f_p2.id}
+    with pytest.raises(AssertionError):
+        _ = canvas.get_flow(f_pg.id, detail='invalid')
+
+
 def test_deser_flow():
     r = canvas.get_flow('root')
     assert isinstance(r, ProcessGroupFlowEntity)
@@ -67,6 +97,28 @@ def test_list_all_process_groups(fix_pg):
     assert r2[0].id == pg_2.id
 
 
+def test_get_process_group_tree(fix_pg):
+    pg_1 = fix_pg.generate()
+    pg_2 = fix_pg.generate(parent_pg=pg_1)
+    tree = canvas.get_process_group_tree()
+    assert isinstance(tree, canvas.ProcessGroupTree)
+    assert tree.root_id == canvas.get_root_pg_id()
+    assert tree.parents[tree.root_id] is None
+    assert tree.parents[pg_2.id] == pg_1.id
+    assert pg_2.id in tree.children[pg_1.id]
+    assert tree.name(pg_2.id) == pg_2.component.name
+    assert tree.ancestor_ids(pg_2.id) == [pg_1.id, tree.root_id]
+    assert isinstance(tree.groups[pg_1.id].flow_files_queued, int)
+    # Matches the slower per-group traversal
+    expected = {pg.id for pg in canvas.list_all_process_groups()}
+    assert tree.descendant_ids() == expected
+    sub_tree = canvas.get_process_group_tree(pg_1.id)
+    assert sub_tree.descendant_ids() == {pg_1.id, pg_2.id}
+    assert sub_tree.descendant_ids(include_self=False) == {pg_2.id}
+    with pytest.raises(ValueError):
+        _ = canvas.get_process_group_tree('definitelyNotAPG')
+
+
 def test_create_process_group():
     r = canvas.create_process_group(
         parent_pg=canvas.get_process_group(canvas.get_root_pg_id(), 'id'),
@@ -348,6 +400,37 @@ def test_get_processor(fix_proc):
     r5 = canvas.get_processor(str(uuid.uuid4()), 'id')
     assert r5 is None
 
+
+def test_search_flow_lookups(fix_pg, fix_proc, monkeypatch):
+    f_pg = fix_pg.generate()
+    f_p1 = fix_proc.generate(parent_pg=f_pg)
+    r1 = canvas.search_flow(f_p1.component.name)
+    assert isinstance(r1, nifi.SearchResultsDTO)
+    assert f_p1.id in [x.id for x in r1.processor_results]
+
+    # Unique exact names resolve without listing the canvas
+    def _no_listing(*args, **kwargs):
+        raise AssertionError("listed the canvas")
+
+    monkeypatch.setattr(canvas, 'list_all_processors', _no_listing)
+    monkeypatch.setattr(canvas, 'list_all_process_groups', _no_listing)
+    r2 = canvas.get_processor(f_p1.component.name, greedy=False)
+    assert r2.id == f_p1.id
+    r3 = canvas.get_process_group(f_pg.component.name, greedy=False)
+    assert r3.id == f_pg.id
+    r4 = utils.resolve_entity(
+        f_p1.component.name, canvas.get_processor, nifi.ProcessorEntity, greedy=False
+    )
+    assert r4.id == f_p1.id
+
+    # Anything else still lists the canvas
+    with pytest.raises(AssertionError, match="listed the canvas"):
+        canvas.get_processor(f_p1.component.name, greedy=True)
+    monkeypatch.setattr(config, 'search_lookups', False)
+    with pytest.raises(AssertionError, match="listed the canvas"):
+        canvas.get_processor(f_p1.component.name, greedy=False)
+
+
 def test_schedule_processor(fix_proc):
     f_p1 = fix_proc.generate()
     # Test bool True -> RUNNING (backwards compatible)
@@ -479,6 +562,39 @@ def test_schedule_port(fix_proc):
         canvas.delete_port(canvas.get_port(f_output_port.id, "id"))
 
 
+def test_schedule_many(fix_pg, fix_proc, fix_cont):
+    f_pg = fix_pg.generate()
+    f_procs = [fix_proc.generate(parent_pg=f_pg, suffix=str(i)) for i in range(3)]
+    f_cont = fix_cont(parent_pg=f_pg)
+
+    r1 = canvas.schedule_many(f_procs + [f_cont], True, pg_id=f_pg.id)
+    assert [x.id for x in r1] == [x.id for x in f_procs] + [f_cont.id]
+    assert all(isinstance(x, canvas.ScheduleResult) for x in r1)
+    assert all(x.success for x in r1)
+    assert [x.kind for x in r1] == ['PROCESSOR'] * 3 + ['CONTROLLER_SERVICE']
+    for proc in f_procs:
+        assert canvas.get_processor(proc.id, 'id').component.state == 'RUNNING'
+    assert canvas.get_controller(f_cont.id, 'id').component.state == 'ENABLED'
+
+    # Stale revisions are fine when refresh is on (the default)
+    r2 = canvas.schedule_many(f_procs + [f_cont], False, pg_id=f_pg.id)
+    assert all(x.success for x in r2)
+    for proc in f_procs:
+        assert canvas.get_processor(proc.id, 'id').component.state == 'STOPPED'
+    assert canvas.get_controller(f_cont.id, 'id').component.state == 'DISABLED'
+
+    # Failures are reported per component rather than raised
+    r3 = canvas.schedule_many(f_procs[:1], True, refresh=False, pg_id=f_pg.id)
+    assert r3[0].success is False
+    assert r3[0].error
+
+    # Invalid states are rejected before any request is made
+    with pytest.raises(ValueError, match="scheduled must be bool or one of"):
+        _ = canvas.schedule_many(f_procs + [f_cont], 'RUN_ONCE')
+    with pytest.raises(TypeError):
+        _ = canvas.schedule_many([f_pg], True)
+
+
 def test_delete_processor(fix_proc):
     f_p1 = fix_proc.generate()
     r1 = canvas.delete_processor(f_p1)
@@ -533,6 +649,110 @@ def test_update_processor(fix_proc):
         canvas.update_processor(f_p1)
 
 
+def test_update_processor_optimistic_revisions(fix_proc, monkeypatch):
+    """Stale entities are updated via the revision cache or a conflict retry."""
+    monkeypatch.setattr(nipyapi.config, 'optimistic_revisions', True)
+    f_p1 = fix_proc.generate()
+    original_name = f_p1.component.name
+
+    # Cached revision from the first update is used for the stale entity
+    r1 = canvas.update_processor(f_p1, name=original_name + '_1')
+    r2 = canvas.update_processor(f_p1, name=original_name + '_2')
+    assert r2.revision.version == r1.revision.version + 1
+
+    # A revision unknown to the cache conflicts and is retried
+    nipyapi.utils.clear_revision_cache(f_p1.id)
+    r3 = canvas.update_processor(f_p1, name=original_name)
+    assert r3.component.name == original_name
+    assert r3.revision.version == r2.revision.version + 1
+
+    # Without refresh the stale revision is rejected
+    with pytest.raises(ValueError, match="not the most up-to-date revision"):
+        canvas.update_processor(f_p1, name=original_name + '_3', refresh=False)
+
+
+def test_update_connection_conflict_keeps_concurrent_edit(monkeypatch):
+    """A conflict retry only applies the requested change to the fresh connection."""
+    monkeypatch.setattr(nipyapi.config, 'optimistic_revisions', True)
+    monkeypatch.setattr(nipyapi.config, 'short_retry_delay', 0)
+
+    def _entity(version, name, bends):
+        return nifi.ConnectionEntity(
+            id='conn-test',
+            revision=nifi.RevisionDTO(version=version),
+            source_type='PROCESSOR',
+            destination_type='PROCESSOR',
+            component=nifi.ConnectionDTO(
+                id='conn-test',
+                name=name,
+                bends=[nifi.PositionDTO(x=float(x), y=float(y)) for x, y in bends],
+            ),
+        )
+
+    stale = _entity(1, 'original', [])
+    for concurrent, change, expected in [
+        # Another client renamed the connection, we set bends
+        (('renamed', []), {'bends': [(5, 5)]}, ('renamed', [(5.0, 5.0)])),
+        # Another client added bends, we rename
+        (('original', [(1, 1)]), {'name': 'mine'}, ('mine', [(1.0, 1.0)])),
+    ]:
+        server = {'entity': _entity(2, *concurrent)}
+
+        def _update(api, id, body):
+            if body.revision.version != server['entity'].revision.version:
+                err = nifi.rest.ApiException(status=409, reason='Conflict')
+                err.body = '[1, null, conn-test] is not the most up-to-date revision.'
+                raise err
+            server['entity'] = body
+            body.revision = nifi.RevisionDTO(version=body.revision.version + 1)
+            return body
+
+        monkeypatch.setattr(nifi.ConnectionsApi, 'update_connection', _update)
+        monkeypatch.setattr(
+            nifi.ConnectionsApi, 'get_connection', lambda api, x: server['entity'])
+        nipyapi.utils.clear_revision_cache()
+        result = canvas.update_connection(stale, **change)
+        assert result.revision.version == 3
+        assert result.component.name == expected[0]
+        assert [(b.x, b.y) for b in result.component.bends] == expected[1]
+    nipyapi.utils.clear_revision_cache()
+
+
+def test_update_processors_bulk(fix_pg, fix_proc):
+    f_pg = fix_pg.generate()
+    f_procs = [fix_proc.generate(parent_pg=f_pg, suffix=str(i)) for i in range(3)]
+    canvas.schedule_processor(f_procs[0], True)
+    props = {'File Size': '2 KB'}
+
+    # Dry run reports changes without applying them
+    r1 = canvas.update_processors_bulk('GenerateFlowFile', props, pg_id=f_pg.id, dry_run=True)
+    assert all(isinstance(x, canvas.BulkUpdateResult) for x in r1)
+    assert {x.id for x in r1} == {x.id for x in f_procs}
+    assert all(x.changes['File Size'][1] == '2 KB' for x in r1)
+    assert [x.success for x in r1 if x.id == f_procs[0].id] == [False]
+    for proc in f_procs:
+        current = canvas.get_processor(proc.id, 'id').component.config.properties
+        assert current['File Size'] != '2 KB'
+
+    # Running processors are stopped, updated and restarted
+    r2 = canvas.update_processors_bulk('GenerateFlowFile', props, pg_id=f_pg.id, auto_stop=True)
+    assert all(x.success for x in r2)
+    for proc in f_procs:
+        current = canvas.get_processor(proc.id, 'id')
+        assert current.component.config.properties['File Size'] == '2 KB'
+    assert canvas.get_processor(f_procs[0].id, 'id').component.state == 'RUNNING'
+
+    # Nothing left to change
+    r3 = canvas.update_processors_bulk([f_procs[1]], props, pg_id=f_pg.id)
+    assert len(r3) == 1 and r3[0].changes == {} and r3[0].success
+
+    # Unknown keys are reported per processor
+    r4 = canvas.update_processors_bulk(lambda x: True, {'Not A Prop': 'x'}, pg_id=f_pg.id)
+    assert not any(x.success for x in r4)
+    assert 'Not A Prop' in r4[0].error
+    canvas.schedule_processor(f_procs[0], False)
+
+
 def test_purge_connection():
     # TODO: Waiting for create_connection to generate fixture
     pass
@@ -632,6 +852,61 @@ def test_delete_connection(fix_proc):
     assert r1.status is None
 
 
+def test_list_all_components(fix_pg, fix_proc, fix_funnel):
+    f_pg1 = fix_pg.generate()
+    f_pg2 = fix_pg.generate(parent_pg=f_pg1)
+    f_p1 = fix_proc.generate(parent_pg=f_pg2)
+    f_f1 = fix_funnel.generate(parent_pg=f_pg1)
+    f_f2 = fix_funnel.generate(parent_pg=f_pg2)
+    r1 = canvas.list_all_components(f_pg1.id)
+    assert set(r1) == {
+        'process_groups', 'processors', 'connections', 'input_ports',
+        'output_ports', 'funnels', 'labels', 'remote_process_groups'
+    }
+    assert [x.id for x in r1['process_groups']] == [f_pg2.id]
+    assert [x.id for x in r1['processors']] == [f_p1.id]
+    assert {x.id for x in r1['funnels']} == {f_f1.id, f_f2.id}
+    r2 = canvas.list_all_components(f_pg1.id, kinds=['funnels'], descendants=False)
+    assert list(r2) == ['funnels']
+    assert [x.id for x in r2['funnels']] == [f_f1.id]
+    # Matches the per-kind listing
+    assert {x.id for x in canvas.list_all_funnels(f_pg1.id)} == {f_f1.id, f_f2.id}
+    with pytest.raises(ValueError):
+        _ = canvas.list_all_components(f_pg1.id, kinds=['controllers'])
+
+
+def test_get_connection_graph(fix_pg, fix_proc):
+    f_pg = fix_pg.generate()
+    f_child = fix_pg.generate(parent_pg=f_pg)
+    f_p1 = fix_proc.generate(parent_pg=f_pg)
+    f_p2 = fix_proc.generate(parent_pg=f_child)
+    f_p3 = fix_proc.generate(parent_pg=f_child)
+    f_port = canvas.create_port(
+        f_child.id, 'INPUT_PORT', conftest.test_basename + 'graph_in', 'STOPPED'
+    )
+    c1 = canvas.create_connection(f_p1, f_port, ['success'])
+    _ = canvas.create_connection(f_port, f_p2)
+    _ = canvas.create_connection(f_p2, f_p3, ['success'])
+    _ = canvas.create_connection(f_p3, f_p2, ['success'])
+    graph = canvas.get_connection_graph(f_pg.id)
+    assert isinstance(graph, canvas.ConnectionGraph)
+    # Reachability crosses the group boundary through the port
+    assert graph.downstream(f_p1) == {f_port.id, f_p2.id, f_p3.id}
+    assert graph.upstream(f_port.id) == {f_p1.id}
+    assert graph.sources(f_p3) == {f_p1.id}
+    assert [x.id for x in graph.outgoing(f_p1)] == [c1.id]
+    assert [x.id for x in graph.incoming(f_port)] == [c1.id]
+    assert [sorted(x) for x in graph.find_cycles()] == [sorted([f_p2.id, f_p3.id])]
+    sub = graph.subgraph(f_p3)
+    assert {x.id for x in sub.components} == {f_p1.id, f_port.id, f_p2.id, f_p3.id}
+    assert len(sub.connections) == 4
+    with pytest.raises(ValueError):
+        _ = graph.downstream('definitelyNotAComponent')
+    # Without descendants only the parent group is indexed
+    shallow = canvas.get_connection_graph(f_pg.id, descendants=False)
+    assert shallow.downstream(f_p1) == {f_port.id}
+
+
 def test_list_all_connections(fix_pg, fix_proc):
     f_p1 = fix_proc.generate()
     f_p2 = fix_proc.generate()
@@ -955,6 +1230,40 @@ def test_schedule_all_controllers_with_invalid(fix_pg, fix_cont):
     assert valid_ctrl.component.state == 'DISABLED'
 
 
+def test_schedule_controllers_ordered(fix_pg, fix_cont):
+    f_pg = fix_pg.generate()
+    f_registry = fix_cont(parent_pg=f_pg, kind='AvroSchemaRegistry')
+    f_reader = fix_cont(parent_pg=f_pg, kind='CSVReader')
+    f_reader = canvas.update_controller(
+        f_reader,
+        nifi.ControllerServiceDTO(
+            properties={
+                'schema-access-strategy': 'schema-name',
+                'schema-registry': f_registry.id,
+            }
+        )
+    )
+    graph = canvas.get_controller_dependency_graph(f_pg.id)
+    assert isinstance(graph, canvas.ControllerDependencyGraph)
+    assert graph.depends_on[f_reader.id] == {f_registry.id}
+    assert graph.levels == [[f_registry.id], [f_reader.id]]
+
+    # Enable dependencies first
+    r1 = canvas.schedule_controllers_ordered(f_pg.id, True)
+    assert [x.id for x in r1] == [f_registry.id, f_reader.id]
+    assert all(x.success and x.state == 'ENABLED' for x in r1)
+    assert canvas.get_controller(f_reader.id, 'id').component.state == 'ENABLED'
+
+    # Disable dependents first
+    r2 = canvas.schedule_controllers_ordered(f_pg.id, False)
+    assert [x.id for x in r2] == [f_reader.id, f_registry.id]
+    assert all(x.success for x in r2)
+    assert canvas.get_controller(f_registry.id, 'id').component.state == 'DISABLED'
+
+    with pytest.raises(ValueError, match="scheduled must be bool or one of"):
+        _ = canvas.schedule_controllers_ordered(f_pg.id, 'RUNNING')
+
+
 def test_delete_controller(fix_pg, fix_cont):
     f_pg = fix_pg.generate()
     f_c1 = fix_cont(parent_pg=f_pg)
@@ -2370,6 +2679,131 @@ def test_peek_flowfiles(fix_proc):
     canvas.delete_connection(conn)
 
 
+def test_export_flowfiles(fix_proc, tmpdir):
+    """Test bulk export of queued FlowFiles to NDJSON and tar."""
+    import base64
+    import json
+    import tarfile
+    f_p1 = fix_proc.generate()
+    f_p2 = fix_proc.generate()
+    canvas.update_processor(
+        f_p1, update=nifi.ProcessorConfigDTO(properties={'File Size': '10 B'})
+    )
+    conn = canvas.create_connection(f_p1, f_p2, ['success'], conftest.test_basename)
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    summaries = canvas.list_flowfiles(conn)
+    assert len(summaries) >= 2
+
+    # Concurrent peek returns details in listing order
+    peeked = canvas.peek_flowfiles(conn, limit=2, max_workers=2)
+    assert [x.uuid for x in peeked] == [x.uuid for x in summaries[:2]]
+
+    path = canvas.export_flowfiles(conn, str(tmpdir.join('queue.ndjson')))
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [x['uuid'] for x in records] == [x.uuid for x in summaries]
+    assert 'filename' in records[0]['attributes']
+    assert 'cluster_node_id' in records[0]
+    assert 'content_base64' not in records[0]
+
+    path = canvas.export_flowfiles(
+        conn, str(tmpdir.join('content.ndjson')), include_content=True
+    )
+    with open(path) as f:
+        record = json.loads(f.readline())
+    assert len(base64.b64decode(record['content_base64'])) == 10
+
+    path = canvas.export_flowfiles(
+        conn, str(tmpdir.join('queue.tar.gz')), include_content=True
+    )
+    with tarfile.open(path) as archive:
+        names = archive.getnames()
+        content = archive.extractfile(summaries[0].uuid + '.content').read()
+    assert summaries[0].uuid + '.json' in names
+    assert len(content) == 10
+
+    path = canvas.export_flowfiles(conn, str(tmpdir.join('queue.pkg')))
+    with open(path, 'rb') as f:
+        packaged = flowfile_package.decode(f)
+    assert [x['uuid'] for x, _ in packaged] == [x.uuid for x in summaries]
+    assert len(packaged[0][1]) == 10
+
+    with pytest.raises(ValueError):
+        canvas.export_flowfiles(conn, str(tmpdir.join('queue.bin')), output_format='zip')
+
+    canvas.purge_connection(conn.id)
+    canvas.delete_connection(conn)
+
+
+def test_write_base64():
+    """Test content is base64 encoded across chunk boundaries without padding."""
+    import base64
+    import io
+    for size in (0, 1, 5, 6, 7, 100):
+        data = bytes(range(size))
+        out = io.StringIO()
+        canvas._write_base64(io.BytesIO(data), out, chunk_size=4)
+        assert out.getvalue() == base64.b64encode(data).decode('ascii')
+
+
+def test_list_flowfiles_cache(fix_proc):
+    """Test FlowFile listings are reused within max_age and dropped on purge."""
+    f_p1 = fix_proc.generate()
+    f_p2 = fix_proc.generate()
+    conn = canvas.create_connection(f_p1, f_p2, ['success'], conftest.test_basename)
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    first = canvas.list_flowfiles(conn)
+    assert len(first) == 1
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    # A remembered listing is returned while young enough
+    cached = canvas.list_flowfiles(conn, max_age=300)
+    assert [x.uuid for x in cached] == [x.uuid for x in first]
+    # Lookups without cluster_node_id resolve from the remembered listing
+    details = canvas.get_flowfile_details(conn, first[0].uuid)
+    assert details.uuid == first[0].uuid
+    # Without max_age the queue is listed again
+    assert len(canvas.list_flowfiles(conn)) == 2
+    canvas.purge_connection(conn.id)
+    assert canvas.list_flowfiles(conn, max_age=300) == []
+    canvas.delete_connection(conn)
+
+
+def test_get_backpressure_hotspots(fix_pg, fix_proc):
+    """Test ranking connections by queue fill across nested groups."""
+    f_pg = fix_pg.generate()
+    f_child = fix_pg.generate(parent_pg=f_pg)
+    f_p1 = fix_proc.generate(parent_pg=f_child)
+    f_p2 = fix_proc.generate(parent_pg=f_child)
+    conn = canvas.create_connection(f_p1, f_p2, ['success'], conftest.test_basename)
+    conn = nifi.ConnectionsApi().update_connection(
+        id=conn.id,
+        body=nifi.ConnectionEntity(
+            revision=conn.revision,
+            source_type=conn.source_type,
+            destination_type=conn.destination_type,
+            component=nifi.ConnectionDTO(id=conn.id, back_pressure_object_threshold=2),
+        ),
+    )
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    canvas.schedule_processor(f_p1, 'RUN_ONCE')
+    hotspots = canvas.get_backpressure_hotspots(f_pg.id, top=5)
+    assert len(hotspots) == 1
+    hot = hotspots[0]
+    assert isinstance(hot, canvas.BackpressureHotspot)
+    assert hot.id == conn.id
+    assert hot.group_id == f_child.id
+    assert hot.source_id == f_p1.id
+    assert hot.destination_id == f_p2.id
+    assert hot.count_ratio == hot.fill_ratio == 1.0
+    assert hot.flow_files_queued == 2
+    assert canvas.get_backpressure_hotspots(f_pg.id, min_fill=1.0)[0].id == conn.id
+    assert canvas.get_backpressure_hotspots(f_pg.id, top=0) == []
+    canvas.purge_connection(conn.id)
+    assert canvas.get_backpressure_hotspots(f_pg.id, min_fill=0.5) == []
+    canvas.delete_connection(conn)
+
+
 def test_list_flowfiles_by_id(fix_proc):
     """Test list_flowfiles accepts connection ID string."""
     f_p1 = fix_proc.generate()
@@ -320,6 +320,19 @@ def test_get_status_invalid_pg():
         ci.get_status(process_group_id=str(uuid.uuid4()))
 
 
+def test_get_backpressure_hotspots(fix_pg):
+    """Test get_backpressure_hotspots on a specific process group."""
+    pg = fix_pg.generate()
+
+    result = ci.get_backpressure_hotspots(process_group_id=pg.id)
+
+    assert isinstance(result, dict)
+    assert result["process_group_id"] == pg.id
+    assert result["hotspot_count"] == "0"
+    assert result["max_fill_ratio"] == "0.0"
+    assert result["hotspots"] == []
+
+
 def test_stop_flow_missing_pg_id():
     """Test stop_flow without process_group_id raises error."""
     # Clear env var if set
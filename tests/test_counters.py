@@ -0,0 +1,86 @@
+"""Tests for `nipyapi.counters` module."""
+
+import pytest
+from nipyapi import counters, nifi
+
+
+def _counters_entity(counts, node_ids=()):
+    """Builds a CountersEntity with the same counts on the aggregate and each node."""
+
+    def _snapshot():
+        return nifi.CountersSnapshotDTO(
+            counters=[
+                nifi.CounterDTO(id=f"id-{name}", context=context, name=name, value_count=count)
+                for (context, name), count in counts.items()
+            ]
+        )
+
+    return nifi.CountersEntity(
+        counters=nifi.CountersDTO(
+            aggregate_snapshot=_snapshot(),
+            node_snapshots=[
+                nifi.NodeCountersSnapshotDTO(node_id=x, snapshot=_snapshot()) for x in node_ids
+            ],
+        )
+    )
+
+
+class TestCounterSnapshots:
+    """Snapshot, delta and reset tests against a fake CountersApi, no NiFi required."""
+
+    counts = {("Proc A", "orders"): 10, ("Proc B", "errors"): 2}
+
+    def test_get_counters(self, monkeypatch):
+        counts = self.counts
+
+        def fake(api, nodewise=False, cluster_node_id=None):
+            scale = 2 if cluster_node_id == "n2" else 1
+            return _counters_entity({k: v * scale for k, v in counts.items()}, ["n1", "n2"])
+
+        monkeypatch.setattr(nifi.CountersApi, "get_counters", fake)
+        snap = counters.get_counters()
+        assert snap.values == self.counts
+        assert snap.ids[("Proc A", "orders")] == "id-orders"
+        assert snap.nodes is None
+        assert set(counters.get_counters(nodewise=True).nodes) == {"n1", "n2"}
+        snap = counters.get_counters(node_ids=["n1", "n2"])
+        assert snap.values[("Proc A", "orders")] == 30
+        assert snap.nodes["n2"][("Proc B", "errors")] == 4
+
+    def test_deltas_and_rates(self):
+        before = counters.CountersSnapshot(100.0, {("a", "x"): 10, ("a", "y"): 50}, {}, None)
+        after = counters.CountersSnapshot(
+            110.0, {("a", "x"): 30, ("a", "y"): 5, ("b", "z"): 4}, {}, None
+        )
+        assert counters.counter_deltas(before, after) == {
+            ("a", "x"): 20,
+            ("a", "y"): 5,
+            ("b", "z"): 4,
+        }
+        assert counters.counter_rates(before, after)[("a", "x")] == 2.0
+        with pytest.raises(ValueError):
+            counters.counter_rates(after, before)
+
+    def test_reset_counters(self, monkeypatch):
+        reset = []
+        entity = _counters_entity(self.counts)
+        monkeypatch.setattr(nifi.CountersApi, "get_counters", lambda api, **kwargs: entity)
+        monkeypatch.setattr(nifi.CountersApi, "update_counter", lambda api, x: reset.append(x))
+        monkeypatch.setattr(
+            nifi.CountersApi, "update_all_counters", lambda api: reset.append("all")
+        )
+        assert counters.reset_counters(name="^ord") == [("Proc A", "orders")]
+        assert counters.reset_counters(context="Proc") == sorted(self.counts)
+        assert counters.reset_counters() == sorted(self.counts)
+        assert reset[0] == "id-orders"
+        assert sorted(reset[1:3]) == ["id-errors", "id-orders"]
+        assert reset[3] == "all"
+
+
+def test_get_counters():
+    snap = counters.get_counters()
+    assert isinstance(snap, counters.CountersSnapshot)
+    assert all(isinstance(x, int) for x in snap.values.values())
+    later = counters.get_counters()
+    assert set(counters.counter_deltas(snap, later)) == set(later.values)
+    assert isinstance(counters.reset_counters(name="^nipyapi_test_counter$"), list)
@@ -320,6 +320,96 @@ class TestProcessorMissingNar:
                 nipyapi.canvas.delete_processor(proc)
 
 
+class TestExtensionCatalog:
+    """Tests for the cached extension type catalog."""
+
+    def test_catalog_indexes(self):
+        """The catalog is reused and indexed by name, type, bundle and tag."""
+        catalog = nipyapi.extensions.get_extension_catalog(refresh=True)
+        assert nipyapi.extensions.get_extension_catalog() is catalog
+        generate = catalog.processors.by_name["GenerateFlowFile"][0]
+        assert catalog.processors.by_type[generate.type] == [generate]
+        assert generate in catalog.processors.by_bundle[generate.bundle.artifact]
+        assert generate in catalog.processors.by_tag[generate.tags[0]]
+        assert nipyapi.extensions.find_extension_types(
+            generate.type, identifier_type="name", greedy=False
+        ) == generate
+        assert nipyapi.extensions.find_extension_types(
+            "CSVReader", kind="controller", identifier_type="simple_name"
+        ).type.endswith("CSVReader")
+
+    def test_catalog_expiry_refetches(self, monkeypatch):
+        """An expired catalog lists the types again even if the NARs are unchanged."""
+        calls = []
+        real = nipyapi.nifi.FlowApi.get_processor_types
+
+        def _counted(api, **kwargs):
+            calls.append(1)
+            return real(api, **kwargs)
+
+        nipyapi.extensions.get_extension_catalog(refresh=True)
+        monkeypatch.setattr(nipyapi.nifi.FlowApi, "get_processor_types", _counted)
+        monkeypatch.setattr(nipyapi.config, "extension_catalog_ttl", 0)
+        first = nipyapi.extensions.get_extension_catalog()
+        second = nipyapi.extensions.get_extension_catalog()
+        assert first is not second
+        assert first.key == second.key
+        assert len(calls) == 2
+        nipyapi.extensions.clear_extension_catalog()
+
+    def test_has_sensitive_properties(self):
+        """Only declared sensitive properties are remembered for the type."""
+        nifi = nipyapi.nifi
+
+        def _proc(descriptors):
+            return nifi.ProcessorEntity(
+                component=nifi.ProcessorDTO(
+                    type="org.example.Sensitive",
+                    config=nifi.ProcessorConfigDTO(descriptors=descriptors),
+                )
+            )
+
+        nipyapi.extensions.clear_extension_catalog()
+        dynamic = {"token": nifi.PropertyDescriptorDTO(sensitive=True, dynamic=True)}
+        assert nipyapi.extensions.has_sensitive_properties(_proc(dynamic))
+        # A sensitive dynamic property does not mark other Processors of the type
+        assert not nipyapi.extensions.has_sensitive_properties(_proc({}))
+        declared = {"password": nifi.PropertyDescriptorDTO(sensitive=True)}
+        assert nipyapi.extensions.has_sensitive_properties(_proc(declared))
+        assert nipyapi.extensions.has_sensitive_properties(_proc({}))
+        nipyapi.extensions.clear_extension_catalog()
+
+    def test_catalog_definitions_and_persistence(self, monkeypatch):
+        """Definitions are cached and the catalog can be reloaded from disk."""
+        tmp_dir = tempfile.mkdtemp()
+        monkeypatch.setattr(nipyapi.config, "extension_catalog_dir", tmp_dir)
+        nipyapi.extensions.clear_extension_catalog()
+        catalog = nipyapi.extensions.get_extension_catalog()
+        generate = catalog.processors.by_name["GenerateFlowFile"][0]
+        docs = nipyapi.extensions.get_extension_definition(generate)
+        assert nipyapi.extensions.get_extension_definition(generate) is docs
+
+        nipyapi.extensions.clear_extension_catalog()
+        reloaded = nipyapi.extensions.get_extension_catalog()
+        assert reloaded is not catalog
+        assert reloaded.key == catalog.key
+        assert len(reloaded.processors.types) == len(catalog.processors.types)
+        assert nipyapi.extensions.get_extension_definition(generate).type == docs.type
+        nipyapi.extensions.clear_extension_catalog()
+
+    def test_catalog_invalidated_by_nar_upload(self, fix_test_nar):
+        """Uploading and deleting a NAR refreshes the catalog."""
+        before = nipyapi.extensions.get_extension_catalog()
+        nar = nipyapi.extensions.upload_nar(fix_test_nar(version="0.0.1"))
+        try:
+            after = nipyapi.extensions.get_extension_catalog()
+            assert after is not before
+            assert after.key != before.key
+        finally:
+            nipyapi.extensions.delete_nar(nar.identifier)
+        assert nipyapi.extensions.get_extension_catalog().key == before.key
+
+
 class TestProcessorBundleVersions:
     """Tests for processor bundle version functions."""
 
@@ -0,0 +1,137 @@
+"""Tests for `nipyapi.flowfile_package` module."""
+
+import io
+import mmap
+import os
+import struct
+
+import pytest
+from nipyapi import flowfile_package
+
+
+def test_encode_layout():
+    package = flowfile_package.encode([({"a": "bc"}, b"xyz")])
+    assert package == (
+        b"NiFiFF3" + b"\x00\x01" + b"\x00\x01a" + b"\x00\x02bc" + struct.pack(">q", 3) + b"xyz"
+    )
+
+
+def test_round_trip_sources(tmpdir):
+    big = bytes(range(256)) * 1024
+    content_path = tmpdir.join("content.bin")
+    content_path.write_binary(big)
+    with open(str(content_path), "rb") as source, open(str(content_path), "r+b") as mapped_file:
+        mapped = mmap.mmap(mapped_file.fileno(), 0)
+        flowfiles = [
+            ({"filename": "empty"}, b""),
+            ({"filename": "text", "unicode": "été"}, "hello"),
+            ({"filename": "file"}, source),
+            ({"filename": "mmap"}, mapped),
+            ({"filename": "gen"}, iter([b"ab", b"cd"]), 4),
+            ({}, memoryview(big)),
+        ]
+        package = flowfile_package.encode(flowfiles)
+        mapped.close()
+    decoded = flowfile_package.decode(package)
+    assert [x for x, _ in decoded] == [
+        {"filename": "empty"},
+        {"filename": "text", "unicode": "été"},
+        {"filename": "file"},
+        {"filename": "mmap"},
+        {"filename": "gen"},
+        {},
+    ]
+    assert [y for _, y in decoded] == [b"", b"hello", big, big, b"abcd", big]
+
+
+def test_encode_chunks_bounded():
+    big = b"x" * 100000
+    chunks = list(
+        flowfile_package.iter_encode(
+            [({"n": str(i)}, b"small") for i in range(50)] + [({}, big)], chunk_size=1024
+        )
+    )
+    assert all(len(x) <= 1024 for x in chunks)
+    # Large bytes-like content is passed through as views, not copied
+    assert any(isinstance(x, memoryview) for x in chunks)
+    decoded = flowfile_package.decode(b"".join(chunks))
+    assert len(decoded) == 51
+    assert decoded[-1][1] == big
+
+
+def test_long_field_lengths():
+    value = "v" * 70000
+    package = flowfile_package.encode([({"long": value}, b"")])
+    assert package[7:9] == b"\x00\x01"
+    assert flowfile_package.decode(package)[0][0]["long"] == value
+
+
+def test_iter_decode_lazy_stream():
+    package = flowfile_package.encode([({"n": str(i)}, b"%05d" % i) for i in range(5)])
+
+    class Unseekable(io.RawIOBase):
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def readinto(self, b):
+            return self._data.readinto(b)
+
+    seen = []
+    for attributes, reader in flowfile_package.iter_decode(Unseekable(package)):
+        assert reader.size == 5
+        # Content left unread is skipped before the next FlowFile
+        if attributes["n"] in ("1", "3"):
+            seen.append(reader.read(2))
+    assert seen == [b"00", b"00"]
+    for attributes, reader in flowfile_package.iter_decode(memoryview(package)):
+        assert bytes(reader.getbuffer()) == b"%05d" % int(attributes["n"])
+    with pytest.raises(io.UnsupportedOperation):
+        next(flowfile_package.iter_decode(io.BytesIO(package)))[1].getbuffer()
+
+
+def test_encode_unseekable_streams():
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"piped")
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        # A pipe reports no usable size, so one must be given
+        with pytest.raises(ValueError, match="size must be given"):
+            flowfile_package.encode([({}, pipe)])
+        package = flowfile_package.encode([({}, pipe, 5)])
+    assert flowfile_package.decode(package) == [({}, b"piped")]
+
+    class Unseekable(io.RawIOBase):
+        """Stands in for a streamed response, like a urllib3 HTTPResponse"""
+
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+
+        def readable(self):
+            return True
+
+        def readinto(self, b):
+            return self._data.readinto(b)
+
+    with pytest.raises(ValueError, match="size must be given"):
+        flowfile_package.encode([({}, Unseekable(b"stream"))])
+    package = flowfile_package.encode([({}, Unseekable(b"stream"), 6)])
+    assert flowfile_package.decode(package) == [({}, b"stream")]
+
+
+def test_decode_errors():
+    package = flowfile_package.encode([({"a": "b"}, b"content")])
+    with pytest.raises(ValueError):
+        flowfile_package.decode(b"NotNiFi" + package[7:])
+    with pytest.raises(ValueError):
+        flowfile_package.decode(package[:-2])
+    with pytest.raises(ValueError):
+        flowfile_package.decode(io.BytesIO(package[:10]))
+    with pytest.raises(ValueError):
+        flowfile_package.encode([({}, iter([b"abc"]), 5)])
+    with pytest.raises(ValueError):
+        flowfile_package.encode([({}, iter([b"abc"]))])
+    with pytest.raises(TypeError):
+        flowfile_package.decode(123)
@@ -0,0 +1,109 @@
+"""Tests for `nipyapi.history` module."""
+
+import csv
+import json
+import threading
+from datetime import datetime
+
+import pytest
+import nipyapi
+from nipyapi import history
+
+
+def _fake_history(actions):
+    """Returns a stand in for _fetch_page serving the given actions"""
+    calls = []
+
+    def fake(offset, count, filters):
+        calls.append((offset, filters))
+        return actions[offset : offset + count]
+
+    return fake, calls
+
+
+class TestHistoryPaging:
+    """Paging, checkpoint and output tests against a fake history, no NiFi required."""
+
+    actions = [
+        {
+            "id": i,
+            "timestamp": f"01/15/2024 10:00:{i:02d} UTC",
+            "operation": "Add",
+            "componentDetails": {"type": "GenerateFlowFile"},
+        }
+        for i in range(1, 24)
+    ]
+
+    def test_query_date(self):
+        assert history._query_date(datetime(2024, 1, 15, 10, 0, 5)) == "01/15/2024 10:00:05"
+        assert history._query_date("01/15/2024 10:00:05.123 UTC") == "01/15/2024 10:00:05"
+        assert history._query_date(None) is None
+        with pytest.raises(TypeError):
+            history._query_date(1705312805)
+
+    def test_iter_history(self, monkeypatch):
+        fake, calls = _fake_history(self.actions)
+        monkeypatch.setattr(history, "_fetch_page", fake)
+        result = list(history.iter_history(user_identity="admin", page_size=5, max_workers=2))
+        assert [x["id"] for x in result] == list(range(1, 24))
+        assert calls[0][1] == {"user_identity": "admin"}
+        # Pages up to the short one, plus at most the prefetched next window
+        offsets = sorted(x[0] for x in calls)
+        assert offsets[:6] == [0, 5, 10, 15, 20, 25]
+        assert set(offsets[6:]) <= {30, 35}
+        resumed = list(history.iter_history(after_id=20, page_size=50))
+        assert [x["id"] for x in resumed] == [21, 22, 23]
+
+    def test_iter_history_prefetches(self, monkeypatch):
+        fetched = threading.Event()
+
+        def fake(offset, count, filters):
+            if offset == 10:
+                fetched.set()
+            return self.actions[offset : offset + count]
+
+        monkeypatch.setattr(history, "_fetch_page", fake)
+        walk = history.iter_history(page_size=5, max_workers=2)
+        assert next(walk)["id"] == 1
+        # The second window is requested before the first is consumed
+        assert fetched.wait(5)
+        walk.close()
+
+    def test_export_resume(self, monkeypatch, tmpdir):
+        fake, calls = _fake_history(self.actions[:10])
+        monkeypatch.setattr(history, "_fetch_page", fake)
+        output = str(tmpdir.join("history.csv"))
+        checkpoint = str(tmpdir.join("history.checkpoint"))
+        assert history.export_history(output, checkpoint_file=checkpoint, flush_every=3) == 10
+        assert history.load_checkpoint(checkpoint)["last_id"] == 10
+        fake, calls = _fake_history(self.actions)
+        monkeypatch.setattr(history, "_fetch_page", fake)
+        assert history.export_history(output, checkpoint_file=checkpoint) == 13
+        assert calls[0][1]["start_date"] == "01/15/2024 10:00:10"
+        assert history.load_checkpoint(checkpoint) == {
+            "last_id": 23,
+            "last_timestamp": "01/15/2024 10:00:23 UTC",
+            "count": 23,
+        }
+        with open(output, encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+        assert [int(x["id"]) for x in rows] == list(range(1, 24))
+        assert json.loads(rows[0]["componentDetails"]) == {"type": "GenerateFlowFile"}
+        with pytest.raises(ValueError):
+            history.export_history(output, output_format="xml")
+
+
+def test_iter_history(fix_proc, tmpdir):
+    fix_proc.generate()
+    actions = list(history.iter_history(page_size=10))
+    assert actions
+    assert all("id" in x and "timestamp" in x for x in actions)
+    assert [x["id"] for x in actions] == sorted(x["id"] for x in actions)
+    output = str(tmpdir.join("history.ndjson"))
+    checkpoint = str(tmpdir.join("history.checkpoint"))
+    count = history.export_history(output, checkpoint_file=checkpoint, page_size=10)
+    assert count >= len(actions)
+    assert history.export_history(output, checkpoint_file=checkpoint) == 0
+    with open(output, encoding="utf-8") as handle:
+        assert sum(1 for _ in handle) == count
+    assert nipyapi.history.load_checkpoint(checkpoint)["count"] == count
@@ -0,0 +1,164 @@
+"""Tests for `nipyapi.metrics` module."""
+
+import re
+
+import pytest
+from tests import conftest
+from nipyapi import canvas, metrics, nifi
+
+
+class TestColumns:
+    """Pure logic tests for the columnar pivot, no NiFi required."""
+
+    def test_columns_sorted_and_filled(self):
+        snapshots = [
+            {"timestamp": 2000, "statusMetrics": {"bytesRead": 20}},
+            {"timestamp": 1000, "statusMetrics": {"bytesRead": 10, "bytesWritten": 5}},
+        ]
+        out = metrics._columns(snapshots, {"bytesRead": {}, "bytesWritten": {}})
+        assert list(out["timestamp"]) == [1000, 2000]
+        assert list(out["bytesRead"]) == [10, 20]
+        # Metrics missing from a snapshot are filled with zero
+        assert list(out["bytesWritten"]) == [5, 0]
+
+    def test_columns_empty(self):
+        out = metrics._columns([], {"bytesRead": {}})
+        assert len(out["timestamp"]) == 0
+        assert len(out["bytesRead"]) == 0
+
+    def test_epoch_millis_formats(self):
+        assert metrics._epoch_millis(1700000000000) == 1700000000000
+        assert metrics._epoch_millis("1700000000000") == 1700000000000
+        assert metrics._epoch_millis("2023-11-14T22:13:20.000Z") == 1700000000000
+        assert metrics._epoch_millis("11/14/2023 22:13:20.000 UTC") == 1700000000000
+        with pytest.raises(ValueError):
+            metrics._epoch_millis("not a time")
+
+    def test_resolve_kind(self):
+        with pytest.raises(ValueError):
+            metrics._resolve_kind("some-id", None)
+        with pytest.raises(ValueError):
+            metrics._resolve_kind("some-id", "funnel")
+        with pytest.raises(TypeError):
+            metrics._resolve_kind(123, "processor")
+        assert metrics._resolve_kind("some-id", "connection") == ("some-id", "connection")
+
+
+
+PROMETHEUS_TEXT = """\
+# HELP nifi_amount_items_queued Total number of items queued by the component
+# TYPE nifi_amount_items_queued gauge
+nifi_amount_items_queued{instance="node1",component_type="Connection",component_name="success",component_id="c1",parent_id="pg1",} 5.0
+nifi_amount_items_queued{instance="node1",component_type="Connection",component_name="a \\"quoted\\", name",component_id="c2",parent_id="pg1",} 0.0
+# HELP nifi_jvm_heap_used The amount of heap used
+# TYPE nifi_jvm_heap_used gauge
+nifi_jvm_heap_used{instance="node1",} 1.5E8 1700000000000
+# TYPE nifi_flowfiles_received counter
+nifi_flowfiles_received_total{component_id="c1",component_name="success",} NaN
+"""
+
+
+class TestPrometheusParser:
+    """Pure logic tests for the Prometheus text parser, no NiFi required."""
+
+    def test_parse_all(self):
+        samples = list(metrics.parse_prometheus(PROMETHEUS_TEXT.splitlines()))
+        assert len(samples) == 4
+        first = samples[0]
+        assert isinstance(first, metrics.MetricSample)
+        assert first.name == "nifi_amount_items_queued"
+        assert first.labels["component_id"] == "c1"
+        assert first.value == 5.0
+        assert first.timestamp is None
+        assert samples[1].labels["component_name"] == 'a "quoted", name'
+        assert samples[2].value == 1.5e8
+        assert samples[2].timestamp == 1700000000000
+        # Suffixed samples keep their declared family
+        assert samples[3].family == "nifi_flowfiles_received"
+        assert samples[3].value != samples[3].value
+
+    def test_parse_filters(self):
+        lines = [x.encode() for x in PROMETHEUS_TEXT.splitlines()]
+        out = list(metrics.parse_prometheus(lines, families=["nifi_flowfiles_received"]))
+        assert [x.name for x in out] == ["nifi_flowfiles_received_total"]
+        out = list(metrics.parse_prometheus(lines, component_ids=["c1"]))
+        assert {x.labels["component_id"] for x in out} == {"c1"}
+        assert len(out) == 2
+        out = list(metrics.parse_prometheus(lines, labels={"instance": "node1"}))
+        assert len(out) == 3
+
+    def test_iter_flow_metrics_suffixed_family(self, monkeypatch):
+        sent = {}
+
+        class _Response(list):
+            def release_conn(self):
+                sent["released"] = True
+
+        def fake(api, *args, **kwargs):
+            sent.update(kwargs)
+            return _Response(x.encode() for x in PROMETHEUS_TEXT.splitlines())
+
+        monkeypatch.setattr(nifi.FlowApi, "get_flow_metrics", fake)
+        out = list(metrics.iter_flow_metrics(families=["nifi_flowfiles_received"]))
+        assert [x.name for x in out] == ["nifi_flowfiles_received_total"]
+        pattern = re.compile(sent["sample_name"])
+        # Server side, the pattern must keep the family's suffixed samples
+        assert pattern.match("nifi_flowfiles_received_total")
+        assert pattern.match("nifi_flowfiles_received")
+        assert not pattern.match("nifi_flowfiles_received2")
+        assert sent["released"]
+        assert "flow_metrics_reporting_strategy" not in sent
+        # Component filters ask NiFi 2 to report every component
+        list(metrics.iter_flow_metrics(component_ids=["c1"]))
+        assert sent["flow_metrics_reporting_strategy"] == "ALL_COMPONENTS"
+        list(
+            metrics.iter_flow_metrics(component_ids=["c1"], reporting_strategy="ALL_PROCESS_GROUPS")
+        )
+        assert sent["flow_metrics_reporting_strategy"] == "ALL_PROCESS_GROUPS"
+
+
+def test_iter_flow_metrics(fix_pg, fix_proc):
+    f_pg = fix_pg.generate()
+    f_p1 = fix_proc.generate(parent_pg=f_pg)
+    f_p2 = fix_proc.generate(parent_pg=f_pg)
+    conn = canvas.create_connection(f_p1, f_p2, ['success'], conftest.test_basename)
+    samples = list(metrics.iter_flow_metrics(component_ids=[conn.id]))
+    assert samples
+    assert all(x.labels["component_id"] == conn.id for x in samples)
+    samples = list(metrics.iter_flow_metrics(component_ids=[f_p1.id]))
+    assert any(x.labels.get("component_type") == "Processor" for x in samples)
+    found = metrics.get_component_metrics(
+        families=["nifi_amount_items_queued"], component_ids=[conn.id]
+    )
+    assert set(found) == {conn.id}
+    assert found[conn.id]["metrics"]["nifi_amount_items_queued"] == 0.0
+    canvas.delete_connection(conn)
+
+
+def test_get_status_history(fix_proc):
+    f_p1 = fix_proc.generate()
+    history = metrics.get_status_history(f_p1)
+    assert isinstance(history, metrics.StatusHistory)
+    assert history.component_id == f_p1.id
+    assert history.kind == "processor"
+    assert "bytesRead" in history.fields
+    assert set(history.aggregate) == {"timestamp"} | set(history.fields)
+    for column in history.aggregate.values():
+        assert len(column) == len(history.aggregate["timestamp"])
+    assert isinstance(history.nodes, dict)
+    by_id = metrics.get_status_history(f_p1.id, "processor")
+    assert by_id.fields == history.fields
+
+
+def test_get_status_histories(fix_pg, fix_proc):
+    f_pg = fix_pg.generate()
+    f_p1 = fix_proc.generate(parent_pg=f_pg)
+    f_p2 = fix_proc.generate(parent_pg=f_pg)
+    conn = canvas.create_connection(f_p1, f_p2, ['success'], conftest.test_basename)
+    out = metrics.get_status_histories([f_p1, f_p2, conn, f_pg])
+    assert set(out) == {f_p1.id, f_p2.id, conn.id, f_pg.id}
+    assert out[conn.id].kind == "connection"
+    assert out[f_pg.id].kind == "process_group"
+    out = metrics.get_status_histories([f_p1.id, f_p2.id], kind="processor", max_workers=2)
+    assert set(out) == {f_p1.id, f_p2.id}
+    canvas.delete_connection(conn)
@@ -568,6 +568,73 @@ def test_get_parameter_context_hierarchy_with_inheritance(fix_context):
         parameters.delete_parameter_context(parent_ctx)
 
 
+def test_get_parameter_context_graph_diamond(monkeypatch):
+    """Shared contexts own parameters as of their last visit on any path."""
+    from nipyapi import nifi
+
+    def _ctx(ctx_id, inherits, names):
+        return nifi.ParameterContextEntity(
+            id=ctx_id,
+            component=nifi.ParameterContextDTO(
+                name=ctx_id,
+                parameters=[
+                    nifi.ParameterEntity(parameter=nifi.ParameterDTO(name=x, value=ctx_id))
+                    for x in names
+                ],
+                inherited_parameter_contexts=[
+                    nifi.ParameterContextReferenceEntity(id=x) for x in inherits
+                ],
+            ),
+        )
+
+    # root inherits left then right, which both inherit shared
+    listing = [
+        _ctx('root', ['left', 'right'], ['r']),
+        _ctx('left', ['shared'], ['lr']),
+        _ctx('right', ['shared'], ['p', 'lr']),
+        _ctx('shared', [], ['p', 's']),
+    ]
+    monkeypatch.setattr(parameters, 'enforce_min_ver', lambda x: None)
+    monkeypatch.setattr(parameters, 'list_all_parameter_contexts', lambda: listing)
+    graph = parameters.get_parameter_context_graph('root')
+    # Paths are walked root, left, shared, right, shared; later ones win
+    assert graph.owners == {'r': 'root', 'lr': 'right', 'p': 'shared', 's': 'shared'}
+    assert graph.inherits['root'] == ['left', 'right']
+
+    # A fetched context that cannot be read is reported clearly
+    monkeypatch.setattr(parameters, 'list_all_parameter_contexts', lambda: listing[:1])
+    monkeypatch.setattr(
+        parameters, 'get_parameter_context',
+        lambda x, identifier_type: nifi.ParameterContextEntity(id=x))
+    with pytest.raises(ValueError, match="not readable"):
+        parameters.get_parameter_context_graph('root')
+
+
+def test_get_parameter_context_graph(fix_inherited_context_hierarchy):
+    """Test get_parameter_context_graph structure and owner index."""
+    if check_version('1.10.0') > 0:
+        pytest.skip("NiFi not 1.10+")
+    f_hier = fix_inherited_context_hierarchy
+    graph = parameters.get_parameter_context_graph(f_hier.parent_ctx.id)
+    assert isinstance(graph, parameters.ParameterContextGraph)
+    assert graph.root_id == f_hier.parent_ctx.id
+    assert graph.inherits == {
+        f_hier.parent_ctx.id: [f_hier.child_ctx.id],
+        f_hier.child_ctx.id: [],
+    }
+    assert set(graph.contexts) == {f_hier.parent_ctx.id, f_hier.child_ctx.id}
+    assert graph.owners[f_hier.parent_param_name] == f_hier.parent_ctx.id
+    assert graph.owners[f_hier.child_param_name] == f_hier.child_ctx.id
+
+    # The ownership map is built from the same index
+    ownership = parameters.get_parameter_ownership_map(f_hier.parent_ctx.id)
+    assert ownership[f_hier.child_param_name]["context_id"] == f_hier.child_ctx.id
+    assert ownership[f_hier.child_param_name]["current_value"] == "child_value"
+
+    with pytest.raises(ValueError, match="Parameter context not found"):
+        parameters.get_parameter_context_graph(str(uuid.uuid4()))
+
+
 def test_get_parameter_context_hierarchy_not_found():
     """Test get_parameter_context_hierarchy with invalid context."""
     if check_version('1.10.0') > 0:
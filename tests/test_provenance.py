@@ -0,0 +1,181 @@
+"""Tests for `nipyapi.provenance` module."""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from nipyapi import nifi, provenance
+
+
+class TestQueryHelpers:
+    """Pure logic tests for request building and content helpers, no NiFi required."""
+
+    def test_dates(self):
+        moment = datetime(2024, 1, 15, 10, 0, 0, tzinfo=timezone.utc)
+        assert provenance._epoch_seconds(moment) == 1705312800
+        assert provenance._epoch_seconds(moment.replace(tzinfo=None)) == 1705312800
+        assert provenance._epoch_seconds(1705312800.5) == 1705312800
+        with pytest.raises(TypeError):
+            provenance._epoch_seconds("yesterday")
+        assert provenance._format_date(1705312800) == "01/15/2024 10:00:00 UTC"
+        assert provenance._parse_date("01/15/2024 10:00:00.123 UTC") == 1705312800
+        assert provenance._parse_date("01/15/2024 10:00:00 GMT") == 1705312800
+        assert provenance._parse_date("01/15/2024 10:00:00 CET") is None
+        assert provenance._parse_date(None) is None
+
+    def test_search_terms(self):
+        terms = provenance._search_terms(
+            component_id="c1", event_type="DROP", attributes={"filename": "a.txt"}
+        )
+        assert set(terms) == {"ProcessorID", "EventType", "filename"}
+        assert terms["ProcessorID"].value == "c1"
+        assert terms["ProcessorID"].inverse is False
+        assert provenance._search_terms() == {}
+
+    def test_content_claim(self):
+        event = nifi.ProvenanceEventDTO(
+            input_content_available=False,
+            output_content_available=True,
+            output_content_claim_container="default",
+            output_content_claim_section="1",
+            output_content_claim_identifier="claim-1",
+            output_content_claim_offset=0,
+            output_content_claim_file_size_bytes=12,
+        )
+        assert provenance._content_claim(event, "input") is None
+        assert provenance._content_claim(event, "output") == ("default", "1", "claim-1", 0, 12)
+
+    def test_byte_budget(self):
+        budget = provenance._ByteBudget(10)
+        budget.acquire(8)
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (budget.acquire(5), acquired.set()))
+        waiter.start()
+        assert not acquired.wait(0.1)
+        budget.release(8)
+        assert acquired.wait(5)
+        waiter.join()
+        assert budget.used == 5
+        budget.release(5)
+        # A request larger than the limit still proceeds when nothing else runs
+        budget.acquire(50)
+        assert budget.used == 50
+
+    def test_replay_filters(self):
+        event = nifi.ProvenanceEventDTO(event_id=7, replay_available=False)
+        assert provenance.replay_events([event], predicate=lambda x: False) == []
+        result = provenance.replay_events([event])
+        assert result == [provenance.ReplayResult(7, False, None, "Replay not available")]
+
+
+def _lineage(nodes, links):
+    """Builds a LineageResultsDTO from (id, type, uuid, children) and link tuples"""
+    return nifi.LineageResultsDTO(
+        nodes=[
+            nifi.ProvenanceNodeDTO(id=i, type=t, flow_file_uuid=u, child_uuids=c, millis=0)
+            for i, t, u, c in nodes
+        ],
+        links=[nifi.ProvenanceLinkDTO(source_id=x, target_id=y) for x, y in links],
+    )
+
+
+class TestLineageGraph:
+    """Pure logic tests for the lineage DAG, no NiFi required."""
+
+    def test_expand_all(self, monkeypatch):
+        results = {
+            ("FLOWFILE", "f0"): _lineage(
+                [
+                    ("f0", "FLOWFILE", None, None),
+                    ("1", "EVENT", "f0", ["f1", "f2"]),
+                    ("f1", "FLOWFILE", None, None),
+                    ("f2", "FLOWFILE", None, None),
+                ],
+                [("f0", "1"), ("1", "f1"), ("1", "f2")],
+            ),
+            ("CHILDREN", "1"): _lineage(
+                [("2", "EVENT", "f1", None), ("3", "EVENT", "f2", None)],
+                [("f1", "2"), ("f2", "3"), ("1", "f1")],
+            ),
+        }
+        calls = []
+
+        def fake(request_type, target, *args, **kwargs):
+            calls.append((request_type, target))
+            return results[(request_type, target)]
+
+        monkeypatch.setattr(provenance, "_lineage_results", fake)
+        graph = provenance.get_lineage("f0")
+        assert isinstance(graph, provenance.LineageGraph)
+        assert len(graph) == 4
+        assert graph.pending() == ["1"]
+        assert graph.expand_all() == 2
+        assert graph.pending() == []
+        assert graph.children("1") == ["f1", "f2"]
+        assert graph.parents("f1") == ["1"]
+        assert set(graph.descendants("f0")) == {"1", "f1", "f2", "2", "3"}
+        assert graph.ancestors("3") == ["f2", "1", "f0"]
+        assert [x.id for x in graph.events("f1")] == ["2"]
+        # Already expanded events are not fetched again
+        assert graph.expand("1") == 0
+        assert calls == [("FLOWFILE", "f0"), ("CHILDREN", "1")]
+        with pytest.raises(ValueError):
+            graph.expand("missing")
+
+    def test_clear_lineage_cache(self, monkeypatch):
+        monkeypatch.setattr(
+            provenance,
+            "_lineage_cache",
+            {("FLOWFILE", "a", None): 1, ("FLOWFILE", "b", None): 2, ("CHILDREN", "a", None): 3},
+        )
+        provenance.clear_lineage_cache("a")
+        assert set(provenance._lineage_cache) == {("FLOWFILE", "b", None), ("CHILDREN", "a", None)}
+        provenance.clear_lineage_cache()
+        assert provenance._lineage_cache == {}
+
+
+def test_get_search_options():
+    fields = provenance.get_search_options()
+    assert "FlowFileUUID" in [x.id for x in fields]
+
+
+def test_query_events(fix_proc):
+    f_p1 = fix_proc.generate()
+    events = provenance.query_events(component_id=f_p1.id, max_wait=30)
+    assert events == []
+
+
+def test_iter_and_export_events(fix_proc, tmpdir):
+    f_p1 = fix_proc.generate()
+    now = int(time.time())
+    events = list(
+        provenance.iter_events(component_id=f_p1.id, start=now - 120, end=now, window=60)
+    )
+    assert events == []
+    path = str(tmpdir.join("events.ndjson"))
+    count = provenance.export_events(path, event_type="DROP", start=now - 60, end=now)
+    with open(path, encoding="utf-8") as handle:
+        lines = handle.readlines()
+    assert len(lines) == count
+    for line in lines:
+        assert json.loads(line)["event_type"] == "DROP"
+
+
+def test_download_contents(fix_proc, tmpdir):
+    f_p1 = fix_proc.generate()
+    events = provenance.query_events(component_id=f_p1.id, max_wait=30)
+    out = provenance.download_contents(events, str(tmpdir.join("content")), max_workers=2)
+    assert out == []
+    assert tmpdir.join("content").check(dir=True)
+    with pytest.raises(ValueError):
+        provenance.download_contents([], str(tmpdir), directions=("sideways",))
+
+
+def test_get_lineage(fix_proc):
+    fix_proc.generate()
+    graph = provenance.get_lineage("00000000-0000-0000-0000-000000000000", max_wait=30)
+    assert isinstance(graph, provenance.LineageGraph)
+    assert graph.pending() == []
+    provenance.clear_lineage_cache()
@@ -0,0 +1,153 @@
+"""Tests for `nipyapi.s2s` module."""
+
+import io
+import time
+import zlib
+
+import pytest
+import nipyapi
+from nipyapi import s2s
+from tests import conftest
+
+
+class _FakeResponse(io.BytesIO):
+    """A streamed transfer response over a fixed body."""
+
+    status = 202
+
+    def release_conn(self):
+        pass
+
+
+def _fake_data_transfer(body, commit_code, calls):
+    """Returns a stand in for DataTransferApi serving one output transaction."""
+
+    class _Api:
+        def __init__(self, client=None):
+            pass
+
+        def create_port_transaction_with_http_info(self, port_type, port_id):
+            return None, 201, {"Location": f"/data-transfer/{port_type}/{port_id}/transactions/t1"}
+
+        def transfer_flow_files(self, port_id, transaction_id, **kwargs):
+            return _FakeResponse(body)
+
+        def commit_output_port_transaction(self, code, checksum, port_id, transaction_id):
+            calls.append((code, checksum))
+            return nipyapi.nifi.TransactionResultEntity(response_code=commit_code, message="")
+
+        def extend_output_port_transaction_ttl(self, port_id, transaction_id):
+            pass
+
+    return _Api
+
+
+class TestDataPackets:
+    """Pure logic tests for site-to-site framing, no NiFi required."""
+
+    def test_round_trip(self):
+        packets = [
+            s2s.DataPacket({"filename": "a.txt", "empty": ""}, b"hello"),
+            s2s.DataPacket({}, b""),
+            s2s.DataPacket({"unicode": "été"}, memoryview(b"x" * 1000)),
+        ]
+        body = b"".join(bytes(x) for p in packets for x in s2s._encode_packet(p))
+        state = {"checksum": 0, "bytes": 0}
+        decoded = list(s2s._decode_packets(io.BytesIO(body), state))
+        assert [x.attributes for x in decoded] == [x.attributes for x in packets]
+        assert [bytes(x.content) for x in decoded] == [bytes(x.content) for x in packets]
+        assert state["checksum"] == zlib.crc32(body)
+        assert state["bytes"] == len(body)
+
+    def test_truncated_stream(self):
+        body = b"".join(bytes(x) for x in s2s._encode_packet(({"a": "b"}, b"content")))
+        with pytest.raises(ValueError):
+            list(s2s._decode_packets(io.BytesIO(body[:-3]), {"checksum": 0, "bytes": 0}))
+
+    def test_truncated_at_field_boundary(self):
+        body = b"".join(bytes(x) for x in s2s._encode_packet(({"a": "b"}, b"content")))
+        # Ends right after the attribute count, where a key length is due
+        with pytest.raises(ValueError):
+            list(s2s._decode_packets(io.BytesIO(body[:4]), {"checksum": 0, "bytes": 0}))
+
+    def test_receive_commit_codes(self, monkeypatch):
+        body = b"".join(bytes(x) for x in s2s._encode_packet(({"a": "b"}, b"content")))
+        peer = s2s.Peer("http://peer/nifi-api", "peer", 8080, False, 1)
+        monkeypatch.setattr(s2s, "_peer_client", lambda url: None)
+        calls = []
+        monkeypatch.setattr(nipyapi.nifi, "DataTransferApi", _fake_data_transfer(body, 12, calls))
+        packets = list(s2s._receive_transaction(peer, "p1"))
+        assert [bytes(x.content) for x in packets] == [b"content"]
+        assert calls == [(12, zlib.crc32(body))]
+        monkeypatch.setattr(nipyapi.nifi, "DataTransferApi", _fake_data_transfer(body, 19, calls))
+        with pytest.raises(ValueError, match="Checksum mismatch"):
+            list(s2s._receive_transaction(peer, "p1"))
+        monkeypatch.setattr(nipyapi.nifi, "DataTransferApi", _fake_data_transfer(body, 13, calls))
+        with pytest.raises(ValueError, match="not committed"):
+            list(s2s._receive_transaction(peer, "p1"))
+
+    def test_batches(self):
+        items = [b"abc", "text", ({"a": "1"}, b"xy"), s2s.DataPacket({}, b"z")]
+        batches = list(s2s._batches(items, batch_size=3, batch_bytes=1024))
+        assert [len(x) for x in batches] == [3, 1]
+        assert batches[0][0] == s2s.DataPacket({}, b"abc")
+        assert batches[0][2].attributes == {"a": "1"}
+        # A batch also closes once its content reaches batch_bytes
+        assert [len(x) for x in s2s._batches(items, batch_size=10, batch_bytes=5)] == [2, 2]
+        # Text is measured in encoded bytes, not characters
+        text = ["éé", "éé", "éé"]
+        assert [len(x) for x in s2s._batches(text, batch_size=10, batch_bytes=5)] == [2, 1]
+        assert s2s._as_packet("été").content == "été".encode("utf-8")
+
+    def test_send_partial_failure(self, monkeypatch):
+        peer = s2s.Peer("http://peer/nifi-api", "peer", 8080, False, 0)
+
+        def fake(peer, port_id, batch):
+            if batch[0].content == b"bad":
+                raise ValueError("boom")
+            return s2s.TransferResult(peer.url, batch[0].content, len(batch), 0, 0)
+
+        monkeypatch.setattr(s2s, "_send_batch", fake)
+        items = [b"a", b"b", b"bad", b"c", b"d"]
+        with pytest.raises(s2s.TransferError) as err:
+            s2s.send_flowfiles("p1", items, batch_size=1, max_workers=2, peers=[peer])
+        # Committed batches of this and earlier windows are reported
+        assert [x.transaction_id for x in err.value.results] == [b"a", b"b", b"c"]
+        assert [str(x) for x in err.value.errors] == ["boom"]
+        assert isinstance(err.value, ValueError)
+
+    def test_port_id(self):
+        assert s2s._port_id("abc") == "abc"
+        with pytest.raises(TypeError):
+            s2s._port_id(123)
+
+
+def test_get_peers():
+    peers = s2s.get_peers()
+    assert peers
+    for peer in peers:
+        assert isinstance(peer, s2s.Peer)
+        assert peer.url.endswith("/nifi-api")
+        assert peer.flow_file_count >= 0
+
+
+def test_send_and_receive():
+    root_id = nipyapi.canvas.get_root_pg_id()
+    name = conftest.test_basename + "_s2s"
+    in_port = nipyapi.canvas.create_port(root_id, "INPUT_PORT", name + "_in", "STOPPED")
+    out_port = nipyapi.canvas.create_port(root_id, "OUTPUT_PORT", name + "_out", "STOPPED")
+    nipyapi.canvas.create_connection(in_port, out_port, name=name)
+    nipyapi.canvas.schedule_port(in_port.id, True)
+    nipyapi.canvas.schedule_port(out_port.id, True)
+    sent = [({"filename": f"{i}.txt"}, f"payload {i}".encode()) for i in range(5)]
+    results = s2s.send_flowfiles(in_port.id, sent, batch_size=2)
+    assert sum(x.flow_files for x in results) == 5
+    received = []
+    deadline = time.time() + 30
+    while len(received) < 5 and time.time() < deadline:
+        received.extend(s2s.receive_flowfiles(out_port.id))
+        time.sleep(0.5)
+    assert sorted(x.attributes["filename"] for x in received) == [x[0]["filename"] for x in sent]
+    assert sorted(bytes(x.content) for x in received) == sorted(x[1] for x in sent)
+    nipyapi.canvas.schedule_port(in_port.id, False)
+    nipyapi.canvas.schedule_port(out_port.id, False)
@@ -0,0 +1,110 @@
+"""Tests for `nipyapi.sampling` module."""
+
+from datetime import datetime, timezone
+
+import pytest
+from nipyapi import sampling
+
+SNAPSHOT = {
+    "id": "root",
+    "name": "NiFi Flow",
+    "flowFilesIn": 300,
+    "bytesIn": 3000,
+    "flowFilesOut": 600,
+    "bytesOut": 6000,
+    "flowFilesQueued": 5,
+    "bytesQueued": 50,
+    "activeThreadCount": 1,
+    "processorStatusSnapshots": [
+        {"id": "p1", "processorStatusSnapshot": {"name": "Gen", "flowFilesOut": 600}}
+    ],
+    "connectionStatusSnapshots": [
+        {"id": "c1", "connectionStatusSnapshot": {"name": "success", "flowFilesQueued": 5}}
+    ],
+    "processGroupStatusSnapshots": [
+        {"id": "g1", "processGroupStatusSnapshot": {"id": "g1", "name": "child"}}
+    ],
+}
+
+
+class TestStatusStore:
+    """Status parsing, storage, downsampling and sampler tests, no NiFi required."""
+
+    def test_walk_status(self):
+        rows = list(sampling._walk_status(SNAPSHOT, {"process_group"}))
+        assert [(x[0], x[1], x[3]) for x in rows] == [
+            ("process_group", "root", None),
+            ("process_group", "g1", "root"),
+        ]
+        rows = list(sampling._walk_status(SNAPSHOT, set(sampling.SAMPLE_KINDS)))
+        assert {x[1] for x in rows} == {"root", "p1", "c1", "g1"}
+        processor = [x for x in rows if x[1] == "p1"][0]
+        assert processor[4][sampling.SAMPLE_FIELDS.index("flowfiles_out")] == 600
+        assert processor[4][sampling.SAMPLE_FIELDS.index("flowfiles_queued")] is None
+
+    def test_store(self):
+        store = sampling.StatusStore(":memory:", retention=100, downsample_after=10, resolution=5)
+        values = (300, 3000, 600, 6000, 5, 50, 1)
+        store.write(1000, [("root", values)], [("root", "process_group", "NiFi Flow", None)])
+        store.write(3000, [("root", (600,) + values[1:])])
+        assert store.components() == [("root", "process_group", "NiFi Flow", None)]
+        assert [x.flowfiles_in for x in store.samples("root")] == [300, 600]
+        assert store.samples("root", start=2) == store.samples("root")[1:]
+        early = datetime(1970, 1, 1, 0, 0, 2, tzinfo=timezone.utc)
+        assert [x.timestamp for x in store.samples("root", end=early)] == [1000]
+        assert store.rates("root")[0].flowfiles_out == 2.0
+        assert store.housekeep(now=20000) == (2, 0)
+        bucket = store.samples("root")
+        assert len(bucket) == 1
+        assert (bucket[0].timestamp, bucket[0].resolution, bucket[0].flowfiles_in) == (0, 5, 450)
+        assert store.housekeep(now=200000) == (0, 1)
+        assert store.components() == []
+        with pytest.raises(TypeError):
+            store.samples("root", start="yesterday")
+
+    def test_time_weighted_downsampling(self):
+        store = sampling.StatusStore(":memory:", retention=3600, downsample_after=300)
+        steady = (100,) + (0,) * 6
+        store.write(0, [("root", steady)])
+        # Unchanged samples between these were suppressed, not stored
+        store.write(270000, [("root", (400,) + steady[1:])])
+        store.write(660000, [("root", steady)])
+        assert store.housekeep(now=900000) == (2, 0)
+        folded = [(x.timestamp, x.resolution, x.flowfiles_in) for x in store.samples("root")]
+        # 100 held for 270s then 400 for 30s, and 400 carried through the next bucket
+        assert folded == [
+            (0, 300, 130),
+            (300000, 300, 400),
+            (600000, 0, 400),
+            (660000, 0, 100),
+        ]
+        assert sampling._fold_rows([(0, (None, 5) + (0,) * 5)], None, 1000)[0][:2] == (None, 5)
+
+    def test_sampler(self, monkeypatch):
+        samples = [list(sampling._walk_status(SNAPSHOT, {"process_group", "processor"}))]
+        monkeypatch.setattr(sampling, "sample_status", lambda pg_id, kinds: samples[0])
+        store = sampling.StatusStore(":memory:")
+        sampler = sampling.StatusSampler(store, kinds=["processor"], keyframe_every=3)
+        assert sampler.sample_once() == 3
+        assert sampler.sample_once() == 0
+        assert sampler.sample_once() == 0
+        assert sampler.sample_once() == 3
+        assert sampler.stats["rows_unchanged"] == 6
+        sampler.interval = 0.01
+        with sampler:
+            assert sampler.running
+            with pytest.raises(ValueError):
+                sampler.start()
+        assert not sampler.running
+        assert sampler.stats["samples"] > 4
+        assert sampler.stats["effective_interval"] >= 0.01
+
+
+def test_sample_status(fix_pg):
+    fix_pg.generate()
+    rows = sampling.sample_status(kinds=["process_group", "processor", "connection"])
+    assert rows[0][0] == "process_group"
+    assert rows[0][3] is None
+    assert all(len(x[4]) == len(sampling.SAMPLE_FIELDS) for x in rows)
+    with pytest.raises(ValueError):
+        sampling.sample_status(kinds=["funnel"])
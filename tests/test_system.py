@@ -166,3 +166,78 @@ def test_registry_connection_and_response():
     import re
     version_pattern = r'^\d+\.\d+(\.\d+)?'
     assert re.match(version_pattern, result), f"Version '{result}' doesn't match expected pattern"
+
+
+def _node_snapshot(node_id, used_heap, threads):
+    """Builds a nodewise diagnostics snapshot for the cluster diagnostics tests."""
+    return nifi.NodeSystemDiagnosticsSnapshotDTO(
+        node_id=node_id,
+        address=f"nifi-{node_id}",
+        snapshot=nifi.SystemDiagnosticsSnapshotDTO(
+            used_heap_bytes=used_heap,
+            max_heap_bytes=1000,
+            total_threads=threads,
+            garbage_collection=[
+                nifi.GarbageCollectionDTO(collection_count=2, collection_millis=10),
+                nifi.GarbageCollectionDTO(collection_count=1, collection_millis=5),
+            ],
+            content_repository_storage_usage=[
+                nifi.StorageUsageDTO(used_space_bytes=20, total_space_bytes=100),
+                nifi.StorageUsageDTO(used_space_bytes=50, total_space_bytes=100),
+            ],
+        ),
+    )
+
+
+def test_cluster_diagnostics_rows():
+    """Test node rows, aggregates and outliers from nodewise snapshots, no NiFi required."""
+    diagnostics = nifi.SystemDiagnosticsDTO(
+        node_snapshots=[
+            _node_snapshot("n1", 400, 100),
+            _node_snapshot("n2", 410, 102),
+            _node_snapshot("n3", 390, 98),
+            _node_snapshot("n4", 950, 101),
+        ]
+    )
+    status = nifi.ProcessGroupStatusDTO(
+        node_snapshots=[
+            nifi.NodeProcessGroupStatusSnapshotDTO(
+                node_id="n1",
+                status_snapshot=nifi.ProcessGroupStatusSnapshotDTO(
+                    active_thread_count=3, flow_files_queued=7, bytes_queued=70
+                ),
+            )
+        ]
+    )
+    rows = system._node_rows(diagnostics, status)
+    assert [x["node_id"] for x in rows] == ["n1", "n2", "n3", "n4"]
+    assert rows[0]["heap_utilization"] == 0.4
+    assert rows[0]["gc_collection_count"] == 3
+    assert rows[0]["content_repo_utilization"] == 0.5
+    assert rows[0]["flowfiles_queued"] == 7
+    assert rows[1]["flowfiles_queued"] is None
+    assert set(system.NODE_DIAGNOSTIC_COLUMNS) <= set(rows[1])
+
+    aggregates = system._aggregate(rows)
+    assert aggregates["heap_used_bytes"]["max"] == 950
+    assert aggregates["total_threads"]["sum"] == 401
+    assert "bytes_queued" in aggregates
+
+    outliers = system._outliers(rows, 3.0)
+    assert {(x.node_id, x.column) for x in outliers} == {
+        ("n4", "heap_used_bytes"),
+        ("n4", "heap_utilization"),
+    }
+    assert system._outliers(rows[:2], 3.0) == []
+
+
+def test_get_cluster_diagnostics():
+    """Test the cluster diagnostics collection against the connected instance."""
+    result = system.get_cluster_diagnostics(jmx_filter="java.lang:type=Runtime")
+    assert isinstance(result, system.ClusterDiagnostics)
+    assert result.nodes
+    assert result.nodes[0]["heap_used_bytes"] > 0
+    assert result.nodes[0]["active_threads"] is not None
+    assert result.aggregates["total_threads"]["max"] >= result.aggregates["total_threads"]["min"]
+    assert isinstance(result.outliers, list)
+    assert isinstance(result.jmx, dict)
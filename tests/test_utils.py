@@ -148,6 +148,114 @@ def test_wait_to_complete():
     pass
 
 
+class TestRunConcurrently:
+    """Tests for the run_concurrently utility function."""
+
+    def test_preserves_order(self):
+        """Results are returned in input order regardless of completion order."""
+        import time
+
+        def _slow_echo(x):
+            time.sleep(0.01 * (5 - x))
+            return x
+
+        assert utils.run_concurrently(_slow_echo, range(5)) == [0, 1, 2, 3, 4]
+        assert utils.run_concurrently(_slow_echo, range(5), max_workers=1) == [0, 1, 2, 3, 4]
+        assert utils.run_concurrently(_slow_echo, []) == []
+
+    def test_exceptions(self):
+        """Exceptions are raised by default or returned in place when requested."""
+        def _fail_on_two(x):
+            if x == 2:
+                raise ValueError("two")
+            return x
+
+        with pytest.raises(ValueError, match="two"):
+            utils.run_concurrently(_fail_on_two, range(4))
+        r = utils.run_concurrently(_fail_on_two, range(4), return_exceptions=True)
+        assert r[:2] == [0, 1] and r[3] == 3
+        assert isinstance(r[2], ValueError)
+
+
+class TestRevisionCache:
+    """Tests for the revision cache and optimistic revisioned writes."""
+
+    @staticmethod
+    def _entity(version):
+        return nifi.ProcessorEntity(id='rev-test', revision=nifi.RevisionDTO(version=version))
+
+    @staticmethod
+    def _conflict():
+        err = nifi.rest.ApiException(status=409, reason='Conflict')
+        err.body = '[1, null, rev-test] is not the most up-to-date revision.'
+        return err
+
+    def test_cache_keeps_newest(self):
+        """Only newer revisions replace cached ones."""
+        utils.clear_revision_cache()
+        utils.cache_revision(self._entity(3))
+        utils.cache_revision([self._entity(2), nifi.ProcessorEntity(id='no-rev')])
+        assert utils.get_cached_revision('rev-test').version == 3
+        assert utils.get_cached_revision('no-rev') is None
+        utils.clear_revision_cache('rev-test')
+        assert utils.get_cached_revision('rev-test') is None
+
+    def test_cache_is_bounded(self):
+        """The least recently used revisions are dropped beyond the cache size."""
+        utils.clear_revision_cache()
+        with patch.object(config, 'revision_cache_size', 2):
+            for name in ('a', 'b'):
+                utils.cache_revision(
+                    nifi.ProcessorEntity(id=name, revision=nifi.RevisionDTO(version=1)))
+            assert utils.get_cached_revision('a') is not None
+            utils.cache_revision(nifi.ProcessorEntity(id='c', revision=nifi.RevisionDTO(version=1)))
+            assert utils.get_cached_revision('b') is None
+            assert utils.get_cached_revision('a') is not None
+        utils.clear_revision_cache()
+
+    def test_is_revision_conflict(self):
+        """Only stale revision 409s are treated as conflicts."""
+        assert utils.is_revision_conflict(self._conflict())
+        other = nifi.rest.ApiException(status=409, reason='Conflict')
+        other.body = 'rev-test is not in a valid state'
+        assert not utils.is_revision_conflict(other)
+
+    def test_submit_revisioned_optimistic(self):
+        """Stale revisions are refetched and retried when optimistic."""
+        utils.clear_revision_cache()
+        server = {'version': 4}
+        sent = []
+
+        def _submit(entity):
+            sent.append(entity.revision.version)
+            if entity.revision.version != server['version']:
+                raise self._conflict()
+            server['version'] += 1
+            return self._entity(server['version'])
+
+        with patch.object(config, 'optimistic_revisions', True), \
+                patch.object(config, 'short_retry_delay', 0):
+            r = utils.submit_revisioned(
+                self._entity(1), _submit, lambda x: self._entity(server['version']))
+            assert r.revision.version == 5
+            assert sent == [1, 4]
+            # A partial write uses the cached revision, so no conflict
+            utils.submit_revisioned(self._entity(1), _submit, lambda x: None, partial=True)
+            assert sent == [1, 4, 5]
+            # A full write keeps its own stale revision and conflicts first
+            utils.submit_revisioned(
+                self._entity(1), _submit, lambda x: self._entity(server['version']))
+            assert sent == [1, 4, 5, 1, 6]
+            # An entity without a revision takes the cached one
+            utils.submit_revisioned(
+                nifi.ProcessorEntity(id='rev-test'), _submit, lambda x: None)
+            assert sent == [1, 4, 5, 1, 6, 7]
+            # Without refresh the given revision is sent as-is
+            with pytest.raises(nifi.rest.ApiException):
+                utils.submit_revisioned(self._entity(1), _submit, None, refresh=False)
+        utils.clear_revision_cache()
+
+
 class TestIsUuid:
     """Tests for the is_uuid utility function."""
 